@@ -0,0 +1,258 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Mock S3 Backend Microbenchmarks
+
+Drives `ShoobxS3Backend` and its models directly against a temporary
+directory, without boto3, moto's request handling or HTTP, and reports per
+operation:
+
+- ops/sec, from a timed pass,
+- read and write syscalls per op, from ``/proc/self/io`` (Linux only),
+- file system calls per op (open, listdir, rename, ...), from audit events,
+- peak and retained memory per op, from a pass traced with `tracemalloc`.
+
+  python scripts/backend_benchmark.py --keys 10000 -o backend.json
+"""
+import argparse
+import collections
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from shoobx.mocks3 import models
+
+# Audit events of file system calls counted per operation.
+FS_EVENTS = (
+    "open",
+    "os.listdir",
+    "os.scandir",
+    "os.mkdir",
+    "os.rename",
+    "os.remove",
+    "os.rmdir",
+    "os.symlink",
+    "shutil.rmtree",
+)
+
+BUCKET = "benchmark"
+
+_fs_calls = collections.Counter()
+_counting = False
+
+
+def _audit(event, args):
+    if _counting and event in FS_EVENTS:
+        _fs_calls[event] += 1
+
+
+def read_io():
+    """Return the read and write syscall counters of this process or None."""
+    try:
+        with open("/proc/self/io") as file:
+            counters = dict(line.split(": ") for line in file.read().splitlines())
+    except OSError:
+        return None
+    return int(counters["syscr"]), int(counters["syscw"])
+
+
+class Benchmarks:
+    def __init__(self, directory, keys, size):
+        self.backend = models.ShoobxS3Backend()
+        self.backend.directory = directory
+        self.keys = keys
+        self.data = os.urandom(size)
+        self.backend.create_bucket(BUCKET, "us-east-1")
+        for index in range(keys):
+            self.backend.put_object(BUCKET, self.key(index), self.data)
+        self.bucket = self.backend.get_bucket(BUCKET)
+        upload_id = self.backend.create_multipart_upload(
+            BUCKET, "multipart", {}, "STANDARD", {}, None, None, None
+        )
+        self.parts = [
+            (number, self.backend.upload_part(BUCKET, upload_id, number, b"x").etag)
+            for number in range(1, 11)
+        ]
+        self.multipart = self.bucket.multiparts[upload_id]
+
+    def key(self, index):
+        index %= self.keys
+        return f"data/{index // 100:06d}/{index:09d}"
+
+    def bench_put_object(self, index):
+        self.backend.put_object(BUCKET, f"put/{index}", self.data)
+
+    def bench_get_bucket(self, index):
+        self.backend.get_bucket(BUCKET)
+
+    def bench_get_key(self, index):
+        self.bucket.keys[self.key(index)]
+
+    def bench_get_object(self, index):
+        self.backend.get_object(BUCKET, self.key(index))
+
+    def bench_key_etag(self, index):
+        self.bucket.keys[self.key(index)].etag
+
+    def bench_key_value(self, index):
+        self.bucket.keys[self.key(index)].value
+
+    def bench_list_objects(self, index):
+        self.backend.list_objects_v2(self.bucket, "data/", None, None, None, 1000)
+
+    def bench_list_delimiter(self, index):
+        self.backend.list_objects_v2(self.bucket, "data/", "/", None, None, 1000)
+
+    def bench_multipart_upload(self, index):
+        upload_id = self.backend.create_multipart_upload(
+            BUCKET, f"multipart/{index}", {}, "STANDARD", {}, None, None, None
+        )
+        etags = [
+            self.backend.upload_part(BUCKET, upload_id, number, self.data).etag
+            for number in (1, 2)
+        ]
+        self.backend.complete_multipart_upload(BUCKET, upload_id, enumerate(etags, 1))
+
+    def bench_multipart_complete(self, index):
+        # Validates the parts and computes the etag, the upload is kept.
+        self.multipart.complete(self.parts)
+
+    def bench_delete_object(self, index):
+        # Deletes the keys created by the put_object benchmark.
+        self.backend.delete_object(BUCKET, f"put/{index}")
+
+
+BENCHMARKS = [
+    name[len("bench_") :] for name in vars(Benchmarks) if name.startswith("bench_")
+]
+
+
+def measure(benchmarks, name, number):
+    """Run benchmark `name` `number` times and return its measurements."""
+    global _counting
+    func = getattr(benchmarks, f"bench_{name}")
+    # Operations like delete_object consume what an earlier pass created, so
+    # each pass uses its own range of indexes, matching the put_object ones.
+    started = time.perf_counter()
+    for index in range(number):
+        func(index)
+    elapsed = time.perf_counter() - started
+
+    _fs_calls.clear()
+    io_before = read_io()
+    _counting = True
+    for index in range(number, 2 * number):
+        func(index)
+    _counting = False
+    io_after = read_io()
+
+    tracemalloc.start()
+    peak = 0
+    start_memory = tracemalloc.get_traced_memory()[0]
+    for index in range(2 * number, 3 * number):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func(index)
+        peak += tracemalloc.get_traced_memory()[1] - before
+    retained = tracemalloc.get_traced_memory()[0] - start_memory
+    tracemalloc.stop()
+
+    result = {
+        "benchmark": name,
+        "number": number,
+        "ops_per_sec": number / elapsed,
+        "usec_per_op": elapsed / number * 1e6,
+        "fs_calls_per_op": {
+            event: count / number for event, count in sorted(_fs_calls.items())
+        },
+        "peak_bytes_per_op": peak / number,
+        "retained_bytes_per_op": retained / number,
+    }
+    if io_before is not None:
+        result["read_syscalls_per_op"] = (io_after[0] - io_before[0]) / number
+        result["write_syscalls_per_op"] = (io_after[1] - io_before[1]) / number
+    return result
+
+
+def format_result(result):
+    fs_calls = " ".join(
+        f"{event}={count:.1f}" for event, count in result["fs_calls_per_op"].items()
+    )
+    return (
+        f"{result['benchmark']:<20} {result['ops_per_sec']:10.1f} op/s "
+        f"{result['usec_per_op']:9.1f} us/op  "
+        f"syscr={result.get('read_syscalls_per_op', float('nan')):.1f} "
+        f"syscw={result.get('write_syscalls_per_op', float('nan')):.1f}  "
+        f"peak={result['peak_bytes_per_op']:.0f}B "
+        f"retained={result['retained_bytes_per_op']:.0f}B  {fs_calls}"
+    )
+
+
+parser = argparse.ArgumentParser(
+    prog="backend_benchmark",
+    description="Shoobx Mock S3 Backend Microbenchmarks",
+)
+parser.add_argument(
+    "--benchmarks",
+    default=",".join(BENCHMARKS),
+    help=f"Comma separated benchmarks out of: {', '.join(BENCHMARKS)}.",
+)
+parser.add_argument(
+    "--keys", type=int, default=1000, help="Number of keys in the bucket."
+)
+parser.add_argument("--size", type=int, default=1024, help="Value size in bytes.")
+parser.add_argument(
+    "--number", type=int, default=200, help="Operations per measuring pass."
+)
+parser.add_argument(
+    "--directory", help="Directory to create the data in, e.g. on another disk."
+)
+parser.add_argument("-o", "--output", help="Write the results as JSON to this file.")
+
+
+def main(argv=sys.argv[1:]):
+    args = parser.parse_args(argv)
+    names = args.benchmarks.split(",")
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"Unknown benchmark: {name}")
+    sys.addaudithook(_audit)
+    directory = tempfile.mkdtemp(prefix="mocks3-backend-", dir=args.directory)
+    min_part_size = models.settings.S3_UPLOAD_PART_MIN_SIZE
+    # Only the completion of multipart uploads is of interest, parts are tiny.
+    models.settings.S3_UPLOAD_PART_MIN_SIZE = 0
+    try:
+        benchmarks = Benchmarks(directory, args.keys, args.size)
+        results = []
+        for name in names:
+            result = measure(benchmarks, name, args.number)
+            results.append(result)
+            print(format_result(result), flush=True)
+    finally:
+        models.settings.S3_UPLOAD_PART_MIN_SIZE = min_part_size
+        shutil.rmtree(directory)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "keys": args.keys,
+                    "size": args.size,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
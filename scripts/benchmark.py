@@ -0,0 +1,464 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Mock S3 Server Benchmark
+
+Measures throughput and latency percentiles of S3 operations through boto3,
+against a server started in this process or an already running one:
+
+  python scripts/benchmark.py --sizes 1KB,1MB --concurrency 1,16 -o new.json
+  python scripts/benchmark.py --url http://localhost:8003 --compare old.json
+
+The client competes with an in-process server for the GIL, so use ``--url``
+with a server in prefork mode for numbers close to production.
+"""
+import argparse
+import concurrent.futures
+import json
+import logging
+import math
+import os
+import platform
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import boto3
+from botocore.client import Config
+
+# Size of the first part of multipart uploads, the minimum allowed by S3.
+PART_SIZE = 5 * 1024 * 1024
+
+# Maximum number of keys per DeleteObjects request.
+DELETE_BATCH_SIZE = 1000
+
+# Number of keys per common prefix of the pre-populated keys.
+KEYS_PER_PREFIX = 100
+
+OPERATIONS = (
+    "put",
+    "get",
+    "range-get",
+    "head",
+    "list",
+    "list-delimiter",
+    "multipart",
+    "copy",
+    "delete-objects",
+)
+
+UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+SERVER_CONFIG = """
+[shoobx:mocks3]
+log-level = WARNING
+directory = {directory}
+"""
+
+
+def parse_size(text):
+    text = text.strip().upper()
+    number = text.rstrip("KMGB")
+    return int(float(number) * UNITS[text[len(number) :]])
+
+
+def format_size(size):
+    for unit in ("GB", "MB", "KB"):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def percentile(values, fraction):
+    """Return the `fraction` percentile of the sorted `values`."""
+    if not values:
+        return None
+    index = max(0, math.ceil(fraction * len(values)) - 1)
+    return values[index]
+
+
+def check_deleted(response):
+    """Raise an error if keys of a DeleteObjects response were not deleted.
+
+    S3 reports them in the body of a successful response, which boto3 does
+    not raise an error for, unlike responses with an error status.
+    """
+    errors = response.get("Errors")
+    if errors:
+        raise RuntimeError(
+            f"{len(errors)} keys not deleted: {errors[0]['Code']} {errors[0]['Key']}"
+        )
+
+
+def start_server(directory, threads):
+    """Start a mock S3 server in a thread and return its URL."""
+    # Imported here, so benchmarking a running server needs boto3 only.
+    from shoobx.mocks3 import config, run
+
+    config_path = os.path.join(directory, "mocks3.cfg")
+    with open(config_path, "w") as file:
+        file.write(SERVER_CONFIG.format(directory=os.path.join(directory, "data")))
+    app = config.configure(config_path)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    sock = socket.create_server(("127.0.0.1", 0))
+    server = run.PooledWSGIServer(
+        "127.0.0.1",
+        0,
+        app,
+        handler=run.make_handler(keep_alive=5),
+        fd=sock.fileno(),
+        threads=threads,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.port}"
+
+
+class Scenario:
+    """Runs the operations against one bucket with a fixed set of parameters."""
+
+    def __init__(self, s3, size, keys, concurrency, versioned, requests, delete_batch):
+        self.s3 = s3
+        self.size = size
+        self.keys = keys
+        self.concurrency = concurrency
+        self.versioned = versioned
+        self.requests = requests
+        self.delete_batch = delete_batch
+        self.bucket = f"bench-{uuid.uuid4().hex[:12]}"
+        self.data = os.urandom(size)
+
+    def key(self, index):
+        index %= self.keys
+        return f"data/{index // KEYS_PER_PREFIX:06d}/{index:09d}"
+
+    def setup(self):
+        self.s3.create_bucket(Bucket=self.bucket)
+        if self.versioned:
+            self.s3.put_bucket_versioning(
+                Bucket=self.bucket, VersioningConfiguration={"Status": "Enabled"}
+            )
+        self._parallel(
+            lambda index: self.s3.put_object(
+                Bucket=self.bucket, Key=self.key(index), Body=self.data
+            ),
+            self.keys,
+        )
+
+    def teardown(self):
+        try:
+            self._delete_bucket()
+        except Exception as error:
+            # The in-process server removes its data directory anyway.
+            print(f"Could not delete bucket {self.bucket}: {error}", file=sys.stderr)
+
+    def _delete_bucket(self):
+        paginator = self.s3.get_paginator("list_object_versions")
+        for page in paginator.paginate(Bucket=self.bucket):
+            objects = [
+                {"Key": entry["Key"], "VersionId": entry["VersionId"]}
+                for entry in page.get("Versions", []) + page.get("DeleteMarkers", [])
+            ]
+            for start in range(0, len(objects), DELETE_BATCH_SIZE):
+                response = self.s3.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={"Objects": objects[start : start + DELETE_BATCH_SIZE]},
+                )
+                check_deleted(response)
+        self.s3.delete_bucket(Bucket=self.bucket)
+
+    def _parallel(self, func, count):
+        with concurrent.futures.ThreadPoolExecutor(self.concurrency) as executor:
+            for future in [executor.submit(func, index) for index in range(count)]:
+                future.result()
+
+    def op_put(self, index):
+        self.s3.put_object(Bucket=self.bucket, Key=f"put/{index}", Body=self.data)
+
+    def op_get(self, index):
+        self.s3.get_object(Bucket=self.bucket, Key=self.key(index))["Body"].read()
+
+    def op_range_get(self, index):
+        start, end = self.size // 4, max(self.size // 4, self.size // 2 - 1)
+        self.s3.get_object(
+            Bucket=self.bucket, Key=self.key(index), Range=f"bytes={start}-{end}"
+        )["Body"].read()
+
+    def op_head(self, index):
+        self.s3.head_object(Bucket=self.bucket, Key=self.key(index))
+
+    def op_list(self, index):
+        prefix = self.key(index).rsplit("/", 1)[0] + "/"
+        self.s3.list_objects_v2(Bucket=self.bucket, Prefix=prefix)
+
+    def op_list_delimiter(self, index):
+        self.s3.list_objects_v2(
+            Bucket=self.bucket, Prefix="data/", Delimiter="/", MaxKeys=100
+        )
+
+    def op_multipart(self, index):
+        # A minimal first part followed by a part of the benchmarked size.
+        key = f"multipart/{index}"
+        upload_id = self.s3.create_multipart_upload(Bucket=self.bucket, Key=key)[
+            "UploadId"
+        ]
+        parts = []
+        for number, body in enumerate((self.part, self.data), 1):
+            etag = self.s3.upload_part(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=body,
+            )["ETag"]
+            parts.append({"ETag": etag, "PartNumber": number})
+        self.s3.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+
+    def op_copy(self, index):
+        self.s3.copy_object(
+            Bucket=self.bucket,
+            Key=f"copy/{index}",
+            CopySource={"Bucket": self.bucket, "Key": self.key(index)},
+        )
+
+    def prepare_delete_objects(self):
+        self._parallel(
+            lambda index: self.s3.put_object(
+                Bucket=self.bucket, Key=f"delete/{index}", Body=self.data
+            ),
+            self.requests * self.delete_batch,
+        )
+
+    def op_delete_objects(self, index):
+        start = index * self.delete_batch
+        response = self.s3.delete_objects(
+            Bucket=self.bucket,
+            Delete={
+                "Objects": [
+                    {"Key": f"delete/{n}"}
+                    for n in range(start, start + self.delete_batch)
+                ],
+                "Quiet": True,
+            },
+        )
+        check_deleted(response)
+
+    def prepare_multipart(self):
+        self.part = os.urandom(PART_SIZE)
+
+    def run(self, operation):
+        name = operation.replace("-", "_")
+        prepare = getattr(self, f"prepare_{name}", None)
+        if prepare is not None:
+            prepare()
+        func = getattr(self, f"op_{name}")
+        latencies = []
+        errors = []
+
+        def timed(index):
+            start = time.perf_counter()
+            func(index)
+            return time.perf_counter() - start
+
+        started = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(self.concurrency) as executor:
+            futures = [executor.submit(timed, index) for index in range(self.requests)]
+            for future in futures:
+                try:
+                    latencies.append(future.result())
+                except Exception as error:
+                    errors.append(error)
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        return {
+            "operation": operation,
+            "size": self.size,
+            "keys": self.keys,
+            "concurrency": self.concurrency,
+            "versioned": self.versioned,
+            "requests": self.requests,
+            "errors": len(errors),
+            "error": str(errors[0]) if errors else None,
+            "seconds": elapsed,
+            "throughput": len(latencies) / elapsed,
+            "latency": {
+                "mean": sum(latencies) / len(latencies) if latencies else None,
+                "p50": percentile(latencies, 0.50),
+                "p95": percentile(latencies, 0.95),
+                "p99": percentile(latencies, 0.99),
+            },
+        }
+
+
+def result_id(result):
+    return (
+        result["operation"],
+        result["size"],
+        result["keys"],
+        result["concurrency"],
+        result["versioned"],
+    )
+
+
+def format_result(result, baseline=None):
+    latency = {
+        name: value * 1000 if value is not None else math.nan
+        for name, value in result["latency"].items()
+    }
+    line = (
+        f"{result['operation']:<15} {format_size(result['size']):>6} "
+        f"keys={result['keys']:<6} c={result['concurrency']:<3} "
+        f"{'versioned' if result['versioned'] else 'plain':<9} "
+        f"{result['throughput']:9.1f} op/s  "
+        f"p50={latency['p50']:8.2f}ms  "
+        f"p95={latency['p95']:8.2f}ms  "
+        f"p99={latency['p99']:8.2f}ms"
+    )
+    if result["errors"]:
+        line += f"  errors={result['errors']} ({result['error']})"
+    if baseline is not None and baseline["throughput"]:
+        change = result["throughput"] / baseline["throughput"] - 1
+        line += f"  ({change:+.1%} op/s)"
+    return line
+
+
+parser = argparse.ArgumentParser(
+    prog="benchmark",
+    description="Shoobx Mock S3 Server Benchmark",
+)
+parser.add_argument(
+    "--url",
+    help="URL of a running server, by default a server is started in-process.",
+)
+parser.add_argument(
+    "--threads",
+    type=int,
+    default=32,
+    help="Request handler threads of the in-process server.",
+)
+parser.add_argument(
+    "--operations",
+    default=",".join(OPERATIONS),
+    help=f"Comma separated operations out of: {', '.join(OPERATIONS)}.",
+)
+parser.add_argument(
+    "--sizes", default="1KB,64KB,1MB", help="Comma separated object sizes."
+)
+parser.add_argument(
+    "--keys",
+    default="1000",
+    help="Comma separated numbers of keys in the bucket before measuring.",
+)
+parser.add_argument(
+    "--concurrency", default="1,8", help="Comma separated numbers of clients."
+)
+parser.add_argument(
+    "--versioning",
+    default="off",
+    help="Comma separated bucket versioning states out of: off, on.",
+)
+parser.add_argument("--requests", type=int, default=200, help="Requests per operation.")
+parser.add_argument(
+    "--delete-batch", type=int, default=10, help="Keys per DeleteObjects request."
+)
+parser.add_argument("-o", "--output", help="Write the results as JSON to this file.")
+parser.add_argument(
+    "--compare", help="JSON results of an earlier run to compare throughput to."
+)
+
+
+def main(argv=sys.argv[1:]):
+    args = parser.parse_args(argv)
+    operations = args.operations.split(",")
+    for operation in operations:
+        if operation not in OPERATIONS:
+            parser.error(f"Unknown operation: {operation}")
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    key_counts = [int(count) for count in args.keys.split(",")]
+    concurrencies = [int(count) for count in args.concurrency.split(",")]
+    versioning = [state.strip() == "on" for state in args.versioning.split(",")]
+    baselines = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baselines = {
+                result_id(result): result for result in json.load(file)["results"]
+            }
+
+    directory = None
+    url = args.url
+    if url is None:
+        directory = tempfile.mkdtemp(prefix="mocks3-benchmark-")
+        url = start_server(directory, args.threads)
+    s3 = boto3.client(
+        "s3",
+        endpoint_url=url,
+        region_name="us-east-1",
+        aws_access_key_id="benchmark",
+        aws_secret_access_key="benchmark",
+        config=Config(
+            s3={"addressing_style": "path"},
+            max_pool_connections=max(concurrencies),
+            retries={"total_max_attempts": 1},
+        ),
+    )
+
+    results = []
+    try:
+        for versioned in versioning:
+            for size in sizes:
+                for keys in key_counts:
+                    for concurrency in concurrencies:
+                        scenario = Scenario(
+                            s3,
+                            size,
+                            keys,
+                            concurrency,
+                            versioned,
+                            args.requests,
+                            args.delete_batch,
+                        )
+                        scenario.setup()
+                        try:
+                            for operation in operations:
+                                result = scenario.run(operation)
+                                results.append(result)
+                                baseline = baselines.get(result_id(result))
+                                print(format_result(result, baseline), flush=True)
+                        finally:
+                            scenario.teardown()
+    finally:
+        if directory is not None:
+            shutil.rmtree(directory)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "url": args.url,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+
+    failed = [result for result in results if result["errors"]]
+    if failed:
+        # Failed requests make the numbers meaningless, e.g. fast error pages.
+        sys.exit(f"{len(failed)} of {len(results)} benchmarks had failed requests.")
+
+
+if __name__ == "__main__":
+    main()
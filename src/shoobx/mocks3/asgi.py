@@ -0,0 +1,180 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""ASGI Entry Point
+
+Runs the WSGI application under an ASGI server, e.g.::
+
+  SHOOBX_MOCKS3_CONFIG=config/mocks3.cfg \
+      uvicorn --factory shoobx.mocks3.asgi:get_asgi_app
+
+Connections are handled on the event loop, while requests are handled by the
+WSGI application in a bounded thread pool. Request and response bodies are
+streamed between both in chunks.
+"""
+import asyncio
+import concurrent.futures
+import io
+import os
+import sys
+
+from shoobx.mocks3 import config
+
+
+class RequestBody(io.RawIOBase):
+    """The ``wsgi.input`` stream, receiving the body from the event loop."""
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = b""
+        self._more = True
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        while not self._buffer and self._more:
+            message = asyncio.run_coroutine_threadsafe(
+                self._receive(), self._loop
+            ).result()
+            if message["type"] == "http.disconnect":
+                raise OSError("Client disconnected")
+            self._buffer = message.get("body", b"")
+            self._more = message.get("more_body", False)
+
+    def readinto(self, buffer):
+        self._fill()
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def get_environ(scope, body):
+    """Return the WSGI environment for the HTTP request in `scope`."""
+    query_string = scope["query_string"].decode("latin1")
+    raw_path = scope.get("raw_path") or scope["path"].encode("utf-8")
+    raw_uri = raw_path.decode("latin1")
+    if query_string:
+        raw_uri += "?" + query_string
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin1"),
+        "QUERY_STRING": query_string,
+        "RAW_URI": raw_uri,
+        "REQUEST_URI": raw_uri,
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BufferedReader(body),
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = map(str, scope["client"])
+    for name, value in scope["headers"]:
+        name = name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = "HTTP_" + name
+        value = value.decode("latin1")
+        if name in environ:
+            value = f"{environ[name]},{value}"
+        environ[name] = value
+    return environ
+
+
+class ASGIApplication:
+    """ASGI application handling requests with `wsgi_app` in worker threads."""
+
+    def __init__(self, wsgi_app, threads):
+        self.wsgi_app = wsgi_app
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="mocks3-asgi"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self.executor, self._handle, scope, receive, send, loop
+            )
+        else:
+            raise ValueError(f"Unsupported scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _handle(self, scope, receive, send, loop):
+        """Run the WSGI application for one request, in a worker thread."""
+
+        def send_message(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and started:
+                raise exc_info[1].with_traceback(exc_info[2])
+            started[:] = [status, headers]
+
+        def send_start():
+            status, headers = started
+            send_message(
+                {
+                    "type": "http.response.start",
+                    "status": int(status.split(" ", 1)[0]),
+                    "headers": [
+                        (name.lower().encode("latin1"), value.encode("latin1"))
+                        for name, value in headers
+                    ],
+                }
+            )
+
+        environ = get_environ(scope, RequestBody(receive, loop))
+        result = self.wsgi_app(environ, start_response)
+        try:
+            headers_sent = False
+            for chunk in result:
+                if not chunk:
+                    continue
+                if not headers_sent:
+                    send_start()
+                    headers_sent = True
+                send_message(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            if not headers_sent:
+                send_start()
+            send_message({"type": "http.response.body", "body": b""})
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+
+def get_asgi_app():
+    config_file = os.environ.get(
+        "SHOOBX_MOCKS3_CONFIG",
+        os.path.join(config.SHOOBX_MOCKS3_HOME, "config", "mocks3.cfg"),
+    )
+    wsgi_app = config.configure(config_file)
+    conf = config.load_config(config_file)
+    return ASGIApplication(wsgi_app, conf.getint("shoobx:server", "threads"))
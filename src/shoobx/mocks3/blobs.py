@@ -0,0 +1,75 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Content-Addressed Blob Store
+
+Key values are stored once per content in ``blobs/ab/cd/<digest>`` of the data
+directory, and the ``value`` file of every key version holding that content is
+a hard link to the blob. Identical uploads, across versions and buckets, and
+copies thereby share their storage.
+
+The link count of a blob is its reference count: a blob whose only link is
+the one in ``blobs/`` is not used anymore and is removed when the last key
+version referencing it is deleted. Values are never modified in place, only
+replaced, so sharing the file is safe.
+"""
+import os
+import threading
+
+# Name of the blob directory in the data directory.
+BLOBS_DIR = "blobs"
+
+
+class BlobStore:
+    def __init__(self, path):
+        self.path = path
+
+    def blob_path(self, digest):
+        return os.path.join(self.path, digest[:2], digest[2:4], digest)
+
+    def _link(self, src, dst):
+        """Hard link `src` to `dst`, creating the directory of `dst` if needed."""
+        try:
+            os.link(src, dst)
+        except FileNotFoundError:
+            if not os.path.exists(src):
+                raise
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            os.link(src, dst)
+
+    def add(self, tmp_path, path, digest):
+        """Move the value written to `tmp_path` with content `digest` to `path`.
+
+        If the content is stored already, `path` becomes a link to the existing
+        blob and `tmp_path` is removed, otherwise `tmp_path` becomes the blob.
+        """
+        blob_path = self.blob_path(digest)
+        try:
+            self._link(tmp_path, blob_path)
+        except FileExistsError:
+            link_path = f"{tmp_path}.{threading.get_ident()}.link"
+            try:
+                os.link(blob_path, link_path)
+            except FileNotFoundError:
+                # The blob was released in the meantime, keep our copy.
+                os.replace(tmp_path, path)
+                return
+            os.replace(link_path, path)
+            os.unlink(tmp_path)
+            return
+        os.replace(tmp_path, path)
+
+    def link(self, path, dst_path):
+        """Hard link the value at `path` to `dst_path`, sharing its blob."""
+        self._link(path, dst_path)
+
+    def release(self, digest):
+        """Remove the blob `digest` if no key version references it anymore."""
+        blob_path = self.blob_path(digest)
+        try:
+            if os.stat(blob_path).st_nlink == 1:
+                os.unlink(blob_path)
+        except FileNotFoundError:
+            pass
@@ -5,9 +5,9 @@
 ###############################################################################
 """Application Configuration
 """
-from configparser import ConfigParser
 import logging
 import os
+from configparser import ConfigParser
 
 from flask_cors import CORS
 from moto import server
@@ -17,7 +17,7 @@ try:
 except ImportError:
     import configparser  # Py3
 
-from shoobx.mocks3 import models
+from shoobx.mocks3 import engines, layouts, metrics, models, profiling, responses
 
 _CONFIG = None
 CONFIG_FILE = None
@@ -44,17 +44,40 @@ def fill_config(config_path):
     """
     config = ConfigParser()
     default_values = {
-        "shoobx:mocks3":{
+        "shoobx:mocks3": {
             "log-level": "INFO",
             "directory": "./data",
+            "engine": "fs",
+            "database": "./data.sqlite",
             "hostname": "localhost",
-            "reload": "True",
+            "reload": "False",
             "debug": "False",
+            "layout": "flat",
+            "deduplicate": "False",
+            "allow-purge": "False",
+            "allow-snapshots": "False",
+            "metrics": "True",
+            "metrics-buckets": "True",
+            "request-log": "False",
         },
         "shoobx:server": {
             "host-ip": "0.0.0.0",
-            "host-port": "8003"
-        }
+            "host-port": "8003",
+            "mode": "prefork",
+            "workers": "4",
+            "threads": "16",
+            "keep-alive": "5",
+            "backlog": "128",
+            "max-request-size": "5368709120",
+        },
+        "shoobx:profile": {
+            "mode": "off",
+            "directory": "./profiles",
+            "every": "100",
+            "operations": "",
+            "buckets": "",
+            "interval": "0.005",
+        },
     }
 
     for section, option in default_values.items():
@@ -65,8 +88,8 @@ def fill_config(config_path):
 
     for section in config.sections():
         for key in config[section]:
-            env_section = section.upper().replace(':', '_')
-            env_key = key.upper().replace('-', '_')
+            env_section = section.upper().replace(":", "_")
+            env_key = key.upper().replace("-", "_")
             os_key = f"{env_section}_{env_key}"
             if os_key in os.environ:
                 config[section][key] = os.environ[os_key]
@@ -97,19 +120,55 @@ def configure(config_file):
     )
 
     directory = config.get("shoobx:mocks3", "directory")
-    models.s3_backends[models.MOTO_DEFAULT_ACCOUNT_ID]["aws"].directory = directory
-    if not os.path.exists(directory):
-        os.makedirs(directory)
+    backend = models.s3_backends[models.MOTO_DEFAULT_ACCOUNT_ID]["aws"]
+    backend.engine = engines.get_engine(
+        config.get("shoobx:mocks3", "engine"),
+        database=config.get("shoobx:mocks3", "database"),
+    )
+    backend.directory = directory
+    backend.layout = layouts.get_layout(config.get("shoobx:mocks3", "layout")).name
+    backend.deduplicate = config.getboolean("shoobx:mocks3", "deduplicate")
+    backend.allow_purge = config.getboolean("shoobx:mocks3", "allow-purge")
+    backend.allow_snapshots = config.getboolean("shoobx:mocks3", "allow-snapshots")
+    if not backend.engine.real_files and (
+        backend.deduplicate or backend.allow_snapshots
+    ):
+        raise ValueError("deduplicate and allow-snapshots need the fs storage engine")
+    backend.engine.makedirs(directory, exist_ok=True)
 
     def create_backend_app(service):
         app = server.create_backend_app(service)
         CORS(app)
+        app.after_request(responses.pass_file_through)
         return app
 
     app = server.DomainDispatcherApplication(create_backend_app)
 
-    return app.get_application(
+    app = app.get_application(
         {
             "HTTP_HOST": config.get("shoobx:mocks3", "hostname"),
         }
     )
+    mode = config.get("shoobx:profile", "mode")
+    if mode != "off":
+        app.wsgi_app = profiling.ProfilerMiddleware(
+            app.wsgi_app,
+            config.get("shoobx:profile", "directory"),
+            mode=mode,
+            every=config.getint("shoobx:profile", "every"),
+            operations=config.get("shoobx:profile", "operations").split(),
+            buckets=config.get("shoobx:profile", "buckets").split(),
+            interval=config.getfloat("shoobx:profile", "interval"),
+        )
+    if config.getboolean("shoobx:mocks3", "metrics"):
+        metrics_directory = None
+        if backend.engine.multiprocess:
+            metrics_directory = os.path.join(directory, metrics.METRICS_DIR)
+            metrics.clear_published(metrics_directory)
+        app.wsgi_app = metrics.MetricsMiddleware(
+            app.wsgi_app,
+            directory=metrics_directory,
+            bucket_label=config.getboolean("shoobx:mocks3", "metrics-buckets"),
+            log_requests=config.getboolean("shoobx:mocks3", "request-log"),
+        )
+    return app
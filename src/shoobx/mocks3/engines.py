@@ -0,0 +1,792 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Storage Engines
+
+The backend keeps buckets, keys and uploads as a tree of directories, files
+and symbolic links below the data directory, see `models`. A storage engine
+stores that tree:
+
+- ``fs``: the file system. Several server processes can serve the same data
+  directory, and values are sent with ``sendfile()``.
+- ``memory``: dictionaries of the server process, gone when it exits. For
+  ephemeral test runs.
+- ``sqlite``: a single SQLite database file holding the values as blobs. For
+  small values and fast metadata access.
+
+Paths are file system paths with all engines, but only name nodes of the tree
+with the ``memory`` and ``sqlite`` engines. These lock keys and keep the key
+indexes of buckets in the process, so only a single server process may use
+them. The blob store and snapshots need the ``fs`` engine.
+"""
+import collections
+import contextlib
+import errno
+import io
+import itertools
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from shoobx.mocks3 import index, metrics
+
+FS = "fs"
+MEMORY = "memory"
+SQLITE = "sqlite"
+ENGINES = (FS, MEMORY, SQLITE)
+
+# Name of the lock file in a key directory, see `FileSystemEngine.lock()`.
+LOCK_FILE = ".lock"
+
+# Size of the chunks values are copied in when the kernel cannot copy them.
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _error(code, path):
+    return OSError(code, os.strerror(code), path)
+
+
+def _fileno(file):
+    """Return the file descriptor of `file` or None if it has none."""
+    try:
+        return file.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        return None
+
+
+def copy_data(src, dst, offset=0, size=None):
+    """Append `size` bytes at `offset` of file object `src` to `dst`.
+
+    By default everything from `offset` to the end of `src` is copied. Where
+    the platform supports it and both are files of the file system, the data
+    is moved by the kernel with ``copy_file_range()`` and never passes through
+    Python.
+    """
+    src_fd, dst_fd = _fileno(src), _fileno(dst)
+    if size is None:
+        if src_fd is not None:
+            size = os.fstat(src_fd).st_size - offset
+        else:
+            size = src.seek(0, io.SEEK_END) - offset
+    metrics.count("disk_read_bytes", size)
+    metrics.count("disk_write_bytes", size)
+    if None not in (src_fd, dst_fd) and hasattr(os, "copy_file_range"):
+        dst.flush()
+        try:
+            while size > 0:
+                copied = os.copy_file_range(src_fd, dst_fd, size, offset)
+                if not copied:
+                    return
+                offset += copied
+                size -= copied
+            return
+        except OSError as err:
+            # Not supported for these files, copy the rest by hand.
+            if err.errno not in (
+                errno.EXDEV,
+                errno.ENOSYS,
+                errno.EINVAL,
+                errno.EOPNOTSUPP,
+            ):
+                raise
+    src.seek(offset)
+    while size > 0:
+        chunk = src.read(min(COPY_CHUNK_SIZE, size))
+        if not chunk:
+            return
+        dst.write(chunk)
+        size -= len(chunk)
+
+
+# ioctl() making a file share the data of another one, see ioctl_ficlone(2).
+FICLONE = 0x40049409
+
+
+def _reflink(src, dst):
+    """Make file object `dst` a copy-on-write clone of `src`, if supported."""
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        return False
+    return True
+
+
+class FileSystemEngine:
+    """Stores the tree in the file system."""
+
+    name = FS
+    # Whether paths are files of the file system, which can be hard linked,
+    # walked and sent with ``sendfile()``.
+    real_files = True
+    # Whether several processes can serve the same data directory.
+    multiprocess = True
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def isdir(self, path):
+        return os.path.isdir(path)
+
+    def getsize(self, path):
+        return os.path.getsize(path)
+
+    @staticmethod
+    def _signature(stat):
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns)
+
+    def signature(self, path):
+        """Return a value that changes whenever the file at `path` is written,
+        or None if it does not exist."""
+        try:
+            return self._signature(os.stat(path))
+        except FileNotFoundError:
+            return None
+
+    def listdir(self, path):
+        return os.listdir(path)
+
+    def makedirs(self, path, exist_ok=False):
+        os.makedirs(path, exist_ok=exist_ok)
+
+    def mkdir(self, path):
+        os.mkdir(path)
+
+    def mkdtemp(self, dir, prefix):
+        return tempfile.mkdtemp(dir=dir, prefix=prefix)
+
+    def open(self, path):
+        """Return a binary file object for reading the file at `path`."""
+        return open(path, "rb")
+
+    def read_file(self, path):
+        """Return the content of the file at `path` and its signature."""
+        with open(path, "rb") as file:
+            # The signature of the file actually read, it might have been
+            # replaced since it was last checked.
+            return file.read(), self._signature(os.fstat(file.fileno()))
+
+    @contextlib.contextmanager
+    def atomic_write(self, path):
+        """Yield a binary file object that replaces the file at `path` on exit.
+
+        Readers, including those in other processes, see either the old or
+        the new content but never a partially written file. Nothing is
+        written if the block raises.
+
+        The new file is modified later than the file it replaces, so their
+        signatures differ even if the new file gets the inode of an earlier
+        one within the granularity of file timestamps.
+        """
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), prefix=".", suffix=".tmp"
+        )
+        try:
+            with open(fd, "wb") as file:
+                yield file
+                file.flush()
+                mtime_ns = time.time_ns()
+                with contextlib.suppress(FileNotFoundError):
+                    mtime_ns = max(mtime_ns, os.stat(path).st_mtime_ns + 1)
+                os.utime(file.fileno(), ns=(mtime_ns, mtime_ns))
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
+
+    def write_file(self, path, data):
+        """Atomically replace the file at `path` with `data`."""
+        with self.atomic_write(path) as file:
+            file.write(data)
+
+    def replace(self, src, dst):
+        os.replace(src, dst)
+
+    def rename(self, src, dst):
+        os.rename(src, dst)
+
+    def unlink(self, path):
+        os.unlink(path)
+
+    def rmdir(self, path):
+        os.rmdir(path)
+
+    def rmtree(self, path, ignore_errors=False):
+        shutil.rmtree(path, ignore_errors=ignore_errors)
+
+    def read_link(self, path):
+        return os.readlink(path)
+
+    def set_link(self, path, target):
+        """Atomically make `path` a symbolic link to `target`."""
+        tmp_path = os.path.join(
+            os.path.dirname(path),
+            f".{os.path.basename(path)}-{os.getpid()}-{threading.get_ident()}.tmp",
+        )
+        os.symlink(target, tmp_path)
+        try:
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @contextlib.contextmanager
+    def lock(self, path):
+        """Hold the exclusive lock of the directory `path`, creating it.
+
+        The lock is an advisory ``flock()`` on a file in the directory, so it
+        serializes writers across all server processes and threads. Removing
+        the directory removes the lock file, and writers waiting for it retry
+        on the new one.
+        """
+        if fcntl is None:  # pragma: no cover
+            os.makedirs(path, exist_ok=True)
+            yield
+            return
+        lock_path = os.path.join(path, LOCK_FILE)
+        while True:
+            os.makedirs(path, exist_ok=True)
+            try:
+                fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            except FileNotFoundError:
+                # The directory was removed in the meantime.
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    current = os.path.samestat(os.fstat(fd), os.stat(lock_path))
+                except FileNotFoundError:
+                    current = False
+                if current:
+                    yield
+                    return
+            finally:
+                os.close(fd)
+
+    def clone(self, src_path, path):
+        """Atomically copy the file at `src_path` to `path`.
+
+        The data never passes through Python: the copy shares the data blocks
+        of the source where the file system supports reflinks (Btrfs, XFS,
+        ...), otherwise the kernel copies it.
+        """
+        with self.atomic_write(path) as dst, open(src_path, "rb") as src:
+            if not _reflink(src, dst):
+                copy_data(src, dst)
+
+    def key_index(self, path, load=None):
+        """Return the key index of a bucket stored at `path`, see `index`."""
+        return index.KeyIndex(path, load)
+
+
+class _VirtualEngine:
+    """Base of the engines storing the tree outside of the file system.
+
+    Files are read and written as a whole. Locks and key indexes are kept in
+    the process.
+    """
+
+    real_files = False
+    multiprocess = False
+
+    def __init__(self):
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        # Key index connections by path, see `index.MemoryKeyIndex`.
+        self._indexes = {}
+
+    def open(self, path):
+        return io.BytesIO(self.read_file(path)[0])
+
+    @contextlib.contextmanager
+    def atomic_write(self, path):
+        if not self.isdir(os.path.dirname(path)):
+            raise _error(errno.ENOENT, path)
+        file = io.BytesIO()
+        yield file
+        self.write_file(path, file.getvalue())
+
+    def makedirs(self, path, exist_ok=False):
+        parent = os.path.dirname(path)
+        if parent and not self.isdir(parent):
+            self.makedirs(parent, exist_ok=True)
+        try:
+            self.mkdir(path)
+        except FileExistsError:
+            if not exist_ok or not self.isdir(path):
+                raise
+
+    def mkdtemp(self, dir, prefix):
+        while True:
+            path = os.path.join(dir, f"{prefix}{os.urandom(6).hex()}")
+            try:
+                self.mkdir(path)
+            except FileExistsError:
+                continue
+            return path
+
+    def replace(self, src, dst):
+        self.rename(src, dst)
+
+    @contextlib.contextmanager
+    def lock(self, path):
+        """Hold the exclusive lock of the directory `path` in this process,
+        creating it."""
+        with self._locks_lock:
+            lock, users = self._locks.get(path, (None, 0))
+            if lock is None:
+                lock = threading.Lock()
+            self._locks[path] = (lock, users + 1)
+        try:
+            with lock:
+                self.makedirs(path, exist_ok=True)
+                yield
+        finally:
+            with self._locks_lock:
+                lock, users = self._locks.pop(path)
+                if users > 1:
+                    self._locks[path] = (lock, users - 1)
+
+    def key_index(self, path, load=None):
+        return index.MemoryKeyIndex(path, load, self._indexes)
+
+    def _forget(self, path):
+        """Drop the key indexes at or below `path`, which was removed."""
+        path = os.path.normpath(path)
+        prefix = os.path.join(path, "")
+        for index_path in list(self._indexes):
+            normalized = os.path.normpath(index_path)
+            if normalized == path or normalized.startswith(prefix):
+                self._indexes.pop(index_path, None)
+
+
+_File = collections.namedtuple("_File", "data, version")
+_Link = collections.namedtuple("_Link", "target")
+
+# Versions of the files of all memory engines, the signatures of the files.
+_versions = itertools.count()
+
+
+class MemoryEngine(_VirtualEngine):
+    """Stores the tree in nested dictionaries of this process."""
+
+    name = MEMORY
+
+    def __init__(self):
+        super().__init__()
+        self._root = {}
+        self._tree_lock = threading.RLock()
+
+    @staticmethod
+    def _parts(path):
+        return [
+            part
+            for part in os.path.normpath(path).split(os.sep)
+            if part not in ("", os.curdir)
+        ]
+
+    def _lookup(self, path):
+        node = self._root
+        for part in self._parts(path):
+            if not isinstance(node, dict):
+                return None
+            node = node.get(part)
+            if node is None:
+                return None
+        return node
+
+    def _parent(self, path):
+        """Return the directory holding `path` and the name of `path` in it."""
+        *parts, name = self._parts(path)
+        node = self._root
+        for part in parts:
+            node = node.get(part)
+            if not isinstance(node, dict):
+                raise _error(errno.ENOENT, path)
+        return node, name
+
+    def exists(self, path):
+        with self._tree_lock:
+            return self._lookup(path) is not None
+
+    def isdir(self, path):
+        with self._tree_lock:
+            return isinstance(self._lookup(path), dict)
+
+    def getsize(self, path):
+        return len(self.read_file(path)[0])
+
+    def signature(self, path):
+        with self._tree_lock:
+            node = self._lookup(path)
+        return node.version if isinstance(node, _File) else None
+
+    def listdir(self, path):
+        with self._tree_lock:
+            node = self._lookup(path)
+            if not isinstance(node, dict):
+                raise _error(errno.ENOENT, path)
+            return list(node)
+
+    def mkdir(self, path):
+        with self._tree_lock:
+            parent, name = self._parent(path)
+            if name in parent:
+                raise _error(errno.EEXIST, path)
+            parent[name] = {}
+
+    def read_file(self, path):
+        with self._tree_lock:
+            node = self._lookup(path)
+        if not isinstance(node, _File):
+            raise _error(errno.ENOENT, path)
+        return node.data, node.version
+
+    def write_file(self, path, data):
+        with self._tree_lock:
+            parent, name = self._parent(path)
+            if isinstance(parent.get(name), dict):
+                raise _error(errno.EISDIR, path)
+            parent[name] = _File(bytes(data), next(_versions))
+
+    def rename(self, src, dst):
+        with self._tree_lock:
+            src_parent, src_name = self._parent(src)
+            node = src_parent.get(src_name)
+            if node is None:
+                raise _error(errno.ENOENT, src)
+            dst_parent, dst_name = self._parent(dst)
+            target = dst_parent.get(dst_name)
+            if isinstance(target, dict):
+                if not isinstance(node, dict):
+                    raise _error(errno.EISDIR, dst)
+                if target:
+                    raise _error(errno.ENOTEMPTY, dst)
+            elif target is not None and isinstance(node, dict):
+                raise _error(errno.ENOTDIR, dst)
+            del src_parent[src_name]
+            dst_parent[dst_name] = node
+            self._forget(src)
+
+    def unlink(self, path):
+        with self._tree_lock:
+            parent, name = self._parent(path)
+            node = parent.get(name)
+            if node is None:
+                raise _error(errno.ENOENT, path)
+            if isinstance(node, dict):
+                raise _error(errno.EISDIR, path)
+            del parent[name]
+
+    def rmdir(self, path):
+        with self._tree_lock:
+            parent, name = self._parent(path)
+            node = parent.get(name)
+            if not isinstance(node, dict):
+                raise _error(errno.ENOENT if node is None else errno.ENOTDIR, path)
+            if node:
+                raise _error(errno.ENOTEMPTY, path)
+            del parent[name]
+
+    def rmtree(self, path, ignore_errors=False):
+        with self._tree_lock:
+            try:
+                parent, name = self._parent(path)
+                if not isinstance(parent.get(name), dict):
+                    raise _error(errno.ENOENT, path)
+            except OSError:
+                if ignore_errors:
+                    return
+                raise
+            del parent[name]
+            self._forget(path)
+
+    def read_link(self, path):
+        with self._tree_lock:
+            node = self._lookup(path)
+        if node is None:
+            raise _error(errno.ENOENT, path)
+        if not isinstance(node, _Link):
+            raise _error(errno.EINVAL, path)
+        return node.target
+
+    def set_link(self, path, target):
+        with self._tree_lock:
+            parent, name = self._parent(path)
+            if isinstance(parent.get(name), dict):
+                raise _error(errno.EISDIR, path)
+            parent[name] = _Link(target)
+
+    def clone(self, src_path, path):
+        # Bytes are immutable, the copy shares them.
+        self.write_file(path, self.read_file(src_path)[0])
+
+
+DIRECTORY = "d"
+FILE = "f"
+LINK = "l"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data BLOB,
+    version INTEGER,
+    PRIMARY KEY (parent, name)
+) WITHOUT ROWID;
+"""
+
+# Selects the nodes below the directory given as the first parameter and
+# twice more with "/" and "0", the character after "/", appended.
+SUBTREE = "(parent = ? OR (parent >= ? AND parent < ?))"
+
+
+def _subtree(path):
+    return path, path + "/", path + "0"
+
+
+class SqliteEngine(_VirtualEngine):
+    """Stores the tree in the SQLite database at `database`, a row per node."""
+
+    name = SQLITE
+
+    def __init__(self, database):
+        super().__init__()
+        self.database = database
+        self._local = threading.local()
+
+    def _connect(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            # Connections must not be shared with a forked parent.
+            conn = sqlite3.connect(self.database, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            local.pid, local.conn = os.getpid(), conn
+        return local.conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+
+    @staticmethod
+    def _split(path):
+        return os.path.split(os.path.normpath(path))
+
+    def _kind(self, conn, path):
+        """Return the kind of node at `path` or None if there is none."""
+        parent, name = self._split(path)
+        if not name or name == os.curdir:
+            # The root directory.
+            return DIRECTORY
+        row = conn.execute(
+            "SELECT kind FROM nodes WHERE parent = ? AND name = ?", (parent, name)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def _check_parent(self, conn, path):
+        if self._kind(conn, os.path.dirname(os.path.normpath(path))) != DIRECTORY:
+            raise _error(errno.ENOENT, path)
+
+    def _has_children(self, conn, path):
+        row = conn.execute(
+            "SELECT 1 FROM nodes WHERE parent = ? LIMIT 1", (os.path.normpath(path),)
+        ).fetchone()
+        return row is not None
+
+    def exists(self, path):
+        return self._kind(self._connect(), path) is not None
+
+    def isdir(self, path):
+        return self._kind(self._connect(), path) == DIRECTORY
+
+    def _file_row(self, path, columns):
+        """Return the `columns` of the file at `path` or None if it does not
+        exist."""
+        conn = self._connect()
+        return conn.execute(
+            f"SELECT {columns} FROM nodes WHERE parent = ? AND name = ? AND kind = ?",
+            (*self._split(path), FILE),
+        ).fetchone()
+
+    def getsize(self, path):
+        row = self._file_row(path, "length(data)")
+        if row is None:
+            raise _error(errno.ENOENT, path)
+        return row[0]
+
+    def signature(self, path):
+        row = self._file_row(path, "version")
+        return None if row is None else row[0]
+
+    def listdir(self, path):
+        conn = self._connect()
+        if self._kind(conn, path) != DIRECTORY:
+            raise _error(errno.ENOENT, path)
+        rows = conn.execute(
+            "SELECT name FROM nodes WHERE parent = ?", (os.path.normpath(path),)
+        )
+        return [row[0] for row in rows]
+
+    def mkdir(self, path):
+        with self._transaction() as conn:
+            self._check_parent(conn, path)
+            try:
+                conn.execute(
+                    "INSERT INTO nodes (parent, name, kind) VALUES (?, ?, ?)",
+                    (*self._split(path), DIRECTORY),
+                )
+            except sqlite3.IntegrityError:
+                raise _error(errno.EEXIST, path) from None
+
+    def read_file(self, path):
+        row = self._file_row(path, "data, version")
+        if row is None:
+            raise _error(errno.ENOENT, path)
+        return row[0], row[1]
+
+    def _replace_node(self, conn, path, kind, data):
+        self._check_parent(conn, path)
+        if self._kind(conn, path) == DIRECTORY:
+            raise _error(errno.EISDIR, path)
+        conn.execute(
+            "INSERT OR REPLACE INTO nodes (parent, name, kind, data, version) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (*self._split(path), kind, data, int.from_bytes(os.urandom(7), "big")),
+        )
+
+    def write_file(self, path, data):
+        with self._transaction() as conn:
+            self._replace_node(conn, path, FILE, bytes(data))
+
+    def rename(self, src, dst):
+        src, dst = os.path.normpath(src), os.path.normpath(dst)
+        if src == dst:
+            return
+        with self._transaction() as conn:
+            kind = self._kind(conn, src)
+            if kind is None:
+                raise _error(errno.ENOENT, src)
+            self._check_parent(conn, dst)
+            target = self._kind(conn, dst)
+            if target == DIRECTORY:
+                if kind != DIRECTORY:
+                    raise _error(errno.EISDIR, dst)
+                if self._has_children(conn, dst):
+                    raise _error(errno.ENOTEMPTY, dst)
+            elif target is not None and kind == DIRECTORY:
+                raise _error(errno.ENOTDIR, dst)
+            conn.execute(
+                "DELETE FROM nodes WHERE parent = ? AND name = ?", self._split(dst)
+            )
+            conn.execute(
+                "UPDATE nodes SET parent = ?, name = ? WHERE parent = ? AND name = ?",
+                (*self._split(dst), *self._split(src)),
+            )
+            if kind == DIRECTORY:
+                conn.execute(
+                    f"UPDATE nodes SET parent = ? || substr(parent, ?) "
+                    f"WHERE {SUBTREE}",
+                    (dst, len(src) + 1, *_subtree(src)),
+                )
+        self._forget(src)
+
+    def unlink(self, path):
+        with self._transaction() as conn:
+            kind = self._kind(conn, path)
+            if kind is None:
+                raise _error(errno.ENOENT, path)
+            if kind == DIRECTORY:
+                raise _error(errno.EISDIR, path)
+            conn.execute(
+                "DELETE FROM nodes WHERE parent = ? AND name = ?", self._split(path)
+            )
+
+    def rmdir(self, path):
+        with self._transaction() as conn:
+            kind = self._kind(conn, path)
+            if kind != DIRECTORY:
+                raise _error(errno.ENOENT if kind is None else errno.ENOTDIR, path)
+            if self._has_children(conn, path):
+                raise _error(errno.ENOTEMPTY, path)
+            conn.execute(
+                "DELETE FROM nodes WHERE parent = ? AND name = ?", self._split(path)
+            )
+
+    def rmtree(self, path, ignore_errors=False):
+        path = os.path.normpath(path)
+        with self._transaction() as conn:
+            if self._kind(conn, path) != DIRECTORY:
+                if ignore_errors:
+                    return
+                raise _error(errno.ENOENT, path)
+            conn.execute(f"DELETE FROM nodes WHERE {SUBTREE}", _subtree(path))
+            conn.execute(
+                "DELETE FROM nodes WHERE parent = ? AND name = ?", self._split(path)
+            )
+        self._forget(path)
+
+    def read_link(self, path):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT kind, data FROM nodes WHERE parent = ? AND name = ?",
+            self._split(path),
+        ).fetchone()
+        if row is None:
+            raise _error(errno.ENOENT, path)
+        if row[0] != LINK:
+            raise _error(errno.EINVAL, path)
+        return row[1]
+
+    def set_link(self, path, target):
+        with self._transaction() as conn:
+            self._replace_node(conn, path, LINK, target)
+
+    def clone(self, src_path, path):
+        # The data is copied by SQLite, without passing through Python.
+        with self._transaction() as conn:
+            self._check_parent(conn, path)
+            if self._kind(conn, path) == DIRECTORY:
+                raise _error(errno.EISDIR, path)
+            cursor = conn.execute(
+                "INSERT OR REPLACE INTO nodes (parent, name, kind, data, version) "
+                "SELECT ?, ?, kind, data, ? FROM nodes "
+                "WHERE parent = ? AND name = ? AND kind = ?",
+                (
+                    *self._split(path),
+                    int.from_bytes(os.urandom(7), "big"),
+                    *self._split(src_path),
+                    FILE,
+                ),
+            )
+            if not cursor.rowcount:
+                raise _error(errno.ENOENT, src_path)
+
+
+def get_engine(name, database=None):
+    """Return a new storage engine `name`; ``sqlite`` stores the tree in the
+    database file `database`."""
+    if name == FS:
+        return FileSystemEngine()
+    if name == MEMORY:
+        return MemoryEngine()
+    if name == SQLITE:
+        return SqliteEngine(database)
+    raise ValueError(f"Unknown storage engine: {name}")
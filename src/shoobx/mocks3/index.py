@@ -0,0 +1,331 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Bucket Key Index
+
+A sorted SQLite index of the latest version of every key in a bucket, so
+listings are range scans over the index instead of directory listings plus
+reading the ``info.json`` of every key.
+"""
+import collections
+import os
+import sqlite3
+import tempfile
+import threading
+
+# Name of the index database in the bucket directory.
+INDEX_FILE = "index.sqlite"
+
+# Maximum number of open index connections per thread.
+MAX_CONNECTIONS = 64
+
+# Number of index rows fetched at once while listing.
+FETCH_SIZE = 1000
+
+# The `stats` table holds a single row with the number and total size of the
+# keys, maintained by triggers so reading it is constant time.
+SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS keys (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    storage_class TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    count INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats (id, count, size)
+    SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM keys;
+CREATE TRIGGER IF NOT EXISTS keys_insert AFTER INSERT ON keys BEGIN
+    UPDATE stats SET count = count + 1, size = size + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS keys_update AFTER UPDATE OF size ON keys BEGIN
+    UPDATE stats SET size = size - OLD.size + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS keys_delete AFTER DELETE ON keys BEGIN
+    UPDATE stats SET count = count - 1, size = size - OLD.size;
+END;
+COMMIT;
+"""
+
+COLUMNS = "name, version, size, etag, last_modified, storage_class"
+
+# Replaces the entry of a key, unless a later version is recorded already.
+PUT = (
+    f"INSERT INTO keys ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?) "
+    f"ON CONFLICT (name) DO UPDATE SET "
+    f"version = excluded.version, size = excluded.size, "
+    f"etag = excluded.etag, last_modified = excluded.last_modified, "
+    f"storage_class = excluded.storage_class "
+    f"WHERE excluded.version >= keys.version"
+)
+
+Entry = collections.namedtuple("Entry", COLUMNS)
+
+Stats = collections.namedtuple("Stats", "count, size")
+
+_local = threading.local()
+
+
+def prefix_end(prefix):
+    """Return the smallest string greater than all strings starting with `prefix`.
+
+    None is returned if there is no such string.
+    """
+    while prefix:
+        code = ord(prefix[-1]) + 1
+        if 0xD800 <= code <= 0xDFFF:
+            # Surrogates cannot be stored, SQLite compares UTF-8 encoded text.
+            code = 0xE000
+        if code <= 0x10FFFF:
+            return prefix[:-1] + chr(code)
+        prefix = prefix[:-1]
+    return None
+
+
+def backup(path, dst_path):
+    """Copy the index database at `path` to `dst_path`.
+
+    The copy is consistent even while the index is written.
+    """
+    conn = sqlite3.connect(path, timeout=60)
+    try:
+        dst = sqlite3.connect(dst_path)
+        try:
+            conn.backup(dst)
+        finally:
+            dst.close()
+    finally:
+        conn.close()
+
+
+class KeyIndex:
+    """Index of the keys of a bucket, stored in the SQLite database at `path`.
+
+    `load` is called without arguments when the index does not exist yet and
+    must return the entries of all existing keys, so the index of a data
+    directory written by an older version is built on first use.
+    """
+
+    def __init__(self, path, load=None):
+        self.path = path
+        self.load = load
+
+    def _connections(self):
+        pid = os.getpid()
+        if getattr(_local, "pid", None) != pid:
+            # Connections must not be shared with a forked parent.
+            _local.pid = pid
+            _local.connections = collections.OrderedDict()
+        return _local.connections
+
+    def _open(self, path):
+        conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _build(self):
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(self.path), prefix=".index-", suffix=".tmp"
+        )
+        os.close(fd)
+        try:
+            conn = self._open(tmp_path)
+            try:
+                if self.load is not None:
+                    with conn:
+                        conn.execute("BEGIN")
+                        conn.executemany(PUT, self.load())
+            finally:
+                conn.close()
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _connect(self):
+        connections = self._connections()
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            self._build()
+            inode = os.stat(self.path).st_ino
+        cached = connections.get(self.path)
+        if cached is not None:
+            if cached[0] == inode:
+                connections.move_to_end(self.path)
+                return cached[1]
+            # The bucket was deleted and created again.
+            cached[1].close()
+        conn = self._open(self.path)
+        connections[self.path] = (inode, conn)
+        while len(connections) > MAX_CONNECTIONS:
+            connections.popitem(last=False)[1][1].close()
+        return conn
+
+    def create(self):
+        """Create an empty index."""
+        self._open(self.path).close()
+
+    def put(self, entry):
+        """Record `entry`, unless a later version of the key is indexed."""
+        self._connect().execute(PUT, tuple(entry))
+
+    def delete(self, name):
+        self._connect().execute("DELETE FROM keys WHERE name = ?", (name,))
+
+    def delete_many(self, names):
+        """Delete the keys `names` in a single transaction."""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "DELETE FROM keys WHERE name = ?", ((name,) for name in names)
+            )
+
+    def get(self, name):
+        row = (
+            self._connect()
+            .execute(f"SELECT {COLUMNS} FROM keys WHERE name = ?", (name,))
+            .fetchone()
+        )
+        return None if row is None else Entry(*row)
+
+    def _scan(self, start, inclusive, end):
+        """Yield the entries from `start` up to, excluding, `end` in order."""
+        conn = self._connect()
+        while True:
+            clauses, params = [], []
+            if start is not None:
+                clauses.append("name >= ?" if inclusive else "name > ?")
+                params.append(start)
+            if end is not None:
+                clauses.append("name < ?")
+                params.append(end)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            rows = conn.execute(
+                f"SELECT {COLUMNS} FROM keys {where} ORDER BY name LIMIT ?",
+                (*params, FETCH_SIZE),
+            ).fetchall()
+            yield from (Entry(*row) for row in rows)
+            if len(rows) < FETCH_SIZE:
+                return
+            start, inclusive = rows[-1][0], False
+
+    def list(self, prefix=None, delimiter=None, after=None):
+        """Yield the keys and common prefixes of a listing in order.
+
+        Keys are yielded as entries, common prefixes as strings. Only names
+        greater than `after` are included. Keys rolled up into a common prefix
+        are skipped with a single seek, so listing a page costs the same no
+        matter how many keys the bucket holds.
+        """
+        prefix = prefix or ""
+        end = prefix_end(prefix)
+        start, inclusive = prefix, True
+        if after is not None and after >= prefix:
+            start, inclusive = after, False
+        while True:
+            for entry in self._scan(start, inclusive, end):
+                if delimiter:
+                    pos = entry.name.find(delimiter, len(prefix))
+                    if pos >= 0:
+                        common_prefix = entry.name[: pos + len(delimiter)]
+                        if after is None or common_prefix > after:
+                            yield common_prefix
+                        start, inclusive = prefix_end(common_prefix), True
+                        if start is None or (end is not None and start >= end):
+                            return
+                        break
+                yield entry
+            else:
+                return
+
+    def stats(self):
+        """Return the number and total size of the keys."""
+        conn = self._connect()
+        return Stats(*conn.execute("SELECT count, size FROM stats").fetchone())
+
+    def count(self):
+        return self.stats().count
+
+
+class _Rows(list):
+    """Rows of a query, fetched at once."""
+
+    def fetchone(self):
+        return self[0] if self else None
+
+    def fetchall(self):
+        return self
+
+
+class _SharedConnection:
+    """A connection shared by all threads, which run one statement or
+    transaction at a time."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = threading.RLock()
+
+    def execute(self, sql, params=()):
+        with self._lock:
+            return _Rows(self._conn.execute(sql, params).fetchall())
+
+    def executemany(self, sql, params):
+        with self._lock:
+            self._conn.executemany(sql, params)
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc_info):
+        try:
+            return self._conn.__exit__(*exc_info)
+        finally:
+            self._lock.release()
+
+
+class MemoryKeyIndex(KeyIndex):
+    """Index of the keys of a bucket in an in-memory SQLite database.
+
+    For storage engines without files, see `engines`. The connection is kept
+    in `connections` by `path`, where the engine drops it when the bucket is
+    removed. Every process builds the index with `load` on first use.
+    """
+
+    def __init__(self, path, load=None, connections=None):
+        super().__init__(path, load)
+        self.connections = {} if connections is None else connections
+
+    def _open_memory(self):
+        conn = sqlite3.connect(
+            ":memory:", isolation_level=None, check_same_thread=False
+        )
+        conn.executescript(SCHEMA)
+        return _SharedConnection(conn)
+
+    def _connect(self):
+        conn = self.connections.get(self.path)
+        if conn is None:
+            conn = self._open_memory()
+            if self.load is not None:
+                with conn:
+                    conn.execute("BEGIN")
+                    conn.executemany(PUT, self.load())
+            conn = self.connections.setdefault(self.path, conn)
+        return conn
+
+    def create(self):
+        self.connections[self.path] = self._open_memory()
@@ -0,0 +1,89 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Key Directory Layouts
+
+A layout maps key names to their directories below the ``keys/`` directory of
+a bucket. The directories are accessed through the storage engine of the
+backend, see `engines`.
+"""
+import hashlib
+import os
+
+FLAT = "flat"
+HASHED = "hashed"
+
+
+def encode_name(name):
+    return name.replace("/", "__sl__")
+
+
+def decode_name(name):
+    return name.replace("__sl__", "/")
+
+
+class FlatLayout:
+    """Every key is a directory named after the key in ``keys/``."""
+
+    name = FLAT
+
+    def key_path(self, keys_path, name):
+        return os.path.join(keys_path, encode_name(name))
+
+    def names(self, engine, keys_path):
+        if not engine.exists(keys_path):
+            return
+        for name in engine.listdir(keys_path):
+            yield decode_name(name)
+
+    def init_key(self, engine, path, name):
+        pass
+
+
+class HashedLayout:
+    """Keys are spread over two levels of directories by the hash of the name.
+
+    The key directory is ``keys/ab/cd/abcd...`` for a name hashing to
+    ``abcd...``, and the name is stored in the ``name`` file inside of it. This
+    keeps directories small and the path length independent of the name.
+    """
+
+    name = HASHED
+    name_file = "name"
+
+    def key_path(self, keys_path, name):
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        return os.path.join(keys_path, digest[:2], digest[2:4], digest)
+
+    def names(self, engine, keys_path):
+        if not engine.exists(keys_path):
+            return
+        for first in engine.listdir(keys_path):
+            first_path = os.path.join(keys_path, first)
+            for second in engine.listdir(first_path):
+                second_path = os.path.join(first_path, second)
+                for digest in engine.listdir(second_path):
+                    name_path = os.path.join(second_path, digest, self.name_file)
+                    try:
+                        yield engine.read_file(name_path)[0].decode("utf-8")
+                    except FileNotFoundError:
+                        # The key is being created or deleted.
+                        continue
+
+    def init_key(self, engine, path, name):
+        name_path = os.path.join(path, self.name_file)
+        if engine.exists(name_path):
+            return
+        engine.write_file(name_path, name.encode("utf-8"))
+
+
+LAYOUTS = {layout.name: layout for layout in (FlatLayout(), HashedLayout())}
+
+
+def get_layout(name):
+    try:
+        return LAYOUTS[name]
+    except KeyError:
+        raise ValueError(f"Unknown key layout: {name}") from None
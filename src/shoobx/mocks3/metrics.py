@@ -0,0 +1,454 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Request Metrics
+
+Every request is timed by phase:
+
+- ``routing``: from receiving the request to moto's response class,
+- ``parse``: moto parsing the request (headers, query string, body),
+- ``backend``: calls to the storage backend,
+- ``response``: the rest of moto's handling, e.g. serializing the result,
+- ``send``: sending the response and streaming its body.
+
+Together with the bytes read from and written to disk and the number of
+``info.json`` files parsed, the timings are aggregated per S3 operation and
+bucket and served in the Prometheus text format at ``/METRICS``.
+
+Each process collects its own metrics. When several processes serve the same
+data directory, they publish them in its ``.metrics`` directory, and every
+process serves the sum of all of them. The metrics of processes that exited
+are dropped.
+"""
+import collections
+import contextvars
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import werkzeug.wsgi
+
+log = logging.getLogger("shoobx.mocks3.requests")
+
+PHASES = ("routing", "parse", "backend", "response", "send")
+
+# Counters collected per request, with their metric name and help.
+COUNTERS = {
+    "disk_read_bytes": "Bytes read from key and part values.",
+    "disk_write_bytes": "Bytes written to key and part values.",
+    "info_parses": "info.json files parsed, i.e. missed by the cache.",
+}
+
+# Upper bounds of the request duration histogram buckets, in seconds.
+DURATION_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+# Maximum number of buckets a process reports metrics of separately, the
+# requests of any other bucket are reported under `OTHER_BUCKETS`.
+MAX_BUCKET_LABELS = 100
+# Bucket label of the buckets beyond `MAX_BUCKET_LABELS`, not a bucket name.
+OTHER_BUCKETS = "(other)"
+
+# Name of the directory processes publish their metrics in.
+METRICS_DIR = ".metrics"
+# Minimum number of seconds between two publications of a process.
+PUBLISH_INTERVAL = 1.0
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_current = contextvars.ContextVar("shoobx.mocks3.request", default=None)
+
+
+class RequestMetrics:
+    """Measurements of a single request."""
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.operation = None
+        self.bucket = None
+        self.status = None
+        self.started = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        # End of the current phase, where the next one starts.
+        self._mark = self.started
+
+    def mark(self, phase):
+        """End `phase` now, it started where the last phase ended."""
+        now = time.perf_counter()
+        self.phases[phase] += now - self._mark
+        self._mark = now
+
+    @property
+    def duration(self):
+        return self._mark - self.started
+
+    def as_dict(self):
+        return {
+            "method": self.method,
+            "path": self.path,
+            "operation": self.operation,
+            "bucket": self.bucket,
+            "status": self.status,
+            "duration": round(self.duration, 6),
+            "phases": {name: round(value, 6) for name, value in self.phases.items()},
+            **self.counters,
+        }
+
+
+def current():
+    """Return the metrics of the request being handled or None."""
+    return _current.get()
+
+
+# Environment key of the ``wsgi.file_wrapper`` of a response serving a key
+# value. Middlewares must return it unchanged, so the server can send the file
+# with ``sendfile()``.
+FILE_WRAPPER_KEY = "shoobx.file_wrapper"
+
+
+def is_file_response(environ, result):
+    """Whether `result` is the file wrapper of a response serving a value."""
+    return result is environ.get(FILE_WRAPPER_KEY)
+
+
+def set_current(request):
+    """Make `request` the metrics of the request being handled."""
+    _current.set(request)
+
+
+def count(name, value=1):
+    """Add `value` to counter `name` of the current request, if any."""
+    request = _current.get()
+    if request is not None:
+        request.counters[name] += value
+
+
+class TimedBackend:
+    """Proxy of a backend adding the time spent in its methods to the
+    ``backend`` phase of the current request."""
+
+    def __init__(self, backend, request):
+        self._backend = backend
+        self._request = request
+
+    def __getattr__(self, name):
+        attr = getattr(self._backend, name)
+        if not callable(attr):
+            return attr
+        request = self._request
+
+        def timed(*args, **kw):
+            started = time.perf_counter()
+            try:
+                return attr(*args, **kw)
+            finally:
+                request.phases["backend"] += time.perf_counter() - started
+
+        return timed
+
+
+class Registry:
+    """Metrics aggregated over the requests of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timer = None
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._published = 0.0
+            self.requests = collections.Counter()
+            self.durations = {}
+            self.phases = collections.Counter()
+            self.counters = collections.Counter()
+            self.buckets = set()
+
+    def _bucket_label(self, bucket):
+        """Return the label of `bucket`, which bounds the number of series."""
+        if not bucket or bucket in self.buckets:
+            return bucket
+        if len(self.buckets) >= MAX_BUCKET_LABELS:
+            return OTHER_BUCKETS
+        self.buckets.add(bucket)
+        return bucket
+
+    def record(self, request, bucket_label=True):
+        operation = request.operation or "Unknown"
+        with self._lock:
+            bucket = self._bucket_label(request.bucket or "") if bucket_label else ""
+            self.requests[(operation, bucket, str(request.status))] += 1
+            histogram = self.durations.setdefault(
+                (operation, bucket), [0] * (len(DURATION_BUCKETS) + 1) + [0.0]
+            )
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if request.duration <= bound:
+                    histogram[index] += 1
+            histogram[-2] += 1
+            histogram[-1] += request.duration
+            for phase, value in request.phases.items():
+                self.phases[(operation, bucket, phase)] += value
+            for name, value in request.counters.items():
+                self.counters[(operation, bucket, name)] += value
+
+    def snapshot(self):
+        """Return the metrics as a JSON serializable dictionary."""
+        with self._lock:
+            return {
+                "requests": [
+                    [*labels, value] for labels, value in self.requests.items()
+                ],
+                "durations": [
+                    [*labels, list(value)] for labels, value in self.durations.items()
+                ],
+                "phases": [[*labels, value] for labels, value in self.phases.items()],
+                "counters": [
+                    [*labels, value] for labels, value in self.counters.items()
+                ],
+            }
+
+    def publish(self, directory, force=False):
+        """Write the metrics of this process to `directory`.
+
+        Unless `force` is set, writes happen at most once per
+        `PUBLISH_INTERVAL`, later changes are written when it is over.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = self._published + PUBLISH_INTERVAL - now
+            if not force and wait > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(wait, self.publish, (directory, True))
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            self._published = now
+            self._timer = None
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with open(fd, "w") as file:
+                json.dump(self.snapshot(), file)
+            os.replace(tmp_path, os.path.join(directory, f"{os.getpid()}.json"))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+registry = Registry()
+
+
+def _is_alive(pid):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # The process exists, but belongs to another user.
+        pass
+    return True
+
+
+def _published(directory):
+    """Return the paths of the metrics published in `directory` by pid."""
+    paths = {}
+    for name in os.listdir(directory):
+        pid, ext = os.path.splitext(name)
+        if ext == ".json" and pid.isdigit():
+            paths[int(pid)] = os.path.join(directory, name)
+    return paths
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def clear_published(directory):
+    """Remove the metrics published in `directory` by earlier processes.
+
+    Called on startup, so the metrics of a server start from zero.
+    """
+    if not os.path.isdir(directory):
+        return
+    for path in _published(directory).values():
+        _unlink(path)
+
+
+def collect(directory=None):
+    """Return the snapshots of all processes publishing to `directory`, or of
+    this process only.
+
+    The metrics of processes that are no longer alive are removed, a restarted
+    worker starts counting again from zero.
+    """
+    if directory is None:
+        return [registry.snapshot()]
+    registry.publish(directory, force=True)
+    snapshots = []
+    for pid, path in sorted(_published(directory).items()):
+        if not _is_alive(pid):
+            _unlink(path)
+            continue
+        try:
+            with open(path) as file:
+                snapshots.append(json.load(file))
+        except (FileNotFoundError, ValueError):
+            continue
+    return snapshots
+
+
+def _labels(**labels):
+    return ",".join(
+        '{}="{}"'.format(
+            name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in labels.items()
+    )
+
+
+def render(snapshots):
+    """Return the sum of the metric `snapshots` in the Prometheus text format."""
+    requests = collections.Counter()
+    durations = {}
+    phases = collections.Counter()
+    counters = collections.Counter()
+    for snapshot in snapshots:
+        for *labels, value in snapshot["requests"]:
+            requests[tuple(labels)] += value
+        for *labels, value in snapshot["durations"]:
+            total = durations.setdefault(tuple(labels), [0] * len(value))
+            for index, item in enumerate(value):
+                total[index] += item
+        for *labels, value in snapshot["phases"]:
+            phases[tuple(labels)] += value
+        for *labels, value in snapshot["counters"]:
+            counters[tuple(labels)] += value
+
+    lines = [
+        "# HELP mocks3_requests_total Requests handled.",
+        "# TYPE mocks3_requests_total counter",
+    ]
+    for (operation, bucket, status), value in sorted(requests.items()):
+        labels = _labels(operation=operation, bucket=bucket, status=status)
+        lines.append(f"mocks3_requests_total{{{labels}}} {value}")
+
+    lines += [
+        "# HELP mocks3_request_duration_seconds Request duration.",
+        "# TYPE mocks3_request_duration_seconds histogram",
+    ]
+    for (operation, bucket), histogram in sorted(durations.items()):
+        labels = _labels(operation=operation, bucket=bucket)
+        for bound, value in zip(DURATION_BUCKETS, histogram):
+            lines.append(
+                f'mocks3_request_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                f"{value}"
+            )
+        lines += [
+            f'mocks3_request_duration_seconds_bucket{{{labels},le="+Inf"}} '
+            f"{histogram[-2]}",
+            f"mocks3_request_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}",
+            f"mocks3_request_duration_seconds_count{{{labels}}} {histogram[-2]}",
+        ]
+
+    lines += [
+        "# HELP mocks3_request_phase_seconds_total Time spent per request phase.",
+        "# TYPE mocks3_request_phase_seconds_total counter",
+    ]
+    for (operation, bucket, phase), value in sorted(phases.items()):
+        labels = _labels(operation=operation, bucket=bucket, phase=phase)
+        lines.append(f"mocks3_request_phase_seconds_total{{{labels}}} {value:.6f}")
+
+    for name, help in COUNTERS.items():
+        metric = f"mocks3_{name}_total"
+        lines += [f"# HELP {metric} {help}", f"# TYPE {metric} counter"]
+        for (operation, bucket, counter), value in sorted(counters.items()):
+            if counter == name:
+                labels = _labels(operation=operation, bucket=bucket)
+                lines.append(f"{metric}{{{labels}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """WSGI middleware collecting the metrics of every request.
+
+    `directory` is where metrics are published for other processes, `None`
+    keeps them in this process. With `bucket_label` false, metrics are only
+    aggregated per operation. With `log_requests` set, the measurements of
+    every request are logged as a JSON object.
+    """
+
+    def __init__(self, app, directory=None, bucket_label=True, log_requests=False):
+        self.app = app
+        self.directory = directory
+        self.bucket_label = bucket_label
+        self.log_requests = log_requests
+
+    def __call__(self, environ, start_response):
+        request = RequestMetrics(
+            environ.get("REQUEST_METHOD"), environ.get("PATH_INFO")
+        )
+        set_current(request)
+
+        def _start_response(status, headers, exc_info=None):
+            request.status = int(status.split(" ", 1)[0])
+            return start_response(status, headers, exc_info)
+
+        def close():
+            request.mark("send")
+            set_current(None)
+            self.record(request)
+
+        try:
+            result = self.app(environ, _start_response)
+        except BaseException:
+            close()
+            raise
+        # Moto's handling ends where the response is returned.
+        request.mark("response")
+        request.phases["response"] -= request.phases["backend"]
+        if is_file_response(environ, result):
+            # Wrapping the file wrapper would keep the server from sending
+            # the file by itself; sending is not measured then.
+            close()
+            return result
+        return werkzeug.wsgi.ClosingIterator(result, close)
+
+    def record(self, request):
+        registry.record(request, self.bucket_label)
+        if self.log_requests:
+            log.info(json.dumps(request.as_dict()))
+        if self.directory is not None:
+            try:
+                registry.publish(self.directory)
+            except OSError:
+                logging.getLogger("shoobx.mocks3").exception(
+                    "Publishing metrics failed"
+                )
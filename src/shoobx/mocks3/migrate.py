@@ -0,0 +1,98 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Key Layout Migration
+
+Moves the keys of existing buckets to another key directory layout. The
+server must not be running while a data directory is migrated.
+"""
+import argparse
+import logging
+import os
+import sys
+
+from shoobx.mocks3 import config, layouts, models
+
+log = logging.getLogger("shoobx.mocks3.migrate")
+
+
+def migrate_bucket(bucket, layout):
+    """Move all keys of `bucket` to `layout`.
+
+    Returns the number of keys moved.
+    """
+    old_layout = bucket.layout
+    if old_layout is layout:
+        return 0
+    engine = bucket._engine
+    keys_path = os.path.join(bucket._path, "keys")
+    # Keys are moved to a new directory first, since the directories of
+    # both layouts could collide.
+    new_keys_path = keys_path + ".migrating"
+    engine.makedirs(new_keys_path, exist_ok=True)
+    count = 0
+    for name in list(old_layout.names(engine, keys_path)):
+        new_path = layout.key_path(new_keys_path, name)
+        engine.makedirs(os.path.dirname(new_path), exist_ok=True)
+        engine.rename(old_layout.key_path(keys_path, name), new_path)
+        name_path = os.path.join(new_path, layouts.HashedLayout.name_file)
+        if engine.exists(name_path):
+            engine.unlink(name_path)
+        layout.init_key(engine, new_path, name)
+        count += 1
+    if engine.exists(keys_path):
+        # Only the empty fan-out directories of the old layout are left.
+        engine.rmtree(keys_path)
+    engine.rename(new_keys_path, keys_path)
+    bucket._update_info({"layout": layout.name})
+    bucket._layout = layout
+    return count
+
+
+def migrate(backend, layout, bucket_names=None):
+    buckets = backend.list_buckets()
+    if bucket_names:
+        buckets = [bucket for bucket in buckets if bucket.name in bucket_names]
+    for bucket in buckets:
+        count = migrate_bucket(bucket, layout)
+        log.info("Moved %s keys of bucket %s", count, bucket.name)
+
+
+parser = argparse.ArgumentParser(
+    prog="migrate",
+    usage=("migrate [-c|--config-file <path-to-config>] [-l|--layout <layout>]"),
+    description="Shoobx Mock S3 Key Layout Migration",
+)
+
+parser.add_argument(
+    "-c",
+    "--config-file",
+    dest="config_file",
+    default=os.path.join(config.SHOOBX_MOCKS3_HOME, "config", "mocks3.cfg"),
+    help="The location of the configuration file.",
+)
+
+parser.add_argument(
+    "-l",
+    "--layout",
+    dest="layout",
+    default=None,
+    choices=sorted(layouts.LAYOUTS),
+    help="The target layout, defaults to the configured one.",
+)
+
+parser.add_argument(
+    "buckets",
+    nargs="*",
+    help="The buckets to migrate, defaults to all buckets.",
+)
+
+
+def main(argv=sys.argv[1:]):
+    args = parser.parse_args(argv)
+    config.configure(args.config_file)
+    backend = models.s3_backends[models.MOTO_DEFAULT_ACCOUNT_ID]["aws"]
+    layout = layouts.get_layout(args.layout or backend.layout)
+    migrate(backend, layout, args.buckets)
@@ -7,12 +7,19 @@
 """
 import base64
 import codecs
+import collections
 import collections.abc
+import concurrent.futures
+import contextlib
+import copy
 import datetime
+import errno
 import hashlib
+import io
 import json
 import os
-import shutil
+import tempfile
+import threading
 
 import pytz
 import requests.structures
@@ -24,20 +31,427 @@ from moto.core.utils import (
     iso_8601_datetime_without_milliseconds_s3,
     rfc_1123_datetime,
 )
+from moto.s3 import exceptions, models
 from moto.utilities.utils import get_partition
-from moto.s3 import models
 
+from shoobx.mocks3 import blobs, engines, index, layouts, metrics
 
-def _encode_name(name):
-    return name.replace("/", "__sl__")
+# See http://docs.getmoto.org/en/latest/docs/multi_account.html
+MOTO_DEFAULT_ACCOUNT_ID = "12345678910"
 
 
-def _decode_name(name):
-    return name.replace("__sl__", "/")
+# Maximum number of parsed ``info.json`` files kept by the process-wide cache.
+INFO_CACHE_SIZE = 4096
 
 
-# See http://docs.getmoto.org/en/latest/docs/multi_account.html
-MOTO_DEFAULT_ACCOUNT_ID = "12345678910"
+class _InfoCache:
+    """Bounded LRU cache of parsed ``info.json`` files.
+
+    Entries are keyed by path and validated against the signature of the file
+    in the storage engine, e.g. its inode, size and modification times, so
+    changes made by other processes are picked up without re-parsing the file
+    on every attribute access.
+    """
+
+    def __init__(self, size=INFO_CACHE_SIZE):
+        self.size = size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, engine, path):
+        signature = engine.signature(path)
+        if signature is None:
+            self.discard(path)
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                return entry[1]
+        try:
+            # Use the signature of the file actually parsed, it might have
+            # been replaced since it was checked above.
+            data, signature = engine.read_file(path)
+        except FileNotFoundError:
+            self.discard(path)
+            return None
+        info = json.loads(data)
+        metrics.count("info_parses")
+        self._store(path, signature, info)
+        return info
+
+    def _store(self, path, signature, info):
+        with self._lock:
+            self._entries[path] = (signature, info)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def discard(self, path):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_info_cache = _InfoCache()
+
+
+# Maximum number of buckets kept by the bucket registry of a backend.
+BUCKET_CACHE_SIZE = 1024
+
+# File in the data directory replaced whenever a bucket is created or deleted.
+GENERATION_FILE = ".generation"
+
+
+class _BucketRegistry:
+    """Bounded cache of the existing buckets of a backend.
+
+    Creating or deleting a bucket replaces the generation file of the data
+    directory, which invalidates the registries of all processes serving it.
+    """
+
+    def __init__(self, backend, size=BUCKET_CACHE_SIZE):
+        self.backend = backend
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._generation = None
+
+    @property
+    def _generation_path(self):
+        return os.path.join(self.backend.directory, GENERATION_FILE)
+
+    def _check_generation(self):
+        path = self._generation_path
+        generation = (path, self.backend.engine.signature(path))
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, name):
+        """Return the bucket `name` or None if it does not exist."""
+        with self._lock:
+            self._check_generation()
+            bucket = self._entries.get(name)
+            if bucket is not None:
+                self._entries.move_to_end(name)
+                return bucket
+        bucket = Bucket(self.backend, name, MOTO_DEFAULT_ACCOUNT_ID, None)
+        if not bucket.exists():
+            return None
+        with self._lock:
+            self._entries[name] = bucket
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return bucket
+
+    def invalidate(self):
+        """Forget all buckets, in this and all other processes."""
+        with self._lock:
+            self._entries.clear()
+            self.backend.engine.write_file(self._generation_path, b"")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation = None
+
+
+def _read_info(engine, path):
+    """Return the parsed ``info.json`` at `path` or None if it does not exist.
+
+    The returned dictionary is shared with the cache and must not be mutated.
+    """
+    return _info_cache.get(engine, path)
+
+
+def _write_info(engine, path, info):
+    """Atomically replace the ``info.json`` at `path`.
+
+    Readers, including those in other worker processes, see either the old or
+    the new content but never a partially written file.
+    """
+    try:
+        engine.write_file(path, json.dumps(info).encode("utf-8"))
+    finally:
+        _info_cache.discard(path)
+
+
+# Name of the symlink in a key directory pointing to its latest version.
+LATEST_LINK = "latest"
+# Name of the symlink in a key directory holding the next version to allocate.
+NEXT_VERSION_LINK = "next"
+
+
+def _get_latest(engine, key_path):
+    """Return the latest version recorded for the key at `key_path` or None."""
+    try:
+        return int(engine.read_link(os.path.join(key_path, LATEST_LINK)))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _set_latest(engine, key_path, version):
+    """Atomically point the latest version link of the key at `key_path`."""
+    engine.set_link(os.path.join(key_path, LATEST_LINK), str(version))
+
+
+def _get_next_version(engine, key_path):
+    """Return the next version recorded for the key at `key_path` or None.
+
+    Versions are never allocated twice, even if the latest one was deleted, so a
+    version id always refers to the same value.
+    """
+    try:
+        return int(engine.read_link(os.path.join(key_path, NEXT_VERSION_LINK)))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _set_next_version(engine, key_path, version):
+    engine.set_link(os.path.join(key_path, NEXT_VERSION_LINK), str(version))
+
+
+@contextlib.contextmanager
+def _staged(obj, path):
+    """Let `obj` write its files in a directory that appears at `path` on exit.
+
+    The files are written to a temporary directory next to `path`, which is
+    renamed to `path` once complete, so readers never see a partially written
+    one. If `path` exists already, its files are replaced one by one, each of
+    them atomically. Yields whether the directory is new.
+    """
+    engine = obj._engine
+    if engine.exists(path):
+        yield False
+        return
+    staging_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    engine.makedirs(staging_path)
+    paths = obj._info_path, obj._value_path
+    obj._info_path = os.path.join(staging_path, os.path.basename(paths[0]))
+    obj._value_path = os.path.join(staging_path, os.path.basename(paths[1]))
+    obj._staging = True
+    try:
+        yield True
+        try:
+            engine.rename(staging_path, path)
+        except OSError as err:
+            if err.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                raise
+            # Created concurrently, replace its files instead.
+            for dst_path in reversed(paths):
+                src_path = os.path.join(staging_path, os.path.basename(dst_path))
+                if engine.exists(src_path):
+                    engine.replace(src_path, dst_path)
+            engine.rmdir(staging_path)
+    except BaseException:
+        engine.rmtree(staging_path, ignore_errors=True)
+        raise
+    finally:
+        obj._info_path, obj._value_path = paths
+        obj._staging = False
+
+
+def _read_at(file, offset, size):
+    """Read up to `size` bytes at `offset` of `file` without moving its position.
+
+    Only files without a file descriptor, see `engines`, are moved to `offset`.
+    """
+    fd = None
+    if hasattr(os, "pread"):
+        with contextlib.suppress(AttributeError, io.UnsupportedOperation):
+            fd = file.fileno()
+    if fd is None:
+        file.seek(offset)
+        data = file.read(size)
+        metrics.count("disk_read_bytes", len(data))
+        return data
+    chunks = []
+    while size > 0:
+        chunk = os.pread(fd, size, offset)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        offset += len(chunk)
+        size -= len(chunk)
+    data = b"".join(chunks)
+    metrics.count("disk_read_bytes", len(data))
+    return data
+
+
+# Size of the chunks streamed values are written to disk in.
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_size(file):
+    """Return the size of the open `file`, even if its path was replaced since.
+
+    Only files without a file descriptor, see `engines`, are moved to the end.
+    """
+    fd = engines._fileno(file)
+    if fd is None:
+        return file.seek(0, io.SEEK_END)
+    return os.fstat(fd).st_size
+
+
+def _write_data(file, data, hashes):
+    """Write `data` to `file`, updating `hashes` with it."""
+    if hasattr(data, "read"):
+        while chunk := data.read(WRITE_CHUNK_SIZE):
+            for hash in hashes:
+                hash.update(chunk)
+            file.write(chunk)
+    else:
+        if not isinstance(data, (bytes, bytearray)):
+            data = data.encode("utf-8")
+        for hash in hashes:
+            hash.update(data)
+        file.write(data)
+    metrics.count("disk_write_bytes", file.tell())
+
+
+def _write_value(engine, path, data, blobs=None):
+    """Atomically write a value to `path` and return its MD5 hex digest and blob.
+
+    `data` is either bytes, a string or a binary file object. File objects are
+    consumed in chunks, so the value never has to be held in memory, and the
+    digest is computed in the same pass.
+
+    With a `blobs` store, which needs files, the value is deduplicated by its
+    SHA-256 digest, which is returned as the blob, otherwise the blob is None.
+    """
+    file_hash = hashlib.md5()
+    if blobs is None:
+        with engine.atomic_write(path) as file:
+            _write_data(file, data, [file_hash])
+        return file_hash.hexdigest(), None
+    blob_hash = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=".value-", suffix=".tmp"
+    )
+    try:
+        with open(fd, "wb") as file:
+            _write_data(file, data, [file_hash, blob_hash])
+        blobs.add(tmp_path, path, blob_hash.hexdigest())
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+    return file_hash.hexdigest(), blob_hash.hexdigest()
+
+
+class _LimitedReader:
+    """Binary file object reading at most `size` bytes from `file`."""
+
+    def __init__(self, file, size):
+        self.file = file
+        self.remaining = size
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        metrics.count("disk_read_bytes", len(data))
+        return data
+
+
+def _remove_tree(engine, path, blob_store=None):
+    """Remove the directory `path`, releasing the blobs of the key versions in
+    it from `blob_store`, which needs files."""
+    digests = set()
+    if blob_store is not None:
+        for dirpath, dirnames, filenames in os.walk(path):
+            if "info.json" not in filenames:
+                continue
+            try:
+                # Not through the cache, the files are about to go away.
+                with open(os.path.join(dirpath, "info.json")) as file:
+                    blob = json.load(file).get("blob")
+            except (OSError, ValueError):
+                continue
+            if blob is not None:
+                digests.add(blob)
+    engine.rmtree(path, ignore_errors=True)
+    for digest in digests:
+        blob_store.release(digest)
+
+
+def _concat_values(engine, path, sources):
+    """Atomically write the concatenation of the files at `sources` to `path`."""
+    with engine.atomic_write(path) as file:
+        for source in sources:
+            with engine.open(source) as src:
+                engines.copy_data(src, file)
+
+
+class _InfoStorage:
+    """Mixin for objects keeping their attributes in an ``info.json`` file.
+
+    The files are stored by the storage engine `_engine`, see `engines`.
+    """
+
+    # Changes collected by an open `info_transaction()`.
+    _info_pending = None
+    # Whether the files are written to a staging directory, see `_staged()`.
+    _staging = False
+
+    def __new__(cls, *args, **kw):
+        # Instances are short-lived handles on files. Bypass the instance
+        # tracking of moto's models, which would keep all of them alive.
+        return object.__new__(cls)
+
+    def _get_info(self):
+        if self._info_pending is not None:
+            return self._info_pending
+        return _read_info(self._engine, self._info_path)
+
+    def _update_info(self, fields, replace=False):
+        if self._info_pending is not None:
+            if replace:
+                self._info_pending.clear()
+            self._info_pending.update(fields)
+            return
+        current = _read_info(self._engine, self._info_path)
+        info = {}
+        if not replace:
+            info.update(current or {})
+        info.update(fields)
+        if info == current:
+            # E.g. moto setting the metadata a key was created with.
+            return
+        _write_info(self._engine, self._info_path, info)
+        if not self._staging:
+            self._info_written()
+
+    @contextlib.contextmanager
+    def info_transaction(self):
+        """Collect all ``info.json`` changes and write them once on exit.
+
+        Nested transactions are merged into the outermost one. Nothing is
+        written if the block raises or changes nothing.
+        """
+        if self._info_pending is not None:
+            yield
+            return
+        current = _read_info(self._engine, self._info_path)
+        self._info_pending = dict(current or {})
+        try:
+            yield
+            info = self._info_pending
+        finally:
+            self._info_pending = None
+        if info == current:
+            return
+        _write_info(self._engine, self._info_path, info)
+        if not self._staging:
+            self._info_written()
+
+    def _info_written(self):
+        """Called after ``info.json`` was written outside a staging directory."""
 
 
 class _InfoProperty:
@@ -45,19 +459,19 @@ class _InfoProperty:
         self.name = name
 
     def __get__(self, inst, cls):
-        if not os.path.exists(inst._info_path):
+        info = inst._get_info()
+        if info is None:
             return None
-        with open(inst._info_path) as file:
-            return json.load(file).get(self.name)
+        value = info.get(self.name)
+        if isinstance(value, (dict, list)):
+            # Callers like `Key.set_metadata()` update the value in place.
+            value = copy.deepcopy(value)
+        return value
 
     def __set__(self, inst, value):
         if isinstance(value, bytes):
             value = value.decode("utf-8")
-        with open(inst._info_path) as file:
-            info = json.load(file)
-        info[self.name] = value
-        with open(inst._info_path, "w") as file:
-            json.dump(info, file)
+        inst._update_info({self.name: value})
 
 
 class _AclProperty(_InfoProperty):
@@ -76,12 +490,10 @@ class _AclProperty(_InfoProperty):
         )
 
     def __set__(self, inst, value):
-        with open(inst._info_path) as file:
-            info = json.load(file)
         if value is None:
-            info[self.name] = None
+            inst._update_info({self.name: None})
         else:
-            info[self.name] = [
+            grants = [
                 {
                     "grantees": [
                         {
@@ -95,17 +507,26 @@ class _AclProperty(_InfoProperty):
                 }
                 for grant in value.grants
             ]
-        with open(inst._info_path, "w") as file:
-            json.dump(info, file)
+            inst._update_info({self.name: grants})
 
 
-class Key(models.FakeKey):
+class Key(_InfoStorage, models.FakeKey):
     _last_modified = _InfoProperty("last_modified")
     storage_class = _InfoProperty("storage_class")
     metadata = _InfoProperty("metadata")
     _etag = _InfoProperty("etag")
+    # SHA-256 digest of the value in the blob store, if it is stored there.
+    _blob = _InfoProperty("blob")
     expiry_date = _InfoProperty("expiry_date")
     acl = _AclProperty("acl")
+    # Checksum sent by the client with the value, see `checksum_algorithm`.
+    _checksum_algorithm = _InfoProperty("checksum_algorithm")
+    _checksum_value = _InfoProperty("checksum_value")
+    _size = _InfoProperty("size")
+    # Whether this key was looked up as the latest version, see `_get_info()`.
+    _latest = False
+    # The info of the version, once read by a latest key.
+    _info = None
 
     def __init__(
         self,
@@ -126,13 +547,10 @@ class Key(models.FakeKey):
         self.bucket = bucket
         self.name = name
 
-        self.version = version
         self._is_versioned = is_versioned
         self.multipart = multipart
-        self._path = os.path.join(bucket._path, "keys", _encode_name(name))
-        self._versioned_path = os.path.join(self._path, str(version))
-        self._info_path = os.path.join(self._versioned_path, "info.json")
-        self._value_path = os.path.join(self._versioned_path, "value")
+        self._path = bucket.key_path(name)
+        self._set_version(version)
         self.bucket_name = bucket_name or self.bucket.name
         self.encryption = encryption
         self.kms_key_id = kms_key_id
@@ -142,15 +560,45 @@ class Key(models.FakeKey):
         self.lock_until = lock_until
         self._tick = 0
         self.disposed = None
-        self.checksum_algorithm = "md5"
         self.partition = get_partition(None)
 
+    def _set_version(self, version):
+        self.version = version
+        self._versioned_path = os.path.join(self._path, str(version))
+        self._info_path = os.path.join(self._versioned_path, "info.json")
+        self._value_path = os.path.join(self._versioned_path, "value")
+
+    def _get_info(self):
+        """Return the info of this version.
+
+        A key looked up as the latest version reads it once, so all its
+        attributes are those of the same version. Overwrites in unversioned
+        buckets remove the version they replace, see
+        `ShoobxS3Backend._new_key()`; if that happened since the lookup, the key
+        moves on to the version replacing it.
+        """
+        if self._info_pending is not None or not self._latest:
+            return super()._get_info()
+        while self._info is None:
+            self._info = _read_info(self._engine, self._info_path)
+            if self._info is not None:
+                break
+            latest = _get_latest(self._engine, self._path)
+            if latest is None or latest == self.version:
+                return None
+            self._set_version(latest)
+        return self._info
+
     def __getstate__(self):
         return self.__dict__.copy()
 
     def __setstate__(self, state):
         self.__dict__.update({k: v for k, v in state.items() if k != "value"})
 
+    def __deepcopy__(self, memo):
+        # A key only refers to its files, copies share the bucket.
+        return copy.copy(self)
+
     @property
     def version_id(self):
         return self.version
@@ -159,31 +607,62 @@ class Key(models.FakeKey):
     def version_id(self, value):
         self.version = value
 
+    @property
+    def _engine(self):
+        return self.bucket._engine
+
     @property
     def value(self):
-        with open(self._value_path, "rb") as file:
-            return file.read()
+        with self.open_value() as file:
+            data = file.read()
+        metrics.count("disk_read_bytes", len(data))
+        return data
 
     @value.setter
     def value(self, data):
-        if not isinstance(data, (bytes, bytearray)):
-            data = data.encode("utf-8")
-        with open(self._value_path, "wb") as file:
-            file.write(data)
+        old_blob = self._blob
+        with self.info_transaction():
+            self._etag, self._blob = _write_value(
+                self._engine, self._value_path, data, self._blobs
+            )
+        self._release_blobs([old_blob])
+
+    @property
+    def _blobs(self):
+        """The blob store to deduplicate values in, if enabled."""
+        return self.bucket.s3.blobs if self.bucket.s3.deduplicate else None
+
+    def _release_blobs(self, blobs):
+        for blob in blobs:
+            if blob is not None:
+                self.bucket.s3.blobs.release(blob)
 
     @property
     def etag(self):
         if self._etag is None:
-            with open(self._value_path, "rb") as file:
+            with self.open_value() as file:
                 # The file might be *very* large. Don't try to do it all at once.
                 file_hash = hashlib.md5()
                 while chunk := file.read(8192):
                     file_hash.update(chunk)
+                metrics.count("disk_read_bytes", file.tell())
                 self._etag = file_hash.hexdigest()
         return f'"{self._etag}"'
 
+    @property
+    def checksum_algorithm(self):
+        # Without a checksum of the client, the MD5 of the value is used.
+        return self._checksum_algorithm or "md5"
+
+    @checksum_algorithm.setter
+    def checksum_algorithm(self, value):
+        # Stored on creation, see `create()`.
+        pass
+
     @property
     def checksum_value(self):
+        if self._checksum_algorithm:
+            return self._checksum_value
         return self._etag
 
     @checksum_value.setter
@@ -210,7 +689,7 @@ class Key(models.FakeKey):
         r = {
             "etag": self.etag,
             "last-modified": self.last_modified_RFC1123,
-            "content-length": str(len(self.value)),
+            "content-length": str(self.size),
         }
         if self.storage_class is not None:
             r["x-amz-storage-class"] = self.storage_class
@@ -225,40 +704,205 @@ class Key(models.FakeKey):
 
     @property
     def size(self):
-        return os.path.getsize(self._value_path)
+        size = self._size
+        if size is None:
+            # Keys written before the size was recorded.
+            return self._engine.getsize(self._value_path)
+        return size
+
+    def open_value(self):
+        """Return a binary file object for reading the value."""
+        if self._latest:
+            # Open the value of the version the attributes are read from.
+            self._get_info()
+        return self._engine.open(self._value_path)
+
+    def read_range(self, start, end):
+        """Return the bytes from `start` to `end`, both inclusive, of the value.
+
+        Only the requested bytes are read from disk.
+        """
+        with self.open_value() as file:
+            return _read_at(file, start, end - start + 1)
 
     def exists(self):
-        return os.path.exists(self._versioned_path)
-
-    def create(self, value, storage="STANDARD", etag=None):
-        if not os.path.exists(self._versioned_path):
-            os.makedirs(self._versioned_path)
-        self.value = value
-        with open(self._info_path, "w") as file:
-            json.dump(
-                {
-                    "last_modified": iso_8601_datetime_without_milliseconds_s3(
-                        datetime.datetime.utcnow()
-                    ),
-                    "storage_class": storage,
-                    "metadata": {},
-                    "expiry_date": None,
-                    "etag": etag,
-                },
-                file,
-            )
-        self.set_acl(models.get_canned_acl("private"))
+        return self._engine.exists(self._versioned_path)
+
+    def create(
+        self,
+        value,
+        storage="STANDARD",
+        etag=None,
+        metadata=None,
+        acl=None,
+        checksum_algorithm=None,
+        checksum_value=None,
+    ):
+        """Create this version with `value`.
+
+        `value` is the data, a list of the parts of a multipart upload or the
+        key to copy the value of. A new version appears complete, see
+        `_staged()`; writers allocating versions hold the key lock. The ACL
+        defaults to private. The checksum sent by the client is stored as is,
+        copies keep the one of their source.
+        """
+        if isinstance(value, Key) and checksum_algorithm is None:
+            checksum_algorithm = value._checksum_algorithm
+            checksum_value = value._checksum_value
+        engine = self._engine
+        engine.makedirs(self._path, exist_ok=True)
+        self.bucket.layout.init_key(engine, self._path, self.name)
+        old_blob = self._blob
+        blob = None
+        with _staged(self, self._versioned_path) as new:
+            if isinstance(value, list):
+                # The parts of a multipart upload, their etag is passed in.
+                _concat_values(
+                    engine, self._value_path, [part._value_path for part in value]
+                )
+                value_md5 = None
+            elif isinstance(value, Key):
+                value_md5, blob = value._copy_value(self._value_path, self._blobs)
+            else:
+                value_md5, blob = _write_value(
+                    engine, self._value_path, value, self._blobs
+                )
+            with self.info_transaction():
+                self._update_info(
+                    {
+                        "last_modified": iso_8601_datetime_without_milliseconds_s3(
+                            datetime.datetime.utcnow()
+                        ),
+                        "storage_class": storage,
+                        "metadata": dict(metadata or {}),
+                        "expiry_date": None,
+                        "etag": etag or value_md5,
+                        "blob": blob,
+                        "size": engine.getsize(self._value_path),
+                    },
+                    replace=True,
+                )
+                if checksum_algorithm:
+                    self._checksum_algorithm = checksum_algorithm
+                    self._checksum_value = checksum_value
+                self.set_acl(acl or models.get_canned_acl("private"))
+        latest = _get_latest(engine, self._path)
+        if latest is None or latest < self.version:
+            _set_latest(engine, self._path, self.version)
+        if new:
+            self._info_written()
+        if old_blob != blob:
+            self._release_blobs([old_blob])
+
+    def _copy_value(self, path, blobs):
+        """Copy the value to `path`, return its MD5 hex digest and blob.
+
+        With a blob store the copy is a hard link to the same file, so copying
+        only writes metadata. Otherwise the value is cloned by the storage
+        engine, e.g. with a reflink. Values without a known MD5 are read and
+        hashed while copying them.
+        """
+        etag = self._etag
+        if etag is None or "-" in etag:
+            # The etag of a multipart upload is not the MD5 of the value.
+            with self.open_value() as file:
+                result = _write_value(self._engine, path, file, blobs)
+                metrics.count("disk_read_bytes", file.tell())
+            return result
+        if blobs is not None:
+            tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+            try:
+                blobs.link(self._value_path, tmp_path)
+            except OSError as err:
+                # E.g. buckets on different file systems, copy the value.
+                if err.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    raise
+            else:
+                os.replace(tmp_path, path)
+                return etag, self._blob
+        self._engine.clone(self._value_path, path)
+        return etag, None
 
     def delete(self):
-        shutil.rmtree(self._path)
+        self._remove()
+        self.bucket.index.delete(self.name)
+
+    def _remove(self):
+        """Remove all versions of the key, but not its index entry."""
+        with self._engine.lock(self._path):
+            blobs = [
+                key._blob
+                for key in Key.get_versions(self.bucket, self.name)
+                if isinstance(key, Key)
+            ]
+            self._engine.rmtree(self._path)
+        self._release_blobs(blobs)
+
+    def delete_version(self):
+        """Remove this version and return it, or None if it does not exist.
+
+        A removed key version is returned as a `KeySummary`, a delete marker as
+        a `DeleteMarker`. The latest remaining version becomes the latest, and
+        the key is gone with its last version or if a delete marker is the
+        latest. Its directory is kept with the next version to allocate, so the
+        deleted version ids are not reused.
+        """
+        engine = self._engine
+        with engine.lock(self._path):
+            versions = Key.get_versions(self.bucket, self.name)
+            removed = {key.version: key for key in versions}.get(self.version)
+            if removed is None:
+                return None
+            if isinstance(removed, Key):
+                removed = KeySummary(self.bucket, removed.index_entry())
+            blob = self._remove_version()
+            versions = [key for key in versions if key.version != self.version]
+            if versions and isinstance(versions[-1], Key):
+                _set_latest(engine, self._path, versions[-1].version)
+            else:
+                with contextlib.suppress(FileNotFoundError):
+                    engine.unlink(os.path.join(self._path, LATEST_LINK))
+            # Index entries are only replaced by later versions.
+            self.bucket.index.delete(self.name)
+            if versions and isinstance(versions[-1], Key):
+                versions[-1]._info_written()
+        self._release_blobs([blob])
+        return removed
+
+    def _remove_version(self):
+        """Remove the directory of this version and return its blob.
+
+        The caller holds the key lock and releases the blob.
+        """
+        blob = self._blob
+        self._engine.rmtree(self._versioned_path)
+        return blob
 
     def copy(self, new_name=None, new_is_versioned=None):
-        new_path = os.path.join(self.bucket._path, "keys", new_name)
-        os.mkdir(new_path)
-        new_versioned_path = os.path.join(new_path, str(self.version))
-        shutil.copytree(self._versioned_path, new_versioned_path)
-        return Key(
-            self.bucket, new_name, bucket_name=self.bucket_name, version=self.version, is_versioned=new_is_versioned
+        """Copy this version, with its attributes, to a new version of key
+        `new_name`."""
+        with self.bucket.s3._new_key(self.bucket, new_name) as new_key:
+            new_key.create(
+                value=self,
+                storage=self.storage_class,
+                metadata=self.metadata,
+                acl=self.acl,
+            )
+        return new_key
+
+    def _info_written(self):
+        self._info = None
+        self.bucket.index.put(self.index_entry())
+
+    def index_entry(self):
+        """Return the entry of this key in the bucket index."""
+        return index.Entry(
+            self.name,
+            self.version,
+            self.size,
+            self.etag.strip('"'),
+            self._last_modified,
+            self.storage_class,
         )
 
     def set_metadata(self, metadata, replace=False):
@@ -276,7 +920,7 @@ class Key(models.FakeKey):
         if self.bucket.is_versioned:
             old_path = self._versioned_path
             self.__init__(self.bucket, self.name, self.version + 1)
-            os.rename(old_path, self._versioned_path)
+            self._engine.rename(old_path, self._versioned_path)
             self.create(value)
 
         self.value += self.value
@@ -287,15 +931,126 @@ class Key(models.FakeKey):
         expiry = datetime.datetime.utcnow() + datetime.timedelta(days)
         self.expiry_date = expiry.strftime("%a, %d %b %Y %H:%M:%S GMT")
 
+    @classmethod
+    def get_latest(cls, bucket, name):
+        """Return the latest version of key `name` or None if it does not exist."""
+        key_dir = bucket.key_path(name)
+        version = _get_latest(bucket._engine, key_dir)
+        if version is None:
+            # Keys written before the latest version was recorded, or hidden by
+            # a delete marker.
+            versions = cls.get_versions(bucket, name)
+            if versions and isinstance(versions[-1], Key):
+                return versions[-1]
+            return None
+        key = Key(bucket, name, version)
+        key._latest = True
+        return key
+
     @classmethod
     def get_versions(cls, bucket, name):
-        key_dir = os.path.join(bucket._path, "keys", _encode_name(name))
-        if not os.path.exists(key_dir):
+        """Return the versions of key `name`, oldest first.
+
+        Delete markers are returned as `DeleteMarker`.
+        """
+        key_dir = bucket.key_path(name)
+        if not bucket._engine.exists(key_dir):
             return []
-        return sorted(
-            (Key(bucket, name, int(version)) for version in os.listdir(key_dir)),
-            key=lambda k: k.version,
-        )
+        versions = []
+        for version in sorted(
+            int(version)
+            for version in bucket._engine.listdir(key_dir)
+            if version.isdigit()
+        ):
+            key = Key(bucket, name, version)
+            if (key._get_info() or {}).get("delete_marker"):
+                key = DeleteMarker(bucket, name, version)
+            versions.append(key)
+        return versions
+
+
+class KeySummary(Key):
+    """A key as listed from the bucket index, without reading its files."""
+
+    def __init__(self, bucket, entry):
+        super().__init__(bucket, entry.name, entry.version)
+        self._entry = entry
+
+    @property
+    def etag(self):
+        return f'"{self._entry.etag}"'
+
+    @property
+    def size(self):
+        return self._entry.size
+
+    @property
+    def storage_class(self):
+        return self._entry.storage_class
+
+    @property
+    def _last_modified(self):
+        return self._entry.last_modified
+
+
+class DeleteMarker(_InfoStorage, models.FakeDeleteMarker):
+    """A delete marker, stored as a key version without value.
+
+    While it is the latest version, the key does not exist and its ``latest``
+    link is removed, see `Key.get_latest()`.
+    """
+
+    _last_modified = _InfoProperty("last_modified")
+
+    def __init__(self, bucket, name, version):
+        self.bucket = bucket
+        self.name = name
+        self.version = version
+        # The key moto's delete markers refer to.
+        self.key = None
+        self._path = bucket.key_path(name)
+        self._versioned_path = os.path.join(self._path, str(version))
+        self._info_path = os.path.join(self._versioned_path, "info.json")
+        self._value_path = os.path.join(self._versioned_path, "value")
+
+    def __deepcopy__(self, memo):
+        # Like a key, a delete marker only refers to its files.
+        return copy.copy(self)
+
+    @property
+    def _engine(self):
+        return self.bucket._engine
+
+    @property
+    def version_id(self):
+        return self.version
+
+    @property
+    def last_modified(self):
+        return datetime.datetime.strptime(self._last_modified, "%Y-%m-%dT%H:%M:%S.%fZ")
+
+    @property
+    def last_modified_ISO8601(self):
+        return self._last_modified
+
+    def create(self):
+        """Create this version, which hides the versions before it.
+
+        The caller holds the key lock, see `ShoobxS3Backend._new_key()`.
+        """
+        with _staged(self, self._versioned_path):
+            self._update_info(
+                {
+                    "delete_marker": True,
+                    "last_modified": iso_8601_datetime_without_milliseconds_s3(
+                        datetime.datetime.utcnow()
+                    ),
+                },
+                replace=True,
+            )
+        with contextlib.suppress(FileNotFoundError):
+            self._engine.unlink(os.path.join(self._path, LATEST_LINK))
+        self.bucket.index.delete(self.name)
 
 
 class VersionedKeyStore(collections.abc.MutableMapping):
@@ -304,29 +1059,36 @@ class VersionedKeyStore(collections.abc.MutableMapping):
         self._path = os.path.join(bucket._path, "keys")
 
     def __getitem__(self, name):
-        versions = Key.get_versions(self.bucket, name)
-        if not versions:
+        key = Key.get_latest(self.bucket, name)
+        if key is None:
             raise KeyError(name)
-        return versions[-1]
+        return key
 
     def __setitem__(self, name, key):
+        if isinstance(key, models.FakeDeleteMarker):
+            with self.bucket.s3._new_key(self.bucket, name) as new_key:
+                marker = DeleteMarker(self.bucket, name, new_key.version)
+                marker.create()
+            # moto returns the version id of the delete marker it created.
+            key._version_id = str(marker.version)
+            return
         if not key.exists():
             key.create(key.value)
 
     def __delitem__(self, name):
-        key = Key(self.bucket, name)
-        if not key.exists():
+        key = Key.get_latest(self.bucket, name)
+        if key is None:
             raise KeyError(name)
         key.delete()
 
     def __iter__(self):
-        if not os.path.exists(self._path):
-            return
-        for name in os.listdir(self._path):
-            yield _decode_name(name)
+        for name in self.bucket.layout.names(self.bucket._engine, self._path):
+            # Skip keys being created, whose directory has no version yet.
+            if Key.get_latest(self.bucket, name) is not None:
+                yield name
 
     def __len__(self):
-        return len(os.listdir(self._path))
+        return self.bucket.index.count()
 
     def getlist(self, name, default=None):
         keys = Key.get_versions(self.bucket, name)
@@ -335,11 +1097,14 @@ class VersionedKeyStore(collections.abc.MutableMapping):
         return keys
 
     def iterlists(self):
-        for name in self.keys():
-            yield name, self.getlist(name)
+        # Also lists keys hidden by a delete marker.
+        for name in self.bucket.layout.names(self.bucket._engine, self._path):
+            versions = self.getlist(name)
+            if versions:
+                yield name, versions
 
 
-class Part:
+class Part(_InfoStorage):
     _last_modified = _InfoProperty("last_modified")
     etag = _InfoProperty("etag")
 
@@ -350,23 +1115,27 @@ class Part:
         self._info_path = os.path.join(self._path, "info.json")
         self._value_path = os.path.join(self._path, "value")
 
+    @property
+    def _engine(self):
+        return self.multipart._engine
+
     def exists(self):
-        return os.path.exists(self._path)
+        return self._engine.exists(self._path)
 
     @property
     def value(self):
-        with open(self._value_path, "rb") as file:
-            return file.read()
+        with self._engine.open(self._value_path) as file:
+            data = file.read()
+        metrics.count("disk_read_bytes", len(data))
+        return data
 
     @value.setter
     def value(self, data):
-        with open(self._value_path, "wb") as file:
-            file.write(data)
-        self.etag = f'"{hashlib.md5(data).hexdigest()}"'
+        self.etag = f'"{_write_value(self._engine, self._value_path, data)[0]}"'
 
     @property
     def size(self):
-        return os.path.getsize(self._value_path)
+        return self._engine.getsize(self._value_path)
 
     @property
     def last_modified(self):
@@ -390,25 +1159,55 @@ class Part:
         }
 
     def create(self, value):
-        if not os.path.exists(self._path):
-            os.makedirs(self._path)
-        with open(self._info_path, "w") as file:
-            json.dump(
+        with _staged(self, self._path), self.info_transaction():
+            self._update_info(
                 {
                     "last_modified": iso_8601_datetime_with_milliseconds(
                         datetime.datetime.utcnow()
                     ),
                     "etag": None,
                 },
-                file,
+                replace=True,
+            )
+            self.value = value
+
+    def copy_from(self, key, start=None, end=None):
+        """Create the part from the value of `key` or its bytes `start` to `end`.
+
+        Whole values with a known MD5 are cloned by the storage engine, other
+        ranges are copied in chunks.
+        """
+        size = key.size
+        if start is None:
+            start, end = 0, size - 1
+        end = min(end, size - 1)
+        etag = key._etag
+        with _staged(self, self._path), self.info_transaction():
+            self._update_info(
+                {
+                    "last_modified": iso_8601_datetime_with_milliseconds(
+                        datetime.datetime.utcnow()
+                    ),
+                },
+                replace=True,
             )
-        self.value = value
+            if start == 0 and end == size - 1 and etag and "-" not in etag:
+                self._engine.clone(key._value_path, self._value_path)
+            else:
+                with key.open_value() as file:
+                    file.seek(start)
+                    etag = _write_value(
+                        self._engine,
+                        self._value_path,
+                        _LimitedReader(file, end - start + 1),
+                    )[0]
+            self.etag = f'"{etag}"'
 
     def delete(self):
-        shutil.rmtree(self._path)
+        self._engine.rmtree(self._path)
 
 
-class Multipart:
+class Multipart(_InfoStorage):
     key_name = _InfoProperty("key_name")
     metadata = _InfoProperty("metadata")
     tags = _InfoProperty("tags")
@@ -417,6 +1216,7 @@ class Multipart:
     kms_key_id = _InfoProperty("kms_key_id")
 
     def __init__(self, bucket, id=None):
+        self.bucket = bucket
         self.id = id
         if id is None:
             rand_b64 = base64.b64encode(os.urandom(models.UPLOAD_ID_BYTES))
@@ -431,46 +1231,51 @@ class Multipart:
         self._info_path = os.path.join(self._path, "info.json")
         self.storage = None
 
+    @property
+    def _engine(self):
+        return self.bucket._engine
+
     def exists(self):
-        return os.path.exists(self._path)
+        return self._engine.exists(self._path)
 
     def create(self, key_name, metadata, tags):
-        if not os.path.exists(self._path):
-            os.makedirs(self._path)
-        with open(self._info_path, "w") as file:
-            # Make metadata json serialization friendly
-            if isinstance(metadata, requests.structures.CaseInsensitiveDict):
-                metadata = dict(metadata)
-            json.dump({"key_name": key_name, "metadata": metadata, "tags": tags}, file)
+        self._engine.makedirs(self._path, exist_ok=True)
+        # Make metadata json serialization friendly
+        if isinstance(metadata, requests.structures.CaseInsensitiveDict):
+            metadata = dict(metadata)
+        self._update_info(
+            {"key_name": key_name, "metadata": metadata, "tags": tags}, replace=True
+        )
 
     def delete(self):
-        if not os.path.exists(self._path):
+        if not self._engine.exists(self._path):
             return False
-        shutil.rmtree(self._path)
+        self._engine.rmtree(self._path)
         return True
 
     def complete(self, body):
+        """Validate the parts listed in `body` for completing the upload.
+
+        Instead of the value, the list of parts making it up is returned, so
+        the key can be assembled on disk.
+        """
         decode_hex = codecs.getdecoder("hex_codec")
-        total = bytearray()
+        parts = []
         md5s = bytearray()
 
-        last = None
-        count = 0
         for pn, etag in body:
             part = self.get_part(pn)
             if part is None or part.etag != etag:
                 raise models.InvalidPart()
-            if last is not None and len(last.value) < settings.S3_UPLOAD_PART_MIN_SIZE:
+            if parts and parts[-1].size < settings.S3_UPLOAD_PART_MIN_SIZE:
                 raise models.EntityTooSmall()
             part_etag = part.etag.replace('"', "")
             md5s.extend(decode_hex(part_etag)[0])
-            total.extend(part.value)
-            last = part
-            count += 1
+            parts.append(part)
 
         etag = hashlib.md5()
         etag.update(bytes(md5s))
-        return total, f"{etag.hexdigest()}-{count}", None
+        return parts, f"{etag.hexdigest()}-{len(parts)}", None
 
     def get_part(self, part_id):
         part = Part(self, part_id)
@@ -486,9 +1291,21 @@ class Multipart:
         part.create(value)
         return part
 
+    def copy_part(self, part_id, key, start=None, end=None):
+        if part_id < 1:
+            return
+
+        part = Part(self, part_id)
+        part.copy_from(key, start, end)
+        return part
+
     def list_parts(self):
         parts = sorted(
-            (fn[:-5] for fn in os.listdir(self._path) if fn.endswith(".part")),
+            (
+                fn[:-5]
+                for fn in self._engine.listdir(self._path)
+                if fn.endswith(".part")
+            ),
             key=lambda v: int(v),
         )
         for part in parts:
@@ -517,15 +1334,25 @@ class Multiparts(collections.abc.MutableMapping):
         mp.delete()
 
     def __iter__(self):
-        if not os.path.exists(self._path):
+        if not self.bucket._engine.exists(self._path):
             return
-        yield from os.listdir(self._path)
+        yield from self.bucket._engine.listdir(self._path)
 
     def __len__(self):
-        return len(os.listdir(self._path))
+        return len(self.bucket._engine.listdir(self._path))
+
+
+# Name of the directory in the data directory purged buckets are moved to.
+TRASH_DIR = ".trash"
 
+# Number of threads removing keys in `Bucket.delete_keys()`.
+DELETE_THREADS = 16
 
-class Bucket(models.FakeBucket):
+# Maximum number of keys of a DeleteObjects request.
+MAX_DELETE_KEYS = 1000
+
+
+class Bucket(_InfoStorage, models.FakeBucket):
     policy = _InfoProperty("policy")
     versioning_status = _InfoProperty("versioning_status")
     acl = _AclProperty("acl")
@@ -554,25 +1381,82 @@ class Bucket(models.FakeBucket):
         self._info_path = os.path.join(self._path, "info.json")
         self._lifecyle_path = os.path.join(self._path, "lifecycle.json")
         self._ws_config_path = os.path.join(self._path, "website_configuration.xml")
+        self._layout = None
+        self._keys = None
+        self._multiparts = None
+        self._index = None
         self.creation_date = datetime.datetime.now(tz=pytz.utc)
 
+    @property
+    def _engine(self):
+        return self.s3.engine
+
     @property
     def info(self):
-        with open(self._info_path, "rb") as file:
-            return json.load(file)
+        return dict(self._get_info())
 
     @info.setter
     def info(self, value):
-        with open(self._info_path, "wb") as file:
-            return json.dump(value, file)
+        self._update_info(value, replace=True)
 
     @property
     def keys(self):
-        return VersionedKeyStore(self)
+        if self._keys is None:
+            self._keys = VersionedKeyStore(self)
+        return self._keys
+
+    @property
+    def layout(self):
+        if self._layout is None:
+            # Buckets created before layouts were configurable are flat.
+            name = self._get_info().get("layout", layouts.FLAT)
+            self._layout = layouts.get_layout(name)
+        return self._layout
+
+    def key_path(self, name):
+        return self.layout.key_path(os.path.join(self._path, "keys"), name)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = self._engine.key_index(
+                os.path.join(self._path, index.INDEX_FILE), self._load_index
+            )
+        return self._index
+
+    def delete_keys(self, names):
+        """Delete all versions of the keys `names` and return those that existed.
+
+        The key directories are removed by a pool of threads, and the index is
+        updated once for all of them.
+        """
+
+        def remove(name):
+            key = Key.get_latest(self, name)
+            if key is not None:
+                key._remove()
+            return key
+
+        names = list(dict.fromkeys(names))
+        if len(names) > 1:
+            threads = min(DELETE_THREADS, len(names))
+            with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+                keys = list(pool.map(remove, names))
+        else:
+            keys = [remove(name) for name in names]
+        keys = [key for key in keys if key is not None]
+        self.index.delete_many(key.name for key in keys)
+        return keys
+
+    def _load_index(self):
+        for key in self.keys.values():
+            yield key.index_entry()
 
     @property
     def multiparts(self):
-        return Multiparts(self)
+        if self._multiparts is None:
+            self._multiparts = Multiparts(self)
+        return self._multiparts
 
     @property
     def location(self):
@@ -580,11 +1464,10 @@ class Bucket(models.FakeBucket):
 
     @property
     def rules(self):
-        if not os.path.exists(self._lifecyle_path):
+        if not self._engine.exists(self._lifecyle_path):
             return []
         rules = []
-        with open(self._lifecyle_path) as file:
-            raw_rules = json.load(file)
+        raw_rules = json.loads(self._engine.read_file(self._lifecyle_path)[0])
         for rule in raw_rules:
             exp = rule.get("Expiration")
             tran = rule.get("Transition")
@@ -612,44 +1495,56 @@ class Bucket(models.FakeBucket):
 
     @property
     def website_configuration(self):
-        if not os.path.exists(self._ws_config_path):
+        if not self._engine.exists(self._ws_config_path):
             return []
-        with open(self._ws_config_path) as file:
-            return file.read()
+        return self._engine.read_file(self._ws_config_path)[0].decode("utf-8")
 
     def exists(self):
-        return os.path.exists(self._path)
+        return self._engine.exists(self._path)
 
     def create(self, region_name=None):
-        os.mkdir(self._path)
+        self._engine.mkdir(self._path)
         self.region_name = region_name
-        with open(self._info_path, "w") as file:
-            json.dump({"region_name": region_name}, file)
+        self._update_info(
+            {"region_name": region_name, "layout": self.s3.layout}, replace=True
+        )
+        self.index.create()
 
     def delete(self):
-        if not os.path.exists(self._path):
+        if not self._engine.exists(self._path):
             return False
-        if len(self.keys):
+        if self.index.count():
+            return False
+        self._engine.rmtree(self._path)
+        return True
+
+    def purge(self, trash_path):
+        """Move the bucket, with all its keys and uploads, to `trash_path`.
+
+        Return False if the bucket does not exist.
+        """
+        try:
+            self._engine.rename(self._path, trash_path)
+        except FileNotFoundError:
             return False
-        shutil.rmtree(self._path)
         return True
 
     def set_lifecycle(self, rules):
-        with open(self._lifecyle_path, "w") as file:
-            json.dump(rules, file)
+        self._engine.write_file(self._lifecyle_path, json.dumps(rules).encode("utf-8"))
 
     def delete_lifecycle(self):
-        os.remove(self._lifecyle_path)
+        self._engine.unlink(self._lifecyle_path)
 
     @website_configuration.setter
     def website_configuration(self, website_configuration):
         if isinstance(website_configuration, bytes):
             website_configuration = website_configuration.decode("utf-8")
         if website_configuration is None:
-            os.remove(self._ws_config_path)
+            self._engine.unlink(self._ws_config_path)
             return
-        with open(self._ws_config_path, "w") as file:
-            return file.write(website_configuration)
+        self._engine.write_file(
+            self._ws_config_path, website_configuration.encode("utf-8")
+        )
 
     def get_cfn_attribute(self, attribute_name):
         if attribute_name == "DomainName":
@@ -660,11 +1555,22 @@ class Bucket(models.FakeBucket):
 
 
 class ShoobxS3Backend(models.S3Backend):
-
     def __init__(self, region_name="us-east-42", account_id="deadbeef00d"):
         self.region_name = region_name
         self.account_id = account_id
+        self._buckets = _BucketRegistry(self)
+        self.engine = engines.FileSystemEngine()
         self.directory = "./data"
+        # Key directory layout of new buckets, see `layouts`.
+        self.layout = layouts.FLAT
+        # Whether to store new values in the blob store, see `blobs`.
+        self.deduplicate = False
+        # Whether non-empty buckets can be deleted, see `purge_bucket()`.
+        self.allow_purge = False
+        # Whether the snapshot endpoint is enabled, see `snapshots`.
+        self.allow_snapshots = False
+        # Attributes of the keys created by this thread, see `key_attributes()`.
+        self._key_attributes = threading.local()
         super().__init__(self.region_name, self.account_id)
 
     @property
@@ -674,6 +1580,21 @@ class ShoobxS3Backend(models.S3Backend):
     @directory.setter
     def directory(self, dir):
         self._directory = dir
+        self._buckets.clear()
+
+    @property
+    def engine(self):
+        """The storage engine of the data directory, see `engines`."""
+        return self._engine
+
+    @engine.setter
+    def engine(self, engine):
+        self._engine = engine
+        self._buckets.clear()
+
+    @property
+    def blobs(self):
+        return blobs.BlobStore(os.path.join(self.directory, blobs.BLOBS_DIR))
 
     @property
     def _url_module(self):
@@ -688,23 +1609,110 @@ class ShoobxS3Backend(models.S3Backend):
         if new_bucket.exists():
             raise models.BucketAlreadyExists(bucket=bucket_name)
         new_bucket.create(region_name)
+        self._buckets.invalidate()
 
     def list_buckets(self):
         return [
             Bucket(self, fn[:-7], self.account_id, self.region_name)
-            for fn in os.listdir(self.directory)
+            for fn in self.engine.listdir(self.directory)
             if fn.endswith(".bucket")
         ]
 
     def get_bucket(self, bucket_name, account_id=None, region_name=None):
-        bucket = Bucket(self, bucket_name, account_id or MOTO_DEFAULT_ACCOUNT_ID, region_name)
-        if not bucket.exists():
+        bucket = self._buckets.get(bucket_name)
+        if bucket is None:
             raise models.MissingBucket(bucket=bucket_name)
         return bucket
 
     def delete_bucket(self, bucket_name):
         bucket = Bucket(self, bucket_name, self.account_id, self.region_name)
-        return bucket.delete()
+        deleted = bucket.delete()
+        if deleted:
+            self._buckets.invalidate()
+        return deleted
+
+    def delete_objects(self, bucket_name, objects, bypass_retention=False):
+        """Delete the keys of a DeleteObjects request in one batch.
+
+        In unversioned buckets, keys are deleted with all their versions. In
+        versioned buckets, keys given without a version get a delete marker,
+        like with moto; single versions are removed one by one.
+        """
+        if len(objects) > MAX_DELETE_KEYS:
+            raise models.MalformedXML()
+        for object_ in objects:
+            version_id = object_.get("VersionId")
+            if version_id is not None and not version_id.isdigit():
+                raise exceptions.InvalidVersion(version_id)
+        bucket = self.get_bucket(bucket_name)
+        # Like S3, missing keys are reported as deleted.
+        deleted = []
+        names = []
+        for object_ in objects:
+            name = object_["Key"]
+            version_id = object_.get("VersionId")
+            if version_id is not None:
+                removed = Key(bucket, name, int(version_id)).delete_version()
+                if isinstance(removed, Key):
+                    self._send_removed_event(bucket, removed)
+                deleted.append((name, version_id, None))
+            elif bucket.is_versioned:
+                _, headers = self.delete_object(
+                    bucket_name, name, bypass=bypass_retention
+                )
+                deleted.append((name, None, headers.get("version-id")))
+            else:
+                names.append(name)
+                deleted.append((name, None, None))
+        for key in bucket.delete_keys(names):
+            self._send_removed_event(bucket, key)
+        return deleted, []
+
+    def _send_removed_event(self, bucket, key):
+        models.notifications.send_event(
+            self.account_id,
+            models.notifications.S3NotificationEvent.OBJECT_REMOVED_DELETE_EVENT,
+            bucket,
+            key,
+        )
+
+    def purge_bucket(self, bucket_name):
+        """Delete bucket `bucket_name` with all its keys and uploads.
+
+        The bucket directory is moved to the trash directory of the data
+        directory, so the bucket is gone at once, and removed by a background
+        thread, which is returned.
+        """
+        path = self.trash_path(bucket_name)
+        bucket = Bucket(self, bucket_name, self.account_id, self.region_name)
+        if not bucket.purge(os.path.join(path, "bucket")):
+            self.engine.rmdir(path)
+            raise models.MissingBucket(bucket=bucket_name)
+        self._buckets.invalidate()
+        return self.empty_trash()
+
+    def trash_path(self, prefix):
+        """Return a new directory in the trash directory, see `empty_trash()`."""
+        trash_path = os.path.join(self.directory, TRASH_DIR)
+        self.engine.makedirs(trash_path, exist_ok=True)
+        return self.engine.mkdtemp(trash_path, f"{prefix}-")
+
+    def empty_trash(self):
+        """Start and return a thread removing everything in the trash directory."""
+        thread = threading.Thread(
+            target=self._empty_trash, name="mocks3-purge", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _empty_trash(self):
+        engine = self.engine
+        trash_path = os.path.join(self.directory, TRASH_DIR)
+        blob_store = None
+        if engine.real_files and os.path.isdir(self.blobs.path):
+            blob_store = self.blobs
+        for name in engine.listdir(trash_path):
+            _remove_tree(engine, os.path.join(trash_path, name), blob_store)
 
     def put_object(
         self,
@@ -720,24 +1728,14 @@ class ShoobxS3Backend(models.S3Backend):
         lock_mode=None,
         lock_legal_status="OFF",
         lock_until=None,
-        checksum_value=None,  # noqa
+        checksum_value=None,
         request_method="PUT",
         disable_notification=False,
     ):
         bucket = self.get_bucket(bucket_name, self.account_id, self.region_name)
-
-        old_key = bucket.keys.get(key_name, None)
-        if old_key is not None and bucket.is_versioned:
-            new_version = old_key.version + 1
-        else:
-            new_version = 0
-
-        new_key = Key(
+        with self._new_key(
             bucket,
             key_name,
-            bucket_name=bucket_name,
-            version=new_version,
-            is_versioned=bucket.is_versioned,
             multipart=multipart,
             encryption=encryption,
             kms_key_id=kms_key_id,
@@ -745,11 +1743,194 @@ class ShoobxS3Backend(models.S3Backend):
             lock_mode=lock_mode,
             lock_legal_status=lock_legal_status,
             lock_until=lock_until,
-        )
-        new_key.create(value=value, storage=storage, etag=etag)
+        ) as new_key:
+            new_key.create(
+                value=value,
+                storage=storage,
+                etag=etag,
+                checksum_value=checksum_value,
+                **self._new_key_attributes(),
+            )
 
         return new_key
 
+    @contextlib.contextmanager
+    def key_attributes(self, **attributes):
+        """Create the keys of this thread with `attributes` within the block.
+
+        moto's responses set the metadata, ACL and checksum algorithm of a new
+        key after creating it. Given here as arguments of `Key.create()`, they
+        are written along with the key, and setting them changes nothing.
+        """
+        self._key_attributes.value = attributes
+        try:
+            yield
+        finally:
+            del self._key_attributes.value
+
+    def _new_key_attributes(self):
+        return getattr(self._key_attributes, "value", {})
+
+    @contextlib.contextmanager
+    def _new_key(self, bucket, key_name, **kw):
+        """Lock `key_name` and yield a not yet created key for its next version.
+
+        The lock is held until the block exits, so the block must create the
+        key before any other writer can allocate the same version. Keys are
+        overwritten with a new version as well, which replaces the old one at
+        once when it becomes the latest version, see `Key.create()`; in
+        unversioned buckets, the old version is removed afterwards. Versions
+        are allocated from a counter in the key directory, see
+        `_get_next_version()`. If the block raises before the key has any
+        version, a key directory created for it is removed.
+        """
+        key_path = bucket.key_path(key_name)
+        with self.engine.lock(key_path):
+            old_key = bucket.keys.get(key_name, None)
+            next_version = _get_next_version(self.engine, key_path)
+            # Keys written before the counter was recorded.
+            new_version = max(
+                next_version or 0, 0 if old_key is None else old_key.version + 1
+            )
+            _set_next_version(self.engine, key_path, new_version + 1)
+            try:
+                yield Key(
+                    bucket,
+                    key_name,
+                    bucket_name=bucket.name,
+                    version=new_version,
+                    is_versioned=bucket.is_versioned,
+                    **kw,
+                )
+            except BaseException:
+                if next_version is None and not Key.get_versions(bucket, key_name):
+                    # Listings would find the empty key directory.
+                    self.engine.rmtree(key_path)
+                raise
+            if old_key is not None and not bucket.is_versioned:
+                old_key._release_blobs([old_key._remove_version()])
+
+    def copy_object(
+        self,
+        src_key,
+        dest_bucket_name,
+        dest_key_name,
+        storage=None,
+        encryption=None,
+        kms_key_id=None,
+        bucket_key_enabled=None,
+        mdirective=None,
+        metadata=None,
+        website_redirect_location=None,
+        lock_mode=None,
+        lock_legal_status=None,
+        lock_until=None,
+        provided_version_id=None,
+    ):
+        bucket = self.get_bucket(dest_bucket_name, self.account_id, self.region_name)
+        if src_key.name == dest_key_name and src_key.bucket_name == dest_bucket_name:
+            if src_key.encryption and src_key.encryption != "AES256" and not encryption:
+                # S3 defaults to AES256 when copying an encrypted key in place.
+                encryption = "AES256"
+            if not any(
+                (
+                    storage,
+                    encryption,
+                    mdirective == "REPLACE",
+                    website_redirect_location,
+                    bucket.encryption,
+                )
+            ):
+                if not bucket.is_versioned or not provided_version_id:
+                    raise models.CopyObjectMustChangeSomething
+
+        with self._new_key(
+            bucket,
+            dest_key_name,
+            multipart=src_key.multipart,
+            encryption=encryption,
+            kms_key_id=kms_key_id,
+            bucket_key_enabled=bucket_key_enabled,
+            lock_mode=lock_mode,
+            lock_legal_status=lock_legal_status,
+            lock_until=lock_until,
+        ) as new_key:
+            new_key.create(
+                value=src_key,
+                storage=storage,
+                metadata=src_key.metadata if mdirective != "REPLACE" else metadata,
+                acl=self._new_key_attributes().get("acl"),
+            )
+        if website_redirect_location:
+            new_key.website_redirect_location = website_redirect_location
+        self.tagger.copy_tags(src_key.arn, new_key.arn)
+
+        models.notifications.send_event(
+            self.account_id,
+            models.notifications.S3NotificationEvent.OBJECT_CREATED_COPY_EVENT,
+            bucket,
+            new_key,
+        )
+
+    def upload_part_copy(
+        self,
+        dest_bucket_name,
+        multipart_id,
+        part_id,
+        src_bucket_name,
+        src_key_name,
+        src_version_id,
+        start_byte,
+        end_byte,
+    ):
+        dest_bucket = self.get_bucket(dest_bucket_name)
+        multipart = dest_bucket.multiparts[multipart_id]
+        src_key = self.get_object(
+            src_bucket_name, src_key_name, version_id=src_version_id
+        )
+        return multipart.copy_part(part_id, src_key, start_byte, end_byte)
+
+    def list_objects(self, bucket, prefix, delimiter, marker, max_keys):
+        """List the keys of `bucket` from its index.
+
+        Unlike moto, common prefixes count towards `max_keys` and are subject
+        to `marker`, as they are in S3.
+        """
+        results = self._list_index(bucket, prefix, delimiter, marker, max_keys)
+        entries, is_truncated = results
+        keys = [entry for entry in entries if isinstance(entry, KeySummary)]
+        folders = [entry for entry in entries if isinstance(entry, str)]
+        next_marker = None
+        if is_truncated and delimiter:
+            next_marker = self._get_name(entries[-1])
+        return keys, folders, "true" if is_truncated else "false", next_marker
+
+    def list_objects_v2(
+        self, bucket, prefix, delimiter, continuation_token, start_after, max_keys
+    ):
+        after = start_after
+        if continuation_token:
+            after = base64.urlsafe_b64decode(continuation_token).decode("utf-8")
+        entries, is_truncated = self._list_index(
+            bucket, prefix, delimiter, after, max_keys
+        )
+        next_token = None
+        if is_truncated and entries:
+            name = self._get_name(entries[-1])
+            next_token = base64.urlsafe_b64encode(name.encode("utf-8")).decode()
+        return entries, "true" if is_truncated else "false", next_token
+
+    def _list_index(self, bucket, prefix, delimiter, after, max_keys):
+        """Return up to `max_keys` listing entries and whether there are more."""
+        entries = []
+        for entry in bucket.index.list(prefix, delimiter, after):
+            if max_keys is not None and len(entries) >= max_keys:
+                return entries, True
+            if not isinstance(entry, str):
+                entry = KeySummary(bucket, entry)
+            entries.append(entry)
+        return entries, False
+
     def initiate_multipart(self, bucket_name, key_name, metadata):
         bucket = self.get_bucket(bucket_name, self.account_id, self.region_name)
         new_multipart = Multipart(bucket)
@@ -763,10 +1944,13 @@ class ShoobxS3Backend(models.S3Backend):
         value, etag, checksum = multipart.complete(body)
         if value is None:
             return
-        key = self.put_object(
-            bucket_name, multipart.key_name, value, etag=etag, multipart=multipart
-        )
-        key.set_metadata(multipart.metadata)
+        with self._new_key(bucket, multipart.key_name, multipart=multipart) as key:
+            key.create(
+                value=value,
+                storage=multipart.storage,
+                etag=etag,
+                metadata=multipart.metadata,
+            )
 
         del bucket.multiparts[multipart_id]
 
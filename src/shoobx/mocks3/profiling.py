@@ -0,0 +1,259 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Request Profiling
+
+Profiles every Nth request, optionally only of some buckets and operations,
+and dumps the profiles aggregated per operation to a directory, one file per
+operation and process:
+
+- ``cprofile``: deterministic profiles, ``<operation>.<pid>.prof`` files
+  readable with `pstats`, e.g. ``python -m pstats GetObject.1234.prof``,
+- ``sampling``: stacks of the request thread sampled every ``interval``
+  seconds, ``<operation>.<pid>.collapsed`` files in the folded format of
+  flame graph tools. Much cheaper than ``cprofile`` on hot paths.
+
+Only one request per process is profiled at a time. From Python 3.12 on,
+`cProfile` profiles all threads, so ``cprofile`` profiles include other
+requests handled concurrently.
+"""
+import collections
+import cProfile
+import itertools
+import logging
+import marshal
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import urllib.parse
+
+import werkzeug.wsgi
+from moto.s3 import responses
+
+from shoobx.mocks3 import metrics
+
+log = logging.getLogger("shoobx.mocks3")
+
+CPROFILE = "cprofile"
+SAMPLING = "sampling"
+MODES = (CPROFILE, SAMPLING)
+
+
+def _write_atomic(path, write, mode="w"):
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=".profile-", suffix=".tmp"
+    )
+    try:
+        with open(fd, mode) as file:
+            write(file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class CProfiler:
+    """Deterministic profiler of one request, based on `cProfile`."""
+
+    suffix = ".prof"
+
+    def __init__(self, interval):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    @staticmethod
+    def merge(total, profile):
+        stats = pstats.Stats(profile._profile)
+        if total is not None:
+            stats.add(total)
+        return stats
+
+    @staticmethod
+    def dump(total, path):
+        # The format of `pstats.Stats.dump_stats()`.
+        _write_atomic(path, lambda file: marshal.dump(total.stats, file), "wb")
+
+
+class SamplingProfiler:
+    """Statistical profiler of one request, sampling the stack of its thread
+    from another thread."""
+
+    suffix = ".collapsed"
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._thread_id = None
+        self._stopped = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._sampler = threading.Thread(
+            target=self._sample, name="mocks3-profiler", daemon=True
+        )
+        self._sampler.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._sampler.join()
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                    f":{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    @staticmethod
+    def merge(total, profile):
+        total = total if total is not None else collections.Counter()
+        total.update(profile.stacks)
+        return total
+
+    @staticmethod
+    def dump(total, path):
+        _write_atomic(
+            path,
+            lambda file: file.writelines(
+                f"{stack} {count}\n" for stack, count in sorted(total.items())
+            ),
+        )
+
+
+PROFILERS = {CPROFILE: CProfiler, SAMPLING: SamplingProfiler}
+
+
+def _operation(environ):
+    """Return the operation of a request before moto handles it.
+
+    Looks the operation up like moto does, by the method, whether a key or a
+    bucket is addressed and the query parameters. Returns None for requests
+    it cannot tell the operation of.
+    """
+    path = environ.get("PATH_INFO", "").strip("/")
+    # Only keys, not buckets, have a path with more than one segment.
+    resource = "KEY" if "/" in path else "BUCKET"
+    actions = responses.ACTION_MAP[resource].get(environ.get("REQUEST_METHOD"), {})
+    query = urllib.parse.parse_qs(
+        environ.get("QUERY_STRING", ""), keep_blank_values=True
+    )
+    operation = actions.get("DEFAULT")
+    for parameter, action in actions.items():
+        if parameter in query:
+            operation = action
+    return operation
+
+
+class ProfilerMiddleware:
+    """WSGI middleware profiling every `every`-th request.
+
+    Only requests for `buckets` and of `operations`, if given, are counted.
+    Requests whose operation cannot be told before moto handled them are
+    counted as well, and their profiles discarded if the operation turns out
+    not to be one of `operations`.
+    """
+
+    def __init__(
+        self,
+        app,
+        directory,
+        mode=CPROFILE,
+        every=100,
+        operations=(),
+        buckets=(),
+        interval=0.005,
+    ):
+        if mode not in PROFILERS:
+            raise ValueError(f"Unknown profiler mode: {mode}")
+        self.app = app
+        self.directory = directory
+        self.profiler = PROFILERS[mode]
+        self.every = max(every, 1)
+        self.operations = set(operations)
+        self.buckets = set(buckets)
+        self.interval = interval
+        self.profiles = {}
+        self._counter = itertools.count()
+        # Held while a request is profiled.
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _selected(self, environ):
+        if self.buckets:
+            bucket = environ.get("PATH_INFO", "").lstrip("/").split("/", 1)[0]
+            if bucket not in self.buckets:
+                return False
+        if self.operations:
+            operation = _operation(environ)
+            if operation is not None and operation not in self.operations:
+                return False
+        return next(self._counter) % self.every == 0
+
+    def __call__(self, environ, start_response):
+        if not self._selected(environ) or not self._busy.acquire(blocking=False):
+            return self.app(environ, start_response)
+        request = metrics.current()
+        own_request = request is None
+        if own_request:
+            # Collect the operation, even if metrics are disabled.
+            request = metrics.RequestMetrics(
+                environ.get("REQUEST_METHOD"), environ.get("PATH_INFO")
+            )
+            metrics.set_current(request)
+        profile = self.profiler(self.interval)
+
+        def stop():
+            # Sending the body is profiled as well.
+            try:
+                profile.stop()
+                self.add(request.operation or "Unknown", profile)
+            finally:
+                if own_request:
+                    metrics.set_current(None)
+                self._busy.release()
+
+        profile.start()
+        try:
+            result = self.app(environ, start_response)
+        except BaseException:
+            stop()
+            raise
+        if metrics.is_file_response(environ, result):
+            # The server sends the file by itself.
+            stop()
+            return result
+        return werkzeug.wsgi.ClosingIterator(result, stop)
+
+    def add(self, operation, profile):
+        """Add `profile` to those of `operation` and dump them."""
+        if self.operations and operation not in self.operations:
+            return
+        with self._lock:
+            total = self.profiles[operation] = self.profiler.merge(
+                self.profiles.get(operation), profile
+            )
+            path = os.path.join(
+                self.directory, f"{operation}.{os.getpid()}{self.profiler.suffix}"
+            )
+            try:
+                self.profiler.dump(total, path)
+            except OSError:
+                log.exception("Dumping the profile of %s failed", operation)
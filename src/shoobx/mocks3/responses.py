@@ -6,23 +6,374 @@
 """S3 Responses
 """
 import io
+import os
 from typing import Union
+from urllib.parse import parse_qs, urlparse
 
-from moto.s3 import responses
+import flask
+import werkzeug.wsgi
+from moto.s3 import exceptions, responses, utils
 
+from . import metrics, models, snapshots
 from .models import MOTO_DEFAULT_ACCOUNT_ID, s3_backends
 
+# Size of the chunks key values are streamed in.
+VALUE_CHUNK_SIZE = 256 * 1024
+
+# Number of times a GET request looks up a key whose value is removed by
+# concurrent overwrites, see `S3Response._get_key_value()`.
+GET_ATTEMPTS = 3
+
+
+class KeyValue:
+    """Response body serving a key value, or a byte range of it, from disk.
+
+    The value is only read when the response is sent, in chunks, so the memory
+    needed to serve a key does not depend on its size. The file is opened at
+    once, so the size and the data sent are those of the same file.
+    """
+
+    def __init__(self, key, start=0, end=None, file=None):
+        self.key = key
+        self.file = key.open_value() if file is None else file
+        self.size = models._file_size(self.file)
+        self.start = start
+        self.end = self.size - 1 if end is None else end
+
+    def __len__(self):
+        return self.end - self.start + 1
+
+    def __iter__(self):
+        offset = self.start
+        with self.file:
+            while offset <= self.end:
+                chunk = models._read_at(
+                    self.file, offset, min(VALUE_CHUNK_SIZE, self.end - offset + 1)
+                )
+                if not chunk:
+                    break
+                offset += len(chunk)
+                yield chunk
+
+    @property
+    def is_complete(self):
+        return self.start == 0 and self.end == self.size - 1
+
+    def byte_range(self, start, end):
+        return KeyValue(self.key, self.start + start, self.start + end, self.file)
+
+    def read(self):
+        with self.file:
+            if not len(self):
+                return b""
+            return models._read_at(self.file, self.start, len(self))
+
+    def wrap(self, environ):
+        """Return a WSGI iterable over the value.
+
+        Complete values of files are returned in the server's
+        ``wsgi.file_wrapper``, which is handed to the server as is (see
+        `pass_file_through()`), so it can send the file with ``sendfile()``.
+        """
+        if not self.is_complete or not self.key._engine.real_files:
+            return iter(self)
+        metrics.count("disk_read_bytes", len(self))
+        wrapper = werkzeug.wsgi.wrap_file(environ, self.file, VALUE_CHUNK_SIZE)
+        environ[metrics.FILE_WRAPPER_KEY] = wrapper
+        return wrapper
+
+
+def pass_file_through(response):
+    """Flask ``after_request`` hook returning file wrappers to the server
+    unchanged, rather than iterating over them in werkzeug."""
+    if metrics.is_file_response(flask.request.environ, response.response):
+        response.direct_passthrough = True
+    return response
+
+
+# Query parameters of PUT requests whose body is written to disk as is.
+STREAMED_PUT_PARAMETERS = {"uploadId", "partNumber"}
+# Headers of PUT requests whose body needs decoding or is needed in memory.
+BUFFERED_PUT_HEADERS = (
+    "content-encoding",
+    "x-amz-copy-source",
+    "x-amz-decoded-content-length",
+)
+
+
+# Operations of the snapshot endpoint by request method.
+SNAPSHOT_OPERATIONS = {
+    "GET": "ListSnapshots",
+    "PUT": "CreateSnapshot",
+    "POST": "RestoreSnapshot",
+    "DELETE": "DeleteSnapshot",
+}
+
 
 class S3Response(responses.S3Response):
     @property
     def backend(self):
-        return s3_backends[MOTO_DEFAULT_ACCOUNT_ID]["aws"]
+        backend = s3_backends[MOTO_DEFAULT_ACCOUNT_ID]["aws"]
+        request = metrics.current()
+        if request is None:
+            return backend
+        return metrics.TimedBackend(backend, request)
+
+    def _set_operation(self, operation):
+        request = metrics.current()
+        if request is not None:
+            request.operation = operation
+
+    def _set_action(self, action_resource_type, method, querystring):
+        super()._set_action(action_resource_type, method, querystring)
+        self._set_operation(self.data["Action"])
+
+    def _is_streamed_put(self, request):
+        """Whether the request body can be written to disk as it is received.
+
+        That is the case for plain object and part uploads in server mode,
+        also with a checksum in the headers; anything moto needs to decode,
+        parse or checksum is read as usual.
+        """
+        if not hasattr(request, "stream") or request.method != "PUT":
+            return False
+        if request.content_length is None or request.mimetype in (
+            "application/x-www-form-urlencoded",
+            "multipart/form-data",
+        ):
+            return False
+        if not set(request.args) <= STREAMED_PUT_PARAMETERS:
+            return False
+        if any(header in request.headers for header in BUFFERED_PUT_HEADERS):
+            return False
+        algorithm = request.headers.get("x-amz-sdk-checksum-algorithm")
+        if algorithm and f"x-amz-checksum-{algorithm.lower()}" not in request.headers:
+            # moto computes the checksum from the body.
+            return False
+        if request.headers.get("x-amz-content-sha256", "").startswith("STREAMING-"):
+            return False
+        # Only keys, not buckets, have a path with more than one segment.
+        return "/" in request.path.strip("/")
+
+    def setup_class(self, request, full_url, headers):
+        request_metrics = metrics.current()
+        if request_metrics is not None:
+            request_metrics.mark("routing")
+        streamed = self._is_streamed_put(request)
+        if streamed:
+            # Keep moto from reading the whole body into memory.
+            request.body = b""
+        super().setup_class(request, full_url, headers)
+        if streamed:
+            self.body = request.stream
+        if request_metrics is not None:
+            request_metrics.bucket = self.bucket_name
+            request_metrics.mark("parse")
 
     def subdomain_based_buckets(self, request):
         return False
 
     def get_storage_dir(self, request, full_url, headers):
+        self._set_operation("GetStorageDir")
         return 200, headers, self.backend.directory
 
+    def purge_bucket(self, request, full_url, headers):
+        """Delete the bucket given by the ``bucket`` query parameter, even if
+        it is not empty, see `models.ShoobxS3Backend.purge_bucket()`."""
+        self._set_operation("PurgeBucket")
+        if not self.backend.allow_purge:
+            return 403, headers, "Purging buckets is disabled."
+        if request.method not in ("POST", "DELETE"):
+            return 405, headers, ""
+        query = parse_qs(urlparse(full_url).query)
+        bucket_name = query.get("bucket", [None])[0]
+        if not bucket_name:
+            return 400, headers, "The bucket parameter is missing."
+        request_metrics = metrics.current()
+        if request_metrics is not None:
+            request_metrics.bucket = bucket_name
+        self.backend.purge_bucket(bucket_name)
+        return 204, headers, ""
+
+    def snapshot_response(self, request, full_url, headers):
+        """List (GET) the snapshots of the data directory, or take (PUT),
+        restore (POST) or delete (DELETE) the one given by the ``name`` query
+        parameter, see `snapshots`."""
+        operation = SNAPSHOT_OPERATIONS.get(request.method)
+        self._set_operation(operation)
+        if not self.backend.allow_snapshots:
+            return 403, headers, "Snapshots are disabled."
+        if operation is None:
+            return 405, headers, ""
+        store = snapshots.SnapshotStore(self.backend)
+        if request.method == "GET":
+            body = "".join(f"{name}\n" for name in store.list())
+            return 200, {"Content-Type": "text/plain"}, body
+        name = parse_qs(urlparse(full_url).query).get("name", [None])[0]
+        if not name:
+            return 400, headers, "The name parameter is missing."
+        action = {
+            "PUT": store.create,
+            "POST": store.restore,
+            "DELETE": store.delete,
+        }[request.method]
+        try:
+            action(name)
+        except ValueError as err:
+            return 400, headers, str(err)
+        except FileExistsError as err:
+            return 409, headers, str(err)
+        except FileNotFoundError as err:
+            return 404, headers, str(err)
+        return 201 if request.method == "PUT" else 204, headers, ""
+
+    def get_metrics(self, request, full_url, headers):
+        self._set_operation("GetMetrics")
+        directory = os.path.join(self.backend.directory, metrics.METRICS_DIR)
+        if not os.path.isdir(directory):
+            directory = None
+        body = metrics.render(metrics.collect(directory))
+        return 200, {"Content-Type": metrics.CONTENT_TYPE}, body
+
+    def key_response(self, request, full_url, headers):
+        status_code, headers, body = super().key_response(request, full_url, headers)
+        if isinstance(body, KeyValue):
+            environ = getattr(request, "environ", None)
+            if environ is None:
+                # When mocking boto directly, the body is handed over as bytes.
+                body = body.read()
+            else:
+                body = body.wrap(environ)
+        return status_code, headers, body
+
+    @staticmethod
+    def _send_response(response):
+        if isinstance(response, tuple) and isinstance(response[2], KeyValue):
+            status_code, headers, value = response
+            if len(value) and "content-type" not in headers:
+                headers["content-type"] = responses.APP_XML
+            return status_code, headers, value
+        return responses.S3Response._send_response(response)
+
+    def _handle_range_header(self, request, response_headers, response_content):
+        if not isinstance(response_content, KeyValue):
+            return super()._handle_range_header(
+                request, response_headers, response_content
+            )
+        # Mirrors moto's implementation, but only reads the requested bytes
+        # instead of slicing the whole value.
+        length = len(response_content)
+        last = length - 1
+
+        _, rspec = request.headers.get("range").split("=")
+        if "," in rspec:
+            return 200, response_headers, response_content
+
+        try:
+            begin, end = [int(i) if i else None for i in rspec.split("-")]
+        except ValueError:
+            return 200, response_headers, response_content
+
+        if (begin is None and end == 0) or (begin is not None and begin > last):
+            raise exceptions.InvalidRange(
+                actual_size=str(length), range_requested=request.headers.get("range")
+            )
+
+        if begin is not None:  # byte range
+            end = last if end is None else min(end, last)
+        elif end is not None:  # suffix byte range
+            begin = length - min(end, length)
+            end = last
+        else:
+            return 200, response_headers, response_content
+
+        if begin > min(end, last):
+            return 200, response_headers, response_content
+
+        if begin or end < last:
+            # range requests do not return the checksum
+            for key in [h for h in response_headers if h.startswith("x-amz-checksum-")]:
+                del response_headers[key]
+
+        response_headers["content-range"] = f"bytes {begin}-{end}/{length}"
+        content = response_content.byte_range(begin, end)
+        response_headers["content-length"] = str(len(content))
+        return 206, response_headers, content
+
+    def get_object(self):
+        key, not_modified, value = self._get_key_value()
+        response_headers = self._get_cors_headers_other()
+
+        if key.version_id != "null":
+            response_headers["x-amz-version-id"] = key.version_id
+
+        response_headers.update(key.response_dict)
+
+        if not_modified:
+            # Real S3 omits any content-* headers for a 304
+            for header in list(response_headers.keys()):
+                if header.startswith("content-"):
+                    response_headers.pop(header)
+            return 304, response_headers, "Not Modified"
+
+        # set the checksum after not_modified has been checked
+        if (
+            self.headers.get("x-amz-checksum-mode") == "ENABLED"
+            and key.checksum_algorithm
+        ):
+            algorithm = key.checksum_algorithm.lower()
+            response_headers[f"x-amz-checksum-{algorithm}"] = key.checksum_value
+
+        response_headers.update(key.metadata)
+        response_headers.update({"Accept-Ranges": "bytes"})
+
+        part_number = self._get_int_param("partNumber")
+        if part_number and not key.multipart:
+            if part_number > 1:
+                raise exceptions.RangeNotSatisfiable
+            response_headers["content-range"] = f"bytes 0-{key.size - 1}/{key.size}"
+            return 206, response_headers, value
+        return 200, response_headers, value
+
+    def _get_key_value(self):
+        """Return the key to get, whether it was not modified and its value.
+
+        The key reads the info of a single version, see `models.Key._get_info()`,
+        and the value of that version is opened right after. If an overwrite
+        removed the version in between, the key is looked up again.
+        """
+        for attempt in range(1, GET_ATTEMPTS + 1):
+            key, not_modified = self._get_key()
+            if not_modified:
+                return key, not_modified, None
+            try:
+                return key, not_modified, KeyValue(key)
+            except FileNotFoundError:
+                if attempt == GET_ATTEMPTS or "versionId" in self.querystring:
+                    raise
+
+    def put_object(self):
+        # moto sets the metadata and ACL of the key after creating it, see
+        # `ShoobxS3Backend.key_attributes()`.
+        metadata = utils.metadata_from_headers(self.headers)
+        metadata.update(utils.metadata_from_headers(self.querystring))
+        with self.backend.key_attributes(
+            metadata=metadata,
+            acl=self._key_acl(),
+            checksum_algorithm=self.headers.get("x-amz-sdk-checksum-algorithm"),
+        ):
+            return super().put_object()
+
+    def copy_object(self):
+        with self.backend.key_attributes(acl=self._key_acl()):
+            return super().copy_object()
+
+    def _key_acl(self):
+        """Return the ACL moto gives a key created by this request."""
+        acl = self._acl_from_headers(self.headers)
+        if acl is None:
+            acl = self.backend.get_bucket(self.bucket_name).acl
+        return acl
+
 
 S3ResponseInstance = S3Response()
@@ -6,12 +6,29 @@
 """Server
 """
 import argparse
+import concurrent.futures
+import functools
+import logging
 import os
+import signal
+import socket
 import sys
+import threading
 
+import werkzeug.exceptions
 import werkzeug.serving
+import werkzeug.wsgi
 
-from shoobx.mocks3 import config
+from shoobx.mocks3 import config, models
+
+log = logging.getLogger("shoobx.mocks3")
+
+ENTITY_TOO_LARGE = """<?xml version="1.0" encoding="UTF-8"?>
+<Error>
+  <Code>EntityTooLarge</Code>
+  <Message>Your proposed upload exceeds the maximum allowed size</Message>
+  <MaxSizeAllowed>{}</MaxSizeAllowed>
+</Error>"""
 
 
 class ShoobxRequestHandler(werkzeug.serving.WSGIRequestHandler):
@@ -42,6 +59,277 @@ class ShoobxRequestHandler(werkzeug.serving.WSGIRequestHandler):
         )
 
 
+class SendfileWrapper(werkzeug.wsgi.FileWrapper):
+    """``wsgi.file_wrapper`` of files the server sends with ``sendfile()``."""
+
+    def __init__(self, file, buffer_size=8192, *, handler):
+        super().__init__(file, buffer_size)
+        self.handler = handler
+
+    def __iter__(self):
+        # werkzeug's handler sends the headers on the first, empty, chunk.
+        yield b""
+        if self.handler.can_sendfile():
+            # Let the kernel copy the file to the socket.
+            self.handler.connection.sendfile(self.file)
+        else:
+            yield from iter(functools.partial(self.file.read, self.buffer_size), b"")
+
+
+class RequestEndReader:
+    """Reader of the connection that ends with the response, unless the
+    connection is closed.
+
+    werkzeug's handler reads whatever the client sent after responding, which
+    is the next request on a kept connection.
+    """
+
+    def __init__(self, handler, rfile):
+        self.handler = handler
+        self.rfile = rfile
+
+    def read(self, size=-1):
+        if self.handler.close_connection:
+            return self.rfile.read(size)
+        return b""
+
+
+class KeepAliveRequestHandler(ShoobxRequestHandler):
+    """HTTP/1.1 request handler keeping connections open between requests.
+
+    werkzeug's handler closes every connection, since it cannot tell where
+    the body of a request ends. Here the body is limited to its declared
+    length and the connection is only kept when the application consumed it
+    entirely before responding.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Responses are sent in several writes, which Nagle's algorithm would hold
+    # back until the client acknowledges the previous one.
+    disable_nagle_algorithm = True
+    # The body of the request being handled, None if its length is unknown.
+    body = None
+    # Whether the ``Connection`` and ``Transfer-Encoding: chunked`` headers of
+    # the response were sent.
+    connection_sent = False
+    chunked = False
+
+    def make_environ(self):
+        environ = super().make_environ()
+        environ["wsgi.file_wrapper"] = functools.partial(SendfileWrapper, handler=self)
+        self.body = None
+        self.connection_sent = self.chunked = False
+        if not environ.get("wsgi.input_terminated"):
+            # The end of chunked request bodies is unknown.
+            length = environ.get("CONTENT_LENGTH", "")
+            self.body = environ["wsgi.input"] = werkzeug.wsgi.LimitedStream(
+                self.rfile, int(length) if length.isdigit() else 0
+            )
+        self.rfile = RequestEndReader(self, self.rfile)
+        return environ
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == "connection":
+            # werkzeug's handler adds "Connection: close" to all responses.
+            if self.connection_sent:
+                return
+            self.connection_sent = True
+            if self.body is None or not self.body.is_exhausted:
+                # The rest of the request body would be read as the next request.
+                self.close_connection = True
+            if not self.close_connection:
+                return
+            value = "close"
+        elif keyword.lower() == "transfer-encoding":
+            self.chunked = value == "chunked"
+        super().send_header(keyword, value)
+
+    def can_sendfile(self):
+        """Whether the response body can be sent with ``sendfile()``."""
+        return not self.chunked and self.command != "HEAD"
+
+    def run_wsgi(self):
+        rfile = self.rfile
+        try:
+            # The server passes errors through, see `PooledWSGIServer`.
+            super().run_wsgi()
+        except Exception:
+            self.close_connection = True
+            log.exception("Error on request %s", self.requestline)
+            if not self.connection_sent:
+                self.send_error(500)
+        finally:
+            self.rfile = rfile
+        if self.body is None or not self.body.is_exhausted:
+            # The body was read while sending the response, but not entirely.
+            self.close_connection = True
+
+    def connection_dropped(self, error, environ=None):
+        self.close_connection = True
+
+    def log_error(self, format, *args):
+        # Idle keep-alive connections time out all the time.
+        if not format.startswith("Request timed out"):
+            super().log_error(format, *args)
+
+
+class PooledWSGIServer(werkzeug.serving.BaseWSGIServer):
+    """WSGI server handling connections in a bounded pool of threads.
+
+    Errors of the application are passed through to the request handler,
+    which closes the connection of the failed response.
+    """
+
+    multithread = True
+    multiprocess = True
+
+    def __init__(self, *args, threads, **kw):
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="mocks3-worker"
+        )
+        super().__init__(*args, passthrough_errors=True, **kw)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            log.exception("Error on connection from %s", client_address[0])
+        finally:
+            self.shutdown_request(request)
+
+
+class EntityTooLarge(werkzeug.exceptions.RequestEntityTooLarge):
+    """Request body larger than `max_size` bytes."""
+
+    def __init__(self, max_size):
+        super().__init__()
+        self.max_size = max_size
+
+    def get_body(self, environ=None, scope=None):
+        return ENTITY_TOO_LARGE.format(self.max_size)
+
+    def get_headers(self, environ=None, scope=None):
+        # The body was not read, the connection cannot be reused.
+        return [("Content-Type", "application/xml"), ("Connection", "close")]
+
+
+class MaxSizeStream(werkzeug.wsgi.LimitedStream):
+    """Request body of unknown length raising `EntityTooLarge` once more than
+    `max_size` bytes are read."""
+
+    def __init__(self, stream, max_size):
+        super().__init__(stream, max_size + 1, is_max=True)
+        self.max_size = max_size
+
+    def readinto(self, buffer):
+        size = super().readinto(buffer)
+        if self.is_exhausted:
+            raise EntityTooLarge(self.max_size)
+        return size
+
+
+def limit_request_size(app, max_size):
+    """Reject requests with a body larger than `max_size` bytes."""
+
+    def wrapper(environ, start_response):
+        length = environ.get("CONTENT_LENGTH", "")
+        if length.isdigit() and int(length) > max_size:
+            return EntityTooLarge(max_size)(environ, start_response)
+        if environ.get("wsgi.input_terminated"):
+            # Chunked request bodies are limited while they are read.
+            environ["wsgi.input"] = MaxSizeStream(environ["wsgi.input"], max_size)
+        try:
+            return app(environ, start_response)
+        except EntityTooLarge as error:
+            return error(environ, start_response)
+
+    return wrapper
+
+
+def make_handler(keep_alive):
+    """Return the request handler class for `keep_alive` seconds idle time.
+
+    Connections are closed after each request if `keep_alive` is zero.
+    """
+    if not keep_alive:
+        attrs = {"protocol_version": "HTTP/1.0"}
+    else:
+        attrs = {"timeout": keep_alive}
+    return type("Handler", (KeepAliveRequestHandler,), attrs)
+
+
+def serve_worker(app, sock, threads, keep_alive):
+    """Serve requests accepted on the listening socket `sock` until SIGTERM."""
+    host, port = sock.getsockname()[:2]
+    server = PooledWSGIServer(
+        host,
+        port,
+        app,
+        handler=make_handler(keep_alive),
+        fd=sock.fileno(),
+        threads=threads,
+    )
+
+    def stop(signum, frame):
+        # `shutdown()` waits for `serve_forever()`, which runs in this thread.
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    # The master process stops all workers on Ctrl-C.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        server.serve_forever()
+    finally:
+        server.executor.shutdown(wait=True)
+        server.server_close()
+
+
+def serve_prefork(app, host, port, workers, threads, keep_alive, backlog):
+    """Serve `app` with `workers` processes sharing one listening socket."""
+    family = werkzeug.serving.select_address_family(host, port)
+    sock = socket.create_server((host, port), family=family, backlog=backlog)
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                serve_worker(app, sock, threads, keep_alive)
+            except BaseException:
+                log.exception("Worker failed")
+                status = 1
+            finally:
+                os._exit(status)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    for _ in range(workers):
+        spawn()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    log.info("Serving on http://%s:%s with %s workers", host, port, workers)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            log.warning("Worker %s exited with status %s, restarting", pid, status)
+            spawn()
+    sock.close()
+
+
 parser = argparse.ArgumentParser(
     prog="serve",
     usage=("serve [-c|--config-file <path-to-config>]"),
@@ -65,12 +353,41 @@ def serve(argv=sys.argv[1:]):
     conf = config.load_config(args.config_file)
     host = conf.get("shoobx:server", "host-ip")
     port = int(conf.get("shoobx:server", "host-port"))
-    app.run(
-        host=host,
-        port=port,
+    workers = conf.getint("shoobx:server", "workers")
+    backend = models.s3_backends[models.MOTO_DEFAULT_ACCOUNT_ID]["aws"]
+    if workers > 1 and not backend.engine.multiprocess:
+        log.warning(
+            "The %s storage engine is not shared between processes, "
+            "serving with a single worker",
+            backend.engine.name,
+        )
+        workers = 1
+    max_request_size = conf.getint("shoobx:server", "max-request-size")
+    if max_request_size:
+        app = limit_request_size(app, max_request_size)
+    mode = conf.get("shoobx:server", "mode")
+    reload = conf.getboolean("shoobx:mocks3", "reload")
+    debug = conf.getboolean("shoobx:mocks3", "debug")
+    if mode == "prefork":
+        if reload or debug:
+            log.warning("reload and debug need the development server mode")
+        serve_prefork(
+            app,
+            host,
+            port,
+            workers=workers,
+            threads=conf.getint("shoobx:server", "threads"),
+            keep_alive=conf.getfloat("shoobx:server", "keep-alive"),
+            backlog=conf.getint("shoobx:server", "backlog"),
+        )
+        return
+    werkzeug.serving.run_simple(
+        host,
+        port,
+        app,
         threaded=False,
-        processes=5,
+        processes=workers,
         request_handler=ShoobxRequestHandler,
-        use_reloader=conf.getboolean("shoobx:mocks3", "reload"),
-        use_debugger=conf.getboolean("shoobx:mocks3", "debug"),
+        use_reloader=reload,
+        use_debugger=debug,
     )
@@ -0,0 +1,162 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Data Directory Snapshots
+
+A snapshot is a copy of all buckets of the data directory in
+``.snapshots/<name>``, taken to restore a seeded state quickly, e.g. before
+every test suite.
+
+Values, ``info.json`` and ``name`` files are never modified in place, only
+replaced, so snapshots and restored buckets share them with hard links and
+taking or restoring a snapshot only writes directory entries. Other files are
+copied, the key indexes with SQLite's backup API. Values in the blob store
+stay referenced by the snapshots holding them.
+
+Snapshots are consistent per file, not across buckets: take them while no
+requests are writing. They need the ``fs`` storage engine, see `engines`.
+"""
+import os
+import re
+import shutil
+import tempfile
+
+from shoobx.mocks3 import engines, index, models
+
+# Name of the snapshot directory in the data directory.
+SNAPSHOTS_DIR = ".snapshots"
+
+# Files linked rather than copied, since they are only ever replaced.
+LINKED_FILES = {"value", "info.json", "name"}
+
+NAME_RE = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9._-]*$")
+
+
+def _skipped(name):
+    return name == engines.LOCK_FILE or name.endswith((".tmp", "-wal", "-shm"))
+
+
+def copy_bucket(path, dst_path):
+    """Copy the bucket directory at `path` to `dst_path`, see above."""
+    os.mkdir(dst_path)
+    for dirpath, dirnames, filenames in os.walk(path):
+        target = os.path.join(dst_path, os.path.relpath(dirpath, path))
+        for dirname in list(dirnames):
+            src = os.path.join(dirpath, dirname)
+            if _skipped(dirname):
+                # Versions and parts being written.
+                dirnames.remove(dirname)
+            elif os.path.islink(src):
+                os.symlink(os.readlink(src), os.path.join(target, dirname))
+            else:
+                os.mkdir(os.path.join(target, dirname))
+        for filename in filenames:
+            src = os.path.join(dirpath, filename)
+            dst = os.path.join(target, filename)
+            if _skipped(filename):
+                continue
+            if os.path.islink(src):
+                os.symlink(os.readlink(src), dst)
+            elif filename == index.INDEX_FILE:
+                index.backup(src, dst)
+            elif filename in LINKED_FILES:
+                os.link(src, dst)
+            else:
+                shutil.copy2(src, dst)
+
+
+class SnapshotStore:
+    """The snapshots of the data directory of `backend`."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.path = os.path.join(backend.directory, SNAPSHOTS_DIR)
+
+    def _path(self, name):
+        if not NAME_RE.match(name):
+            raise ValueError(f"Invalid snapshot name: {name}")
+        return os.path.join(self.path, name)
+
+    def _bucket_names(self, path):
+        return sorted(name for name in os.listdir(path) if name.endswith(".bucket"))
+
+    def list(self):
+        """Return the names of all snapshots."""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name for name in os.listdir(self.path) if NAME_RE.match(name))
+
+    def create(self, name):
+        """Take snapshot `name` of all buckets.
+
+        Raises `FileExistsError` if the snapshot exists already.
+        """
+        path = self._path(name)
+        if os.path.exists(path):
+            raise FileExistsError(f"Snapshot {name} exists already")
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=self.path, prefix=f".{name}-", suffix=".tmp")
+        try:
+            for bucket_name in self._bucket_names(self.backend.directory):
+                copy_bucket(
+                    os.path.join(self.backend.directory, bucket_name),
+                    os.path.join(tmp_path, bucket_name),
+                )
+            os.rename(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+    def restore(self, name):
+        """Replace all buckets by those of snapshot `name`.
+
+        The current buckets are moved to the trash and removed by the
+        returned thread, see `models.ShoobxS3Backend.empty_trash()`. Raises
+        `FileNotFoundError` if there is no such snapshot.
+        """
+        path = self._path(name)
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"No snapshot {name}")
+        directory = self.backend.directory
+        staging_path = tempfile.mkdtemp(dir=directory, prefix=".restore-")
+        try:
+            for bucket_name in self._bucket_names(path):
+                copy_bucket(
+                    os.path.join(path, bucket_name),
+                    os.path.join(staging_path, bucket_name),
+                )
+        except BaseException:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+        trash_path = self.backend.trash_path("restore")
+        for bucket_name in self._bucket_names(directory):
+            os.rename(
+                os.path.join(directory, bucket_name),
+                os.path.join(trash_path, bucket_name),
+            )
+        for bucket_name in self._bucket_names(staging_path):
+            os.rename(
+                os.path.join(staging_path, bucket_name),
+                os.path.join(directory, bucket_name),
+            )
+        os.rmdir(staging_path)
+        self.backend._buckets.invalidate()
+        return self.backend.empty_trash()
+
+    def delete(self, name):
+        """Delete snapshot `name`, releasing the blobs only it referenced.
+
+        Raises `FileNotFoundError` if there is no such snapshot.
+        """
+        path = self._path(name)
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"No snapshot {name}")
+        # Move it out of the way first, so the name is free at once.
+        tmp_path = tempfile.mkdtemp(dir=self.path, prefix=f".{name}-", suffix=".tmp")
+        os.rename(path, os.path.join(tmp_path, name))
+        blob_store = self.backend.blobs
+        if not os.path.isdir(blob_store.path):
+            blob_store = None
+        models._remove_tree(self.backend.engine, tmp_path, blob_store)
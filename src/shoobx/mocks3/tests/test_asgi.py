@@ -0,0 +1,115 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Shoobx S3 ASGI Tests
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from shoobx.mocks3 import asgi, config
+
+TEST_CONFIG = """
+[shoobx:mocks3]
+log-level = INFO
+directory = %s
+hostname = localhost
+
+[shoobx:server]
+threads = 4
+"""
+
+
+def call(app, method, path, body=(), headers=(), query_string=b""):
+    """Run a request through the ASGI `app` and return status, headers and body."""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string,
+        "root_path": "",
+        "headers": [(b"host", b"localhost")] + list(headers),
+        "server": ("localhost", 8003),
+        "client": ("127.0.0.1", 12345),
+    }
+    chunks = list(body) or [b""]
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": n < len(chunks) - 1}
+        for n, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    response_body = b"".join(message.get("body", b"") for message in sent[1:])
+    return start["status"], dict(start["headers"]), response_body
+
+
+class ASGITests(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        config_path = os.path.join(self._dir, "config.ini")
+        with open(config_path, "w") as file:
+            file.write(TEST_CONFIG % self._dir)
+        with mock.patch.dict(os.environ, {"SHOOBX_MOCKS3_CONFIG": config_path}):
+            self.app = asgi.get_asgi_app()
+
+    def tearDown(self):
+        self.app.executor.shutdown()
+        shutil.rmtree(self._dir)
+        config._CONFIG = None
+        config.CONFIG_FILE = None
+
+    def test_threads(self):
+        self.assertEqual(4, self.app.executor._max_workers)
+
+    def test_put_get(self):
+        status, _, _ = call(self.app, "PUT", "/mybucket")
+        self.assertEqual(200, status)
+        status, _, _ = call(
+            self.app,
+            "PUT",
+            "/mybucket/the/key",
+            body=[b"some ", b"streamed ", b"value"],
+            headers=[(b"content-length", b"19"), (b"x-amz-acl", b"public-read")],
+        )
+        self.assertEqual(200, status)
+        status, headers, body = call(self.app, "GET", "/mybucket/the/key")
+        self.assertEqual(200, status)
+        self.assertEqual(b"some streamed value", body)
+        self.assertEqual(b"19", headers[b"content-length"])
+
+    def test_missing_key(self):
+        call(self.app, "PUT", "/mybucket")
+        status, _, body = call(self.app, "GET", "/mybucket/missing")
+        self.assertEqual(404, status)
+        self.assertIn(b"NoSuchKey", body)
+
+    def test_lifespan(self):
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        asyncio.run(self.app({"type": "lifespan"}, receive, send))
+        self.assertEqual(
+            ["lifespan.startup.complete", "lifespan.shutdown.complete"], sent
+        )
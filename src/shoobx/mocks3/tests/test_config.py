@@ -8,10 +8,13 @@
 import os
 import shutil
 import tempfile
+import time
 import unittest
 from unittest import mock
 
-from shoobx.mocks3 import config
+import werkzeug.test
+
+from shoobx.mocks3 import config, models
 
 TEST_CONFIG = """
 [shoobx:mocks3]
@@ -37,6 +40,34 @@ class MockS3ConfigTests(unittest.TestCase):
         app = config.configure(config_path)
         self.assertEqual("s3", app.service)
 
+    def test_purge(self):
+        config_path = os.path.join(self._dir, "config.ini")
+        with open(config_path, "w") as file:
+            file.write(TEST_CONFIG % self._dir + "allow-purge = True\n")
+        client = werkzeug.test.Client(config.configure(config_path))
+        client.put("/mybucket")
+        client.put("/mybucket/key", data=b"value")
+        self.assertEqual(405, client.get("/PURGE?bucket=mybucket").status_code)
+        self.assertEqual(204, client.post("/PURGE?bucket=mybucket").status_code)
+        self.assertEqual(404, client.get("/mybucket").status_code)
+        self.assertEqual(404, client.post("/PURGE?bucket=mybucket").status_code)
+        # Wait for the background removal.
+        trash_path = os.path.join(self._dir, models.TRASH_DIR)
+        for _ in range(100):
+            if not os.listdir(trash_path):
+                break
+            time.sleep(0.01)
+        self.assertEqual([], os.listdir(trash_path))
+
+    def test_purge_disabled(self):
+        config_path = os.path.join(self._dir, "config.ini")
+        with open(config_path, "w") as file:
+            file.write(TEST_CONFIG % self._dir)
+        client = werkzeug.test.Client(config.configure(config_path))
+        client.put("/mybucket")
+        self.assertEqual(403, client.post("/PURGE?bucket=mybucket").status_code)
+        self.assertEqual(200, client.get("/mybucket").status_code)
+
     @mock.patch.object(os, "environ", {"name": "Jane", "NAME": "Joe"})
     def test_configure_dupe_env_key(self):
         config_path = os.path.join(self._dir, "config.ini")
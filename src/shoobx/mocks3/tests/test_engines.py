@@ -0,0 +1,308 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Shoobx S3 Storage Engine Tests
+"""
+import concurrent.futures
+import errno
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import werkzeug.test
+
+from shoobx.mocks3 import config, engines, layouts, models
+
+TEST_CONFIG = """
+[shoobx:mocks3]
+log-level = INFO
+directory = %s
+hostname = localhost
+engine = memory
+"""
+
+
+class EngineTestCase(unittest.TestCase):
+    engine_name = engines.FS
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self.engine = engines.get_engine(
+            self.engine_name, database=os.path.join(self._dir, "data.sqlite")
+        )
+        self.path = os.path.join(self._dir, "data")
+        self.engine.makedirs(self.path, exist_ok=True)
+
+    def tearDown(self):
+        models._info_cache.clear()
+        shutil.rmtree(self._dir)
+
+
+class FileSystemEngineTests(EngineTestCase):
+    def test_files(self):
+        path = os.path.join(self.path, "file")
+        self.assertFalse(self.engine.exists(path))
+        self.assertIsNone(self.engine.signature(path))
+        self.engine.write_file(path, b"0123")
+        signature = self.engine.signature(path)
+        self.assertEqual((b"0123", signature), self.engine.read_file(path))
+        self.assertEqual(4, self.engine.getsize(path))
+        with self.engine.atomic_write(path) as file:
+            file.write(b"45")
+            self.assertEqual(b"0123", self.engine.read_file(path)[0])
+        self.assertNotEqual(signature, self.engine.signature(path))
+        with self.engine.open(path) as file:
+            self.assertEqual(b"45", file.read())
+        with self.assertRaises(ValueError):
+            with self.engine.atomic_write(path) as file:
+                file.write(b"67")
+                raise ValueError()
+        self.assertEqual(b"45", self.engine.read_file(path)[0])
+        self.engine.clone(path, path + ".copy")
+        self.assertEqual(b"45", self.engine.read_file(path + ".copy")[0])
+        self.assertEqual(["file", "file.copy"], sorted(self.engine.listdir(self.path)))
+        self.engine.unlink(path)
+        with self.assertRaises(FileNotFoundError):
+            self.engine.read_file(path)
+
+    def test_signatures_differ(self):
+        path = os.path.join(self.path, "file")
+        signatures = []
+        # Files written at once, as far as their timestamps tell.
+        with mock.patch.object(time, "time_ns", return_value=10**18):
+            for _ in range(3):
+                self.engine.write_file(path, b"same")
+                signatures.append(self.engine.signature(path))
+        self.assertEqual(3, len(set(signatures)))
+        if self.engine_name == engines.FS:
+            # Files are modified later than the file they replace, so a file
+            # getting the inode of an earlier one has a different signature.
+            mtime_ns = time.time_ns() + 10**12
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+            self.engine.write_file(path, b"same")
+            self.assertLess(mtime_ns, os.stat(path).st_mtime_ns)
+
+    def test_directories(self):
+        path = os.path.join(self.path, "a", "b")
+        self.engine.makedirs(path)
+        self.engine.makedirs(path, exist_ok=True)
+        with self.assertRaises(FileExistsError):
+            self.engine.mkdir(path)
+        with self.assertRaises(FileNotFoundError):
+            self.engine.mkdir(os.path.join(self.path, "x", "y"))
+        self.engine.write_file(os.path.join(path, "file"), b"")
+        tmp_path = self.engine.mkdtemp(self.path, "tmp-")
+        self.assertTrue(self.engine.isdir(tmp_path))
+        with self.assertRaises(OSError) as context:
+            self.engine.rename(tmp_path, os.path.join(self.path, "a"))
+        self.assertIn(context.exception.errno, (errno.EEXIST, errno.ENOTEMPTY))
+        self.engine.rmdir(tmp_path)
+        self.engine.rename(os.path.join(self.path, "a"), os.path.join(self.path, "c"))
+        self.assertEqual(["c"], self.engine.listdir(self.path))
+        path = os.path.join(self.path, "c", "b")
+        self.assertEqual(["file"], self.engine.listdir(path))
+        self.engine.rmtree(os.path.join(self.path, "c"))
+        self.engine.rmtree(os.path.join(self.path, "c"), ignore_errors=True)
+        self.assertEqual([], self.engine.listdir(self.path))
+
+    def test_links(self):
+        path = os.path.join(self.path, "latest")
+        with self.assertRaises(FileNotFoundError):
+            self.engine.read_link(path)
+        self.engine.set_link(path, "0")
+        self.engine.set_link(path, "1")
+        self.assertEqual("1", self.engine.read_link(path))
+
+    def test_lock(self):
+        path = os.path.join(self.path, "key")
+        with self.engine.lock(path):
+            self.assertTrue(self.engine.isdir(path))
+        with self.engine.lock(path):
+            pass
+
+
+class MemoryEngineTests(FileSystemEngineTests):
+    engine_name = engines.MEMORY
+
+    def test_not_on_disk(self):
+        self.engine.write_file(os.path.join(self.path, "file"), b"")
+        self.assertFalse(os.path.exists(self.path))
+
+
+class SqliteEngineTests(FileSystemEngineTests):
+    engine_name = engines.SQLITE
+
+    def test_single_file(self):
+        self.engine.write_file(os.path.join(self.path, "file"), b"value")
+        self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(os.path.exists(self.engine.database))
+
+
+class BackendTests(EngineTestCase):
+    """The backend on every engine."""
+
+    def setUp(self):
+        super().setUp()
+        self.backend = models.ShoobxS3Backend()
+        self.backend.engine = self.engine
+        self.backend.directory = self.path
+        self.backend.create_bucket("mybucket", "us-east-1")
+        self.bucket = self.backend.get_bucket("mybucket")
+
+    def names(self, bucket_name, prefix="", delimiter=None):
+        bucket = self.backend.get_bucket(bucket_name)
+        keys, folders, _, _ = self.backend.list_objects(
+            bucket, prefix, delimiter, None, None
+        )
+        return [key.name for key in keys] + folders
+
+    def test_put_get(self):
+        key = self.backend.put_object("mybucket", "the-key", b"0123456789")
+        key.set_metadata({"foo": "bar"})
+        key = self.backend.get_object("mybucket", "the-key")
+        self.assertEqual(b"0123456789", key.value)
+        self.assertEqual(b"2345", key.read_range(2, 5))
+        self.assertEqual(10, key.size)
+        self.assertEqual(f'"{hashlib.md5(b"0123456789").hexdigest()}"', key.etag)
+        self.assertEqual({"foo": "bar"}, key.metadata)
+        self.assertEqual(["mybucket"], [b.name for b in self.backend.list_buckets()])
+
+    def test_list(self):
+        for name in ("a", "b/1", "b/2", "c"):
+            self.backend.put_object("mybucket", name, b"value")
+        self.assertEqual(["a", "b/1", "b/2", "c"], self.names("mybucket"))
+        self.assertEqual(["a", "c", "b/"], self.names("mybucket", delimiter="/"))
+        self.assertEqual(4, len(self.bucket.keys))
+
+    def test_copy(self):
+        src = self.backend.put_object("mybucket", "src", b"0123456789")
+        self.backend.copy_object(src, "mybucket", "dst")
+        copy = self.backend.get_object("mybucket", "dst")
+        self.assertEqual(b"0123456789", copy.value)
+        self.assertEqual(src.etag, copy.etag)
+
+    def test_multipart(self):
+        self.backend.put_object("mybucket", "src", b"0123456789")
+        upload_id = self.backend.create_multipart_upload(
+            "mybucket", "the-key", {"foo": "bar"}, "STANDARD", {}, None, None, None
+        )
+        part1 = b"0" * (5 * 1024 * 1024)
+        etags = [
+            self.backend.upload_part("mybucket", upload_id, 1, part1).etag,
+            self.backend.upload_part_copy(
+                "mybucket", upload_id, 2, "mybucket", "src", None, 2, 4
+            ).etag,
+        ]
+        key = self.backend.complete_multipart_upload(
+            "mybucket", upload_id, enumerate(etags, 1)
+        )
+        self.assertEqual(part1 + b"234", key.value)
+        self.assertEqual({"foo": "bar"}, key.metadata)
+        self.assertNotIn(upload_id, self.bucket.multiparts)
+
+    def test_versions(self):
+        self.backend.put_bucket_versioning("mybucket", "Enabled")
+        for value in (b"1", b"2", b"3"):
+            self.backend.put_object("mybucket", "the-key", value)
+        versions = models.Key.get_versions(self.bucket, "the-key")
+        self.assertEqual([0, 1, 2], [key.version for key in versions])
+        self.assertEqual(b"3", self.bucket.keys["the-key"].value)
+
+    def test_concurrent_versions(self):
+        self.backend.put_bucket_versioning("mybucket", "Enabled")
+
+        def put(index):
+            self.backend.put_object("mybucket", "the-key", b"value %d" % index)
+
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            list(pool.map(put, range(16)))
+        versions = models.Key.get_versions(self.bucket, "the-key")
+        self.assertEqual(list(range(16)), [key.version for key in versions])
+
+    def test_delete(self):
+        for name in ("a", "b", "c"):
+            self.backend.put_object("mybucket", name, b"value")
+        self.backend.delete_object("mybucket", "a")
+        self.backend.delete_objects("mybucket", [{"Key": "b"}, {"Key": "x"}])
+        self.assertEqual(["c"], self.names("mybucket"))
+        self.assertFalse(self.backend.delete_bucket("mybucket"))
+        self.backend.delete_object("mybucket", "c")
+        self.assertTrue(self.backend.delete_bucket("mybucket"))
+        with self.assertRaises(models.models.MissingBucket):
+            self.backend.get_bucket("mybucket")
+
+    def test_purge(self):
+        self.backend.put_object("mybucket", "a", b"value")
+        self.backend.purge_bucket("mybucket").join()
+        with self.assertRaises(models.models.MissingBucket):
+            self.backend.get_bucket("mybucket")
+        trash_path = os.path.join(self.path, models.TRASH_DIR)
+        self.assertEqual([], self.engine.listdir(trash_path))
+        # The name is free again, with an empty index.
+        self.backend.create_bucket("mybucket", "us-east-1")
+        self.assertEqual([], self.names("mybucket"))
+
+    def test_hashed_layout(self):
+        self.backend.layout = layouts.HASHED
+        self.backend.create_bucket("hashed", "us-east-1")
+        self.backend.put_object("hashed", "folder/key", b"value")
+        bucket = self.backend.get_bucket("hashed")
+        self.assertEqual(["folder/key"], list(bucket.keys))
+        key = self.backend.get_object("hashed", "folder/key")
+        self.assertEqual(b"value", key.value)
+
+
+class MemoryBackendTests(BackendTests):
+    engine_name = engines.MEMORY
+
+
+class SqliteBackendTests(BackendTests):
+    engine_name = engines.SQLITE
+
+    def test_reopen(self):
+        self.backend.put_object("mybucket", "a", b"value")
+        # Another run of the server, which builds the index from the keys.
+        backend = models.ShoobxS3Backend()
+        backend.engine = engines.get_engine(engines.SQLITE, self.engine.database)
+        backend.directory = self.path
+        bucket = backend.get_bucket("mybucket")
+        self.assertEqual(b"value", backend.get_object("mybucket", "a").value)
+        keys, _, _, _ = backend.list_objects(bucket, "", None, None, None)
+        self.assertEqual(["a"], [key.name for key in keys])
+
+
+class ConfigTests(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self.config_path = os.path.join(self._dir, "config.ini")
+        self.backend = models.s3_backends[models.MOTO_DEFAULT_ACCOUNT_ID]["aws"]
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+        config._CONFIG = None
+        config.CONFIG_FILE = None
+        self.backend.engine = engines.FileSystemEngine()
+
+    def configure(self, extra=""):
+        with open(self.config_path, "w") as file:
+            file.write(TEST_CONFIG % os.path.join(self._dir, "data") + extra)
+        return config.configure(self.config_path)
+
+    def test_memory(self):
+        client = werkzeug.test.Client(self.configure())
+        headers = {"x-amz-acl": "public-read"}
+        client.put("/mybucket", headers=headers)
+        client.put("/mybucket/key", data=b"value", headers=headers)
+        self.assertEqual(b"value", client.get("/mybucket/key").data)
+        self.assertEqual(engines.MEMORY, self.backend.engine.name)
+        self.assertFalse(os.path.exists(os.path.join(self._dir, "data")))
+
+    def test_fs_only_features(self):
+        with self.assertRaises(ValueError):
+            self.configure("deduplicate = True\n")
@@ -0,0 +1,178 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Shoobx S3 Metrics Tests
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import werkzeug.test
+
+from shoobx.mocks3 import config, metrics
+
+TEST_CONFIG = """
+[shoobx:mocks3]
+log-level = INFO
+directory = %s
+hostname = localhost
+request-log = True
+"""
+
+
+class MetricsTests(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        config_path = os.path.join(self._dir, "config.ini")
+        with open(config_path, "w") as file:
+            file.write(TEST_CONFIG % self._dir)
+        metrics.registry.clear()
+        self.client = werkzeug.test.Client(config.configure(config_path))
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+        config._CONFIG = None
+        config.CONFIG_FILE = None
+        metrics.registry.clear()
+
+    def request(self, method, path, data=None):
+        # Buffered responses are closed, which ends the request metrics.
+        return self.client.open(
+            path,
+            method=method,
+            data=data,
+            headers={"x-amz-acl": "public-read"},
+            buffered=True,
+        )
+
+    def publish(self, pid):
+        directory = os.path.join(self._dir, metrics.METRICS_DIR)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{pid}.json")
+        with open(path, "w") as file:
+            json.dump(
+                {
+                    "requests": [["CreateBucket", "mybucket", "200", 2]],
+                    "durations": [],
+                    "phases": [],
+                    "counters": [],
+                },
+                file,
+            )
+        return path
+
+    def get_metrics(self):
+        response = self.request("GET", "/METRICS")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(metrics.CONTENT_TYPE, response.headers["Content-Type"])
+        return response.get_data(as_text=True).splitlines()
+
+    def test_metrics(self):
+        self.request("PUT", "/mybucket")
+        self.request("PUT", "/mybucket/the/key", b"some value")
+        self.assertEqual(b"some value", self.request("GET", "/mybucket/the/key").data)
+        lines = self.get_metrics()
+        self.assertIn(
+            'mocks3_requests_total{operation="PutObject",bucket="mybucket",'
+            'status="200"} 1',
+            lines,
+        )
+        self.assertIn(
+            'mocks3_request_duration_seconds_count{operation="GetObject",'
+            'bucket="mybucket"} 1',
+            lines,
+        )
+        self.assertIn(
+            'mocks3_disk_write_bytes_total{operation="PutObject",bucket="mybucket"} 10',
+            lines,
+        )
+        self.assertIn(
+            'mocks3_disk_read_bytes_total{operation="GetObject",bucket="mybucket"} 10',
+            lines,
+        )
+        prefix = 'mocks3_request_phase_seconds_total{operation="GetObject"'
+        phases = {
+            line.split('phase="')[1].split('"')[0]
+            for line in lines
+            if line.startswith(prefix)
+        }
+        self.assertEqual(set(metrics.PHASES), phases)
+
+    def test_published(self):
+        self.request("PUT", "/mybucket")
+        # Metrics of another process serving the same directory.
+        self.publish(os.getppid())
+        self.assertIn(
+            'mocks3_requests_total{operation="CreateBucket",bucket="mybucket",'
+            'status="200"} 3',
+            self.get_metrics(),
+        )
+
+    def test_published_dead_process(self):
+        self.request("PUT", "/mybucket")
+        process = subprocess.Popen([sys.executable, "-c", ""])
+        process.wait()
+        path = self.publish(process.pid)
+        self.assertIn(
+            'mocks3_requests_total{operation="CreateBucket",bucket="mybucket",'
+            'status="200"} 1',
+            self.get_metrics(),
+        )
+        self.assertFalse(os.path.exists(path))
+
+    def test_cleared_on_startup(self):
+        path = self.publish(os.getppid())
+        config._CONFIG = None
+        config.configure(os.path.join(self._dir, "config.ini"))
+        self.assertFalse(os.path.exists(path))
+
+    def test_request_log(self):
+        with self.assertLogs("shoobx.mocks3.requests") as logs:
+            self.request("GET", "/mybucket/missing")
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual("GetObject", entry["operation"])
+        self.assertEqual("mybucket", entry["bucket"])
+        self.assertEqual(404, entry["status"])
+        self.assertEqual(set(metrics.PHASES), set(entry["phases"]))
+
+    def test_render_escapes_labels(self):
+        request = metrics.RequestMetrics("GET", "/")
+        request.operation = "GetObject"
+        request.bucket = 'a"b'
+        request.status = 200
+        metrics.registry.record(request)
+        self.assertIn(
+            'mocks3_requests_total{operation="GetObject",bucket="a\\"b",'
+            'status="200"} 1',
+            metrics.render(metrics.collect()).splitlines(),
+        )
+
+    def test_bucket_labels_bounded(self):
+        request = metrics.RequestMetrics("GET", "/")
+        request.operation = "GetObject"
+        request.status = 200
+        for index in range(metrics.MAX_BUCKET_LABELS + 10):
+            request.bucket = f"bucket-{index}"
+            metrics.registry.record(request)
+        self.assertEqual(metrics.MAX_BUCKET_LABELS, len(metrics.registry.buckets))
+        requests = {
+            bucket: count
+            for operation, bucket, status, count in metrics.collect()[0]["requests"]
+        }
+        self.assertEqual(metrics.MAX_BUCKET_LABELS + 1, len(requests))
+        self.assertEqual(1, requests["bucket-0"])
+        self.assertEqual(10, requests[metrics.OTHER_BUCKETS])
+        # Buckets already labelled keep their label.
+        request.bucket = "bucket-0"
+        metrics.registry.record(request)
+        self.assertIn(
+            'mocks3_requests_total{operation="GetObject",bucket="bucket-0",'
+            'status="200"} 2',
+            metrics.render(metrics.collect()).splitlines(),
+        )
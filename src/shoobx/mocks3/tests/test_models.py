@@ -0,0 +1,637 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Shoobx S3 Backend Model Tests
+"""
+import concurrent.futures
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from shoobx.mocks3 import engines, layouts, migrate, models
+
+
+class ModelTestCase(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self.backend = models.ShoobxS3Backend()
+        self.backend.directory = self._dir
+        self.backend.create_bucket("mybucket", "us-east-1")
+        self.bucket = self.backend.get_bucket("mybucket")
+
+    def tearDown(self):
+        models._info_cache.clear()
+        shutil.rmtree(self._dir)
+
+
+class InfoCacheTests(ModelTestCase):
+    def test_info_parsed_once(self):
+        key = self.backend.put_object("mybucket", "the-key", b"some value")
+        key.response_dict
+        engine = self.backend.engine
+        with mock.patch.object(
+            engine, "read_file", wraps=engine.read_file
+        ) as read_file, mock.patch.object(
+            models.json, "loads", wraps=json.loads
+        ) as loads:
+            key.response_dict
+            key.metadata
+            key.acl
+        self.assertEqual(0, read_file.call_count)
+        self.assertEqual(0, loads.call_count)
+
+    def test_info_external_change(self):
+        key = self.backend.put_object(
+            "mybucket", "the-key", b"some value", storage="STANDARD"
+        )
+        self.assertEqual("STANDARD", key.storage_class)
+        with open(key._info_path) as file:
+            info = json.load(file)
+        info["storage_class"] = "GLACIER"
+        # Simulate a write by another process.
+        tmp_path = key._info_path + ".new"
+        with open(tmp_path, "w") as file:
+            json.dump(info, file)
+        os.rename(tmp_path, key._info_path)
+        self.assertEqual("GLACIER", key.storage_class)
+
+    def test_info_values_are_copies(self):
+        key = self.backend.put_object("mybucket", "the-key", b"some value")
+        key.metadata["foo"] = "bar"
+        self.assertEqual({}, key.metadata)
+
+    def test_info_cache_bounded(self):
+        cache = models._InfoCache(size=2)
+        for name in ("a", "b", "c"):
+            key = self.backend.put_object("mybucket", name, b"some value")
+            cache.get(self.backend.engine, key._info_path)
+        self.assertEqual(2, len(cache._entries))
+
+
+class InfoTransactionTests(ModelTestCase):
+    def test_put_object_writes_info_once(self):
+        with mock.patch.object(
+            models, "_write_info", wraps=models._write_info
+        ) as write_info:
+            self.backend.put_object("mybucket", "the-key", b"some value")
+        self.assertEqual(1, write_info.call_count)
+
+    def test_transaction_batches_writes(self):
+        key = self.backend.put_object("mybucket", "the-key", b"some value")
+        with mock.patch.object(
+            models, "_write_info", wraps=models._write_info
+        ) as write_info:
+            with key.info_transaction():
+                key.set_metadata({"foo": "bar"})
+                key.set_storage_class("GLACIER")
+                self.assertEqual("GLACIER", key.storage_class)
+        self.assertEqual(1, write_info.call_count)
+        self.assertEqual({"foo": "bar"}, key.metadata)
+        self.assertEqual("GLACIER", key.storage_class)
+
+    def test_unchanged_not_written(self):
+        key = self.backend.put_object("mybucket", "the-key", b"some value")
+        key.set_metadata({"foo": "bar"})
+        with mock.patch.object(
+            models, "_write_info", wraps=models._write_info
+        ) as write_info:
+            key.set_metadata({"foo": "bar"})
+            key.set_acl(key.acl)
+            with key.info_transaction():
+                key.set_metadata({"foo": "bar"})
+        write_info.assert_not_called()
+
+    def test_transaction_discarded_on_error(self):
+        key = self.backend.put_object(
+            "mybucket", "the-key", b"some value", storage="STANDARD"
+        )
+        with self.assertRaises(ValueError):
+            with key.info_transaction():
+                key.set_storage_class("GLACIER")
+                raise ValueError()
+        self.assertEqual("STANDARD", key.storage_class)
+        files = sorted(os.listdir(key._versioned_path))
+        self.assertEqual(["info.json", "value"], files)
+
+
+class KeyTests(ModelTestCase):
+    def test_read_range(self):
+        key = self.backend.put_object("mybucket", "the-key", b"0123456789")
+        self.assertEqual(b"0", key.read_range(0, 0))
+        self.assertEqual(b"2345", key.read_range(2, 5))
+        self.assertEqual(b"89", key.read_range(8, 20))
+
+    def test_latest_version(self):
+        self.backend.put_bucket_versioning("mybucket", "Enabled")
+        for value in (b"1", b"2", b"3"):
+            self.backend.put_object("mybucket", "the-key", value)
+        with mock.patch.object(models.Key, "get_versions") as get_versions:
+            key = self.bucket.keys["the-key"]
+        get_versions.assert_not_called()
+        self.assertEqual(2, key.version)
+        self.assertEqual(b"3", key.value)
+        # Keys written before the latest version was recorded.
+        os.unlink(os.path.join(key._path, models.LATEST_LINK))
+        self.assertEqual(2, self.bucket.keys["the-key"].version)
+        self.assertNotIn("other", self.bucket.keys)
+
+    def test_deleted_versions_not_reused(self):
+        self.backend.put_bucket_versioning("mybucket", "Enabled")
+        for value in (b"1", b"2"):
+            self.backend.put_object("mybucket", "the-key", value)
+        self.assertTrue(models.Key(self.bucket, "the-key", 1).delete_version())
+        self.assertEqual(0, self.bucket.keys["the-key"].version)
+        key = self.backend.put_object("mybucket", "the-key", b"3")
+        self.assertEqual(2, key.version)
+        for version in (0, 2):
+            models.Key(self.bucket, "the-key", version).delete_version()
+        self.assertNotIn("the-key", self.bucket.keys)
+        self.assertEqual([], list(self.bucket.keys))
+        key = self.backend.put_object("mybucket", "the-key", b"4")
+        self.assertEqual(3, key.version)
+
+    def test_not_tracked(self):
+        # moto tracks all model instances, which would keep every key alive.
+        key = self.backend.put_object("mybucket", "the-key", b"some value")
+        self.assertNotIn(key, models.Key.instances)
+
+    def test_create_from_stream(self):
+        data = b"0123456789" * 100000
+        key = self.backend.put_object("mybucket", "the-key", io.BytesIO(data))
+        self.assertEqual(data, key.value)
+        # The etag is recorded while writing, without reading the value again.
+        with mock.patch.object(models.Key, "open_value") as open_value:
+            self.assertEqual(f'"{hashlib.md5(data).hexdigest()}"', key.etag)
+        open_value.assert_not_called()
+        files = sorted(os.listdir(key._versioned_path))
+        self.assertEqual(["info.json", "value"], files)
+
+
+class ConcurrencyTests(ModelTestCase):
+    def test_concurrent_versions(self):
+        self.bucket.versioning_status = "Enabled"
+
+        def put(index):
+            self.backend.put_object("mybucket", "the-key", b"value %d" % index)
+
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            list(pool.map(put, range(32)))
+        versions = models.Key.get_versions(self.bucket, "the-key")
+        self.assertEqual(list(range(32)), [key.version for key in versions])
+        self.assertEqual(31, self.bucket.keys["the-key"].version)
+
+    def test_latest_pinned(self):
+        self.backend.put_object("mybucket", "the-key", b"old")
+        key = self.bucket.keys["the-key"]
+        with key.open_value() as value:
+            self.backend.put_object("mybucket", "the-key", b"new value")
+            self.assertEqual(b"old", value.read())
+        self.assertEqual(3, key.size)
+        self.assertEqual(f'"{hashlib.md5(b"old").hexdigest()}"', key.etag)
+        # Removed before it was read, the latest version is read instead.
+        key = self.bucket.keys["the-key"]
+        self.backend.put_object("mybucket", "the-key", b"newest value")
+        self.assertEqual(b"newest value", key.value)
+        self.assertEqual(12, key.size)
+
+    def test_failed_create_leaves_nothing(self):
+        stream = mock.Mock(read=mock.Mock(side_effect=IOError("disconnected")))
+        with self.assertRaises(IOError):
+            self.backend.put_object("mybucket", "the-key", stream)
+        self.assertNotIn("the-key", self.bucket.keys)
+        self.assertFalse(os.path.exists(self.bucket.key_path("the-key")))
+        self.assertEqual([], list(self.bucket.index.list("", None, None)))
+
+    def test_failed_new_key_not_listed(self):
+        with self.assertRaises(RuntimeError):
+            with self.backend._new_key(self.bucket, "the-key"):
+                raise RuntimeError
+        self.assertFalse(os.path.exists(self.bucket.key_path("the-key")))
+        self.backend.put_object("mybucket", "other", b"value")
+        # A key directory without version, e.g. of a key being created.
+        os.makedirs(self.bucket.key_path("the-key"))
+        self.assertEqual(["other"], list(self.bucket.keys))
+        self.assertEqual(["other"], [key.name for key in self.bucket.keys.values()])
+
+    def test_staged_until_complete(self):
+        key = models.Key(self.bucket, "the-key")
+        lock = self.backend.engine.lock(key._path)
+        with lock, models._staged(key, key._versioned_path):
+            key._etag = "0"
+            self.assertFalse(key.exists())
+            self.assertIsNone(self.bucket.keys.get("the-key"))
+        self.assertTrue(key.exists())
+        self.assertEqual("0", key._etag)
+
+    def test_delete_while_waiting_for_lock(self):
+        self.backend.put_object("mybucket", "the-key", b"old")
+        key_path = self.bucket.key_path("the-key")
+        with self.backend.engine.lock(key_path):
+            writer = threading.Thread(
+                target=self.backend.put_object, args=("mybucket", "the-key", b"new")
+            )
+            writer.start()
+            writer.join(0.1)
+            shutil.rmtree(key_path)
+        writer.join()
+        self.assertEqual(b"new", self.bucket.keys["the-key"].value)
+
+
+class MultipartTests(ModelTestCase):
+    def test_complete_assembles_on_disk(self):
+        upload_id = self.backend.create_multipart_upload(
+            "mybucket", "the-key", {"foo": "bar"}, "STANDARD", {}, None, None, None
+        )
+        part1 = b"0" * (5 * 1024 * 1024)
+        part2 = b"1" * 10
+        etags = [
+            self.backend.upload_part("mybucket", upload_id, pn, data).etag
+            for pn, data in enumerate([part1, part2], 1)
+        ]
+        value = mock.PropertyMock(side_effect=AssertionError("value loaded"))
+        with mock.patch.object(models.Part, "value", value):
+            key = self.backend.complete_multipart_upload(
+                "mybucket", upload_id, enumerate(etags, 1)
+            )
+        self.assertEqual(part1 + part2, key.value)
+        self.assertEqual({"foo": "bar"}, key.metadata)
+        self.assertTrue(key.etag.endswith('-2"'))
+        self.assertNotIn(upload_id, self.bucket.multiparts)
+
+
+class CopyTests(ModelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.backend.create_bucket("other", "us-east-1")
+        self.src = self.backend.put_object(
+            "mybucket", "src", b"0123456789", storage="STANDARD"
+        )
+
+    def test_copy_object(self):
+        value = mock.PropertyMock(side_effect=AssertionError("value loaded"))
+        with mock.patch.object(models.Key, "value", value):
+            self.backend.copy_object(self.src, "other", "dst")
+        copy = self.backend.get_object("other", "dst")
+        self.assertEqual(b"0123456789", copy.value)
+        self.assertEqual(self.src.etag, copy.etag)
+        self.assertFalse(os.path.samefile(self.src._value_path, copy._value_path))
+
+    def test_copy_multipart(self):
+        # The etag of a multipart upload is not the MD5 of its value.
+        src = self.backend.put_object(
+            "mybucket", "multipart", b"0123456789", etag="0" * 32 + "-2"
+        )
+        with mock.patch.object(
+            models.Key, "open_value", autospec=True, side_effect=models.Key.open_value
+        ) as open_value:
+            self.backend.copy_object(src, "other", "dst")
+        # The source is read once, its copy not at all.
+        read = [call.args[0].name for call in open_value.call_args_list]
+        self.assertEqual(["multipart"], read)
+        md5 = hashlib.md5(b"0123456789").hexdigest()
+        self.assertEqual(md5, self.backend.get_bucket("other").index.get("dst").etag)
+        self.assertEqual(f'"{md5}"', self.backend.get_object("other", "dst").etag)
+
+    def test_copy_without_reflinks(self):
+        with mock.patch.object(engines, "_reflink", return_value=False):
+            self.backend.copy_object(self.src, "other", "dst")
+        self.assertEqual(b"0123456789", self.backend.get_object("other", "dst").value)
+
+    def test_upload_part_copy(self):
+        upload_id = self.backend.create_multipart_upload(
+            "other", "dst", {}, "STANDARD", {}, None, None, None
+        )
+        value = mock.PropertyMock(side_effect=AssertionError("value loaded"))
+        with mock.patch.object(models.Key, "value", value):
+            whole = self.backend.upload_part_copy(
+                "other", upload_id, 1, "mybucket", "src", None, None, None
+            )
+            part = self.backend.upload_part_copy(
+                "other", upload_id, 2, "mybucket", "src", None, 2, 4
+            )
+        self.assertEqual(b"0123456789", whole.value)
+        self.assertEqual(self.src.etag, whole.etag)
+        self.assertEqual(b"234", part.value)
+        self.assertEqual(f'"{hashlib.md5(b"234").hexdigest()}"', part.etag)
+
+    def test_key_copy(self):
+        self.src.set_metadata({"foo": "bar"})
+        copy = self.src.copy("copied")
+        self.assertEqual(b"0123456789", copy.value)
+        self.assertEqual({"foo": "bar"}, copy.metadata)
+        self.assertEqual(self.src.etag, copy.etag)
+        self.assertEqual("STANDARD", copy.storage_class)
+
+
+class ListObjectsTests(ModelTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ("a", "b/1", "b/2", "c/1", "d"):
+            self.backend.put_object("mybucket", name, name.encode())
+
+    def _names(self, entries):
+        return [getattr(entry, "name", entry) for entry in entries]
+
+    def test_list(self):
+        keys, folders, is_truncated, _ = self.backend.list_objects(
+            self.bucket, None, None, None, 1000
+        )
+        self.assertEqual(["a", "b/1", "b/2", "c/1", "d"], self._names(keys))
+        self.assertEqual([], folders)
+        self.assertEqual("false", is_truncated)
+        self.assertEqual([1, 3, 3, 3, 1], [key.size for key in keys])
+        self.assertEqual(f'"{hashlib.md5(b"b/1").hexdigest()}"', keys[1].etag)
+
+    def test_list_delimiter(self):
+        keys, folders, _, _ = self.backend.list_objects(
+            self.bucket, None, "/", None, 1000
+        )
+        self.assertEqual(["a", "d"], self._names(keys))
+        self.assertEqual(["b/", "c/"], folders)
+        keys, folders, _, _ = self.backend.list_objects(
+            self.bucket, "b/", "/", None, 1000
+        )
+        self.assertEqual(["b/1", "b/2"], self._names(keys))
+        self.assertEqual([], folders)
+
+    def test_list_v2_pages(self):
+        names, token = [], None
+        while True:
+            entries, is_truncated, token = self.backend.list_objects_v2(
+                self.bucket, None, "/", token, None, 2
+            )
+            names.extend(self._names(entries))
+            if is_truncated == "false":
+                break
+        self.assertEqual(["a", "b/", "c/", "d"], names)
+        self.assertIsNone(token)
+
+    def test_list_after_delete(self):
+        self.backend.delete_object("mybucket", "b/1")
+        entries, _, _ = self.backend.list_objects_v2(
+            self.bucket, "b", None, None, None, 1000
+        )
+        self.assertEqual(["b/2"], self._names(entries))
+
+    def test_index_rebuilt(self):
+        # Data directories written before the index existed have none.
+        os.unlink(os.path.join(self.bucket._path, "index.sqlite"))
+        entries, _, _ = self.backend.list_objects_v2(
+            self.bucket, None, None, None, "b/2", 1000
+        )
+        self.assertEqual(["c/1", "d"], self._names(entries))
+
+
+class BucketStatsTests(ModelTestCase):
+    def test_stats(self):
+        self.backend.put_object("mybucket", "a", b"12345")
+        self.backend.put_object("mybucket", "b", b"123")
+        self.backend.put_object("mybucket", "a", b"1")
+        self.assertEqual((2, 4), self.bucket.index.stats())
+        self.assertEqual(2, len(self.bucket.keys))
+        self.backend.delete_object("mybucket", "a")
+        self.assertEqual((1, 3), self.bucket.index.stats())
+
+    def test_stats_rebuilt(self):
+        self.backend.put_object("mybucket", "a", b"12345")
+        os.unlink(os.path.join(self.bucket._path, "index.sqlite"))
+        self.assertEqual((1, 5), self.bucket.index.stats())
+
+    def test_delete_bucket(self):
+        self.backend.put_object("mybucket", "a", b"12345")
+        self.assertFalse(self.backend.delete_bucket("mybucket"))
+        self.backend.delete_object("mybucket", "a")
+        self.assertTrue(self.backend.delete_bucket("mybucket"))
+        self.assertFalse(os.path.exists(self.bucket._path))
+
+
+class DeleteObjectsTests(ModelTestCase):
+    def test_delete_objects(self):
+        for name in ("a", "b", "c"):
+            self.backend.put_object("mybucket", name, b"123")
+        with mock.patch.object(
+            self.bucket.index, "delete", side_effect=AssertionError("deleted")
+        ):
+            deleted, errors = self.backend.delete_objects(
+                "mybucket", [{"Key": "a"}, {"Key": "missing"}, {"Key": "c"}]
+            )
+        self.assertEqual(
+            [("a", None, None), ("missing", None, None), ("c", None, None)], deleted
+        )
+        self.assertEqual([], errors)
+        self.assertEqual(["b"], list(self.bucket.keys))
+        self.assertEqual((1, 3), self.bucket.index.stats())
+
+    def test_delete_objects_versioned(self):
+        self.backend.put_bucket_versioning("mybucket", "Enabled")
+        for value in (b"1", b"2", b"3"):
+            self.backend.put_object("mybucket", "a", value)
+        self.backend.put_object("mybucket", "b", b"123")
+        deleted, errors = self.backend.delete_objects(
+            "mybucket",
+            [{"Key": "a", "VersionId": "2"}, {"Key": "a", "VersionId": "0"}],
+        )
+        self.assertEqual([("a", "2", None), ("a", "0", None)], deleted)
+        self.assertEqual([], errors)
+        versions = models.Key.get_versions(self.bucket, "a")
+        self.assertEqual([1], [key.version for key in versions])
+        self.assertEqual(b"2", self.bucket.keys["a"].value)
+        self.assertEqual(1, self.bucket.index.get("a").version)
+        self.assertEqual((2, 4), self.bucket.index.stats())
+        deleted, errors = self.backend.delete_objects(
+            "mybucket", [{"Key": "a", "VersionId": "1"}, {"Key": "b"}]
+        )
+        self.assertEqual([("a", "1", None), ("b", None, "1")], deleted)
+        self.assertEqual([], list(self.bucket.keys))
+        self.assertEqual((0, 0), self.bucket.index.stats())
+
+    def test_delete_marker(self):
+        self.backend.put_bucket_versioning("mybucket", "Enabled")
+        self.backend.put_object("mybucket", "a", b"1")
+        deleted, errors = self.backend.delete_objects("mybucket", [{"Key": "a"}])
+        self.assertEqual([("a", None, "1")], deleted)
+        # The key is hidden, but its versions are kept.
+        self.assertNotIn("a", self.bucket.keys)
+        self.assertEqual((0, 0), self.bucket.index.stats())
+        versions = models.Key.get_versions(self.bucket, "a")
+        self.assertIsInstance(versions[-1], models.DeleteMarker)
+        self.assertEqual(b"1", versions[0].value)
+        ((name, listed),) = self.bucket.keys.iterlists()
+        self.assertEqual([0, 1], [key.version for key in listed])
+        self.backend.put_object("mybucket", "a", b"2")
+        self.assertEqual(2, self.bucket.keys["a"].version)
+        self.backend.delete_objects("mybucket", [{"Key": "a"}])
+        # Removing the delete marker brings the version before it back.
+        removed = models.Key(self.bucket, "a", 3).delete_version()
+        self.assertIsInstance(removed, models.DeleteMarker)
+        self.assertEqual(b"2", self.bucket.keys["a"].value)
+        self.assertEqual(2, self.bucket.index.get("a").version)
+
+    def test_invalid_version(self):
+        self.backend.put_bucket_versioning("mybucket", "Enabled")
+        self.backend.put_object("mybucket", "a", b"1")
+        with self.assertRaises(models.exceptions.InvalidVersion):
+            self.backend.delete_objects(
+                "mybucket", [{"Key": "a"}, {"Key": "a", "VersionId": "null"}]
+            )
+        self.assertEqual(b"1", self.bucket.keys["a"].value)
+
+    def test_removed_events(self):
+        self.backend.put_bucket_versioning("mybucket", "Enabled")
+        for name in ("a", "b"):
+            self.backend.put_object("mybucket", name, b"value")
+        self.backend.put_bucket_versioning("mybucket", "Suspended")
+        with mock.patch.object(models.models.notifications, "send_event") as send:
+            self.backend.delete_objects(
+                "mybucket", [{"Key": "a", "VersionId": "0"}, {"Key": "b"}]
+            )
+        keys = [call.args[3] for call in send.call_args_list]
+        self.assertEqual(["a", "b"], [key.name for key in keys])
+        self.assertEqual(['"%s"' % hashlib.md5(b"value").hexdigest()], [keys[0].etag])
+        self.assertEqual(5, keys[0].size)
+
+    def test_too_many_keys(self):
+        objects = [{"Key": str(i)} for i in range(models.MAX_DELETE_KEYS + 1)]
+        with self.assertRaises(models.models.MalformedXML):
+            self.backend.delete_objects("mybucket", objects)
+
+    def test_release_blobs(self):
+        self.backend.deduplicate = True
+        key = self.backend.put_object("mybucket", "a", b"value")
+        blob_path = self.backend.blobs.blob_path(key._blob)
+        self.backend.delete_objects("mybucket", [{"Key": "a"}])
+        self.assertFalse(os.path.exists(blob_path))
+
+
+class PurgeBucketTests(ModelTestCase):
+    def test_purge(self):
+        self.backend.deduplicate = True
+        key = self.backend.put_object("mybucket", "a", b"value")
+        blob_path = self.backend.blobs.blob_path(key._blob)
+        self.backend.purge_bucket("mybucket").join()
+        self.assertFalse(os.path.exists(self.bucket._path))
+        self.assertEqual([], os.listdir(os.path.join(self._dir, models.TRASH_DIR)))
+        self.assertFalse(os.path.exists(blob_path))
+        with self.assertRaises(models.models.MissingBucket):
+            self.backend.get_bucket("mybucket")
+        # The name can be used again right away.
+        self.backend.create_bucket("mybucket", "us-east-1")
+        self.assertEqual(0, len(self.backend.get_bucket("mybucket").keys))
+
+    def test_purge_missing(self):
+        with self.assertRaises(models.models.MissingBucket):
+            self.backend.purge_bucket("missing")
+        self.assertEqual([], os.listdir(os.path.join(self._dir, models.TRASH_DIR)))
+
+
+class BucketRegistryTests(ModelTestCase):
+    def test_cached(self):
+        bucket = self.backend.get_bucket("mybucket")
+        self.assertIs(bucket, self.backend.get_bucket("mybucket"))
+        self.assertIs(bucket.keys, bucket.keys)
+
+    def test_invalidated_by_other_process(self):
+        self.backend.get_bucket("mybucket")
+        # Another server process sharing the data directory.
+        other = models.ShoobxS3Backend()
+        other.directory = self._dir
+        self.assertTrue(other.delete_bucket("mybucket"))
+        with self.assertRaises(models.models.MissingBucket):
+            self.backend.get_bucket("mybucket")
+        other.create_bucket("mybucket", "us-east-1")
+        self.assertEqual("mybucket", self.backend.get_bucket("mybucket").name)
+
+
+class HashedLayoutTests(ModelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.backend.layout = layouts.HASHED
+        self.backend.create_bucket("hashed", "us-east-1")
+        self.bucket = self.backend.get_bucket("hashed")
+
+    def test_key_path(self):
+        name = "folder/" + "x" * 300
+        key = self.backend.put_object("hashed", name, b"some value")
+        depth = key._path.count(os.sep) - self.bucket._path.count(os.sep)
+        self.assertEqual(4, depth)
+        self.assertEqual(b"some value", self.backend.get_object("hashed", name).value)
+        self.assertEqual([name], list(self.bucket.keys))
+
+    def test_versions(self):
+        self.backend.put_bucket_versioning("hashed", "Enabled")
+        self.backend.put_object("hashed", "the-key", b"1")
+        self.backend.put_object("hashed", "the-key", b"2")
+        versions = models.Key.get_versions(self.bucket, "the-key")
+        self.assertEqual([0, 1], [key.version for key in versions])
+
+    def test_migrate(self):
+        # "ab" is also the name of a fan-out directory of the hashed layout.
+        names = ["ab", "b/c", "d"]
+        for name in names:
+            self.backend.put_object("mybucket", name, name.encode())
+        bucket = self.backend.get_bucket("mybucket")
+        self.assertEqual(3, migrate.migrate_bucket(bucket, self.bucket.layout))
+        bucket = self.backend.get_bucket("mybucket")
+        self.assertEqual("hashed", bucket.layout.name)
+        self.assertEqual(sorted(names), sorted(bucket.keys))
+        self.assertEqual(b"b/c", self.backend.get_object("mybucket", "b/c").value)
+        migrate.migrate_bucket(bucket, layouts.get_layout("flat"))
+        bucket = self.backend.get_bucket("mybucket")
+        keys_path = os.path.join(bucket._path, "keys")
+        self.assertEqual(["ab", "b__sl__c", "d"], sorted(os.listdir(keys_path)))
+        self.assertEqual(b"ab", self.backend.get_object("mybucket", "ab").value)
+
+
+class BlobStoreTests(ModelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.backend.deduplicate = True
+        self.backend.create_bucket("other", "us-east-1")
+
+    def blob_path(self, data):
+        return self.backend.blobs.blob_path(hashlib.sha256(data).hexdigest())
+
+    def test_deduplicate(self):
+        key1 = self.backend.put_object("mybucket", "a", b"same value")
+        key2 = self.backend.put_object("other", "b", b"same value")
+        self.assertTrue(os.path.samefile(key1._value_path, key2._value_path))
+        self.assertEqual(3, os.stat(self.blob_path(b"same value")).st_nlink)
+        self.assertEqual(key1.etag, key2.etag)
+        self.assertEqual(b"same value", self.backend.get_object("other", "b").value)
+
+    def test_copy_links(self):
+        src = self.backend.put_object("mybucket", "a", b"value")
+        self.backend.copy_object(src, "other", "b")
+        copy = self.backend.get_object("other", "b")
+        self.assertTrue(os.path.samefile(src._value_path, copy._value_path))
+        self.assertEqual(src.etag, copy.etag)
+        self.assertEqual(5, copy.size)
+
+    def test_release(self):
+        blob_path = self.blob_path(b"value")
+        self.backend.put_object("mybucket", "a", b"value")
+        self.backend.put_object("other", "a", b"value")
+        self.backend.delete_object("mybucket", "a")
+        self.assertTrue(os.path.exists(blob_path))
+        # Overwriting releases the previous value.
+        self.backend.put_object("other", "a", b"new value")
+        self.assertFalse(os.path.exists(blob_path))
+        self.backend.delete_object("other", "a")
+        self.assertFalse(os.path.exists(self.blob_path(b"new value")))
+
+    def test_disabled(self):
+        self.backend.deduplicate = False
+        src = self.backend.put_object("mybucket", "a", b"value")
+        self.backend.copy_object(src, "other", "b")
+        copy = self.backend.get_object("other", "b")
+        self.assertFalse(os.path.samefile(src._value_path, copy._value_path))
+        self.assertEqual(b"value", copy.value)
+        self.assertFalse(os.path.exists(self.backend.blobs.path))
@@ -0,0 +1,129 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Shoobx S3 Profiling Tests
+"""
+import os
+import pstats
+import shutil
+import tempfile
+import time
+import unittest
+
+import werkzeug.test
+
+from shoobx.mocks3 import config, profiling
+
+TEST_CONFIG = """
+[shoobx:mocks3]
+log-level = INFO
+directory = %(dir)s
+hostname = localhost
+metrics = False
+
+[shoobx:profile]
+mode = cprofile
+directory = %(dir)s/profiles
+every = %(every)s
+operations = %(operations)s
+"""
+
+
+def slow_app(environ, start_response):
+    time.sleep(0.05)
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"done"]
+
+
+class ProfilingTests(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self.profiles = os.path.join(self._dir, "profiles")
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+        config._CONFIG = None
+        config.CONFIG_FILE = None
+
+    def client(self, every=2, operations="GetObject"):
+        config_path = os.path.join(self._dir, "config.ini")
+        with open(config_path, "w") as file:
+            file.write(
+                TEST_CONFIG
+                % {"dir": self._dir, "every": every, "operations": operations}
+            )
+        client = werkzeug.test.Client(config.configure(config_path))
+        headers = {"x-amz-acl": "public-read"}
+        client.put("/mybucket", headers=headers, buffered=True)
+        client.put("/mybucket/key", data=b"value", headers=headers, buffered=True)
+        return client
+
+    def test_configure(self):
+        client = self.client()
+        for _ in range(4):
+            response = client.get("/mybucket/key", buffered=True)
+            self.assertEqual(b"value", response.data)
+        # CreateBucket and two GetObject requests were profiled, only the
+        # latter were kept.
+        name = f"GetObject.{os.getpid()}.prof"
+        self.assertEqual([name], os.listdir(self.profiles))
+        stats = pstats.Stats(os.path.join(self.profiles, name))
+        functions = {function for _, _, function in stats.stats}
+        self.assertIn("get_object", functions)
+
+    def test_rare_operation(self):
+        # Only requests of the operations are counted, so the first of three
+        # deletes is profiled, although most requests are of other operations.
+        client = self.client(every=3, operations="DeleteObject")
+        for index in range(3):
+            for _ in range(5):
+                client.get("/mybucket/key", buffered=True)
+            client.delete(f"/mybucket/key-{index}", buffered=True)
+        name = f"DeleteObject.{os.getpid()}.prof"
+        self.assertEqual([name], os.listdir(self.profiles))
+        stats = pstats.Stats(os.path.join(self.profiles, name))
+        calls = [
+            stat[1]
+            for (_, _, function), stat in stats.stats.items()
+            if function == "delete_object"
+        ]
+        self.assertIn(1, calls)
+
+    def test_operation(self):
+        for method, path, operation in (
+            ("GET", "/mybucket/key", "GetObject"),
+            ("GET", "/mybucket/key?tagging", "GetObjectTagging"),
+            ("PUT", "/mybucket", "CreateBucket"),
+            ("DELETE", "/mybucket/key?uploadId=1", "AbortMultipartUpload"),
+            ("POST", "/mybucket/key", None),
+        ):
+            environ = werkzeug.test.EnvironBuilder(path, method=method).get_environ()
+            self.assertEqual(operation, profiling._operation(environ))
+
+    def test_sampling(self):
+        app = profiling.ProfilerMiddleware(
+            slow_app, self.profiles, mode="sampling", every=1, interval=0.001
+        )
+        client = werkzeug.test.Client(app)
+        self.assertEqual(b"done", client.get("/", buffered=True).data)
+        name = f"Unknown.{os.getpid()}.collapsed"
+        with open(os.path.join(self.profiles, name)) as file:
+            lines = file.read().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any("slow_app (test_profiling.py:" in line for line in lines))
+
+    def test_buckets(self):
+        app = profiling.ProfilerMiddleware(
+            slow_app, self.profiles, every=1, buckets=["profiled"]
+        )
+        client = werkzeug.test.Client(app)
+        client.get("/other/key", buffered=True)
+        self.assertEqual([], os.listdir(self.profiles))
+        client.get("/profiled/key", buffered=True)
+        self.assertEqual([f"Unknown.{os.getpid()}.prof"], os.listdir(self.profiles))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            profiling.ProfilerMiddleware(slow_app, self.profiles, mode="perf")
@@ -0,0 +1,251 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Shoobx S3 Server Tests
+"""
+import base64
+import concurrent.futures
+import hashlib
+import http.client
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+from unittest import mock
+
+from shoobx.mocks3 import config, models, run
+
+TEST_CONFIG = """
+[shoobx:mocks3]
+log-level = INFO
+directory = %s
+hostname = localhost
+"""
+
+
+def hello_app(environ, start_response):
+    if environ["PATH_INFO"] == "/error":
+        raise RuntimeError("failed")
+    body = b""
+    if environ["REQUEST_METHOD"] != "POST":
+        body = environ["wsgi.input"].read()
+    start_response(
+        "200 OK",
+        [("Content-Type", "text/plain"), ("Content-Length", str(len(body) + 5))],
+    )
+    return [b"hello", body]
+
+
+class ServerTestMixin:
+    """Serves the application returned by `make_app()` in a pooled server."""
+
+    threads = 2
+
+    def setUp(self):
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        self.server = run.PooledWSGIServer(
+            "127.0.0.1",
+            0,
+            self.make_app(),
+            handler=run.make_handler(keep_alive=5),
+            fd=self.sock.fileno(),
+            threads=self.threads,
+        )
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.port)
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.thread.join()
+        self.server.executor.shutdown()
+        self.server.server_close()
+        self.sock.close()
+
+
+class PooledWSGIServerTests(ServerTestMixin, unittest.TestCase):
+    def make_app(self):
+        return run.limit_request_size(hello_app, 10)
+
+    def request(self, method, body=None):
+        self.conn.request(method, "/", body=body)
+        response = self.conn.getresponse()
+        return response.status, response.read()
+
+    def test_keep_alive(self):
+        self.assertEqual((200, b"hello"), self.request("GET"))
+        sock = self.conn.sock
+        self.assertIsNotNone(sock)
+        self.assertEqual((200, b"hello 1"), self.request("PUT", b" 1"))
+        self.assertIs(sock, self.conn.sock)
+
+    def test_keep_alive_latency(self):
+        # With Nagle's algorithm, responses sent in several writes wait for
+        # the delayed ACK of the client, about 40ms per request.
+        self.request("GET")
+        start = time.perf_counter()
+        for _ in range(10):
+            self.assertEqual((200, b"hello"), self.request("GET"))
+        self.assertLess(time.perf_counter() - start, 0.2)
+
+    def test_unread_body_closes(self):
+        self.conn.request("POST", "/", body=b"not read")
+        response = self.conn.getresponse()
+        self.assertEqual("close", response.getheader("Connection"))
+
+    def test_error_closes(self):
+        self.conn.request("GET", "/error")
+        response = self.conn.getresponse()
+        response.read()
+        self.assertEqual(500, response.status)
+        self.assertEqual("close", response.getheader("Connection"))
+        self.assertEqual((200, b"hello"), self.request("GET"))
+
+    def test_request_size_limit(self):
+        status, body = self.request("PUT", b"x" * 11)
+        self.assertEqual(413, status)
+        self.assertIn(b"<Code>EntityTooLarge</Code>", body)
+        self.assertEqual((200, b"hello"), self.request("GET"))
+
+    def test_request_size_limit_chunked(self):
+        self.conn.request("PUT", "/", body=iter([b"x" * 6] * 2), encode_chunked=True)
+        response = self.conn.getresponse()
+        self.assertEqual(413, response.status)
+        self.assertIn(b"<Code>EntityTooLarge</Code>", response.read())
+        self.assertEqual("close", response.getheader("Connection"))
+        self.conn.request("PUT", "/", body=iter([b"x" * 5] * 2), encode_chunked=True)
+        response = self.conn.getresponse()
+        self.assertEqual(200, response.status)
+        self.assertEqual(b"hello" + b"x" * 10, response.read())
+
+
+class AppTestMixin(ServerTestMixin):
+    """Serves the mock S3 application."""
+
+    def make_app(self):
+        self._dir = tempfile.mkdtemp()
+        config_path = os.path.join(self._dir, "config.ini")
+        with open(config_path, "w") as file:
+            file.write(TEST_CONFIG % self._dir)
+        return config.configure(config_path)
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self._dir)
+        config._CONFIG = None
+        config.CONFIG_FILE = None
+
+
+class SendfileTests(AppTestMixin, unittest.TestCase):
+    def test_sendfile(self):
+        headers = {"x-amz-acl": "public-read"}
+        value = os.urandom(300000)
+        for path, body in (("/mybucket", None), ("/mybucket/key", value)):
+            self.conn.request("PUT", path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+            self.assertEqual(200, response.status)
+        sock = self.conn.sock
+        with mock.patch.object(
+            socket.socket, "sendfile", autospec=True, side_effect=socket.socket.sendfile
+        ) as sendfile:
+            self.conn.request("GET", "/mybucket/key")
+            response = self.conn.getresponse()
+            self.assertEqual(value, response.read())
+            self.assertEqual(1, sendfile.call_count)
+            # Ranges are read by the application.
+            self.conn.request("GET", "/mybucket/key", headers={"Range": "bytes=1-2"})
+            response = self.conn.getresponse()
+            self.assertEqual(value[1:3], response.read())
+            self.assertEqual(1, sendfile.call_count)
+        self.assertIs(sock, self.conn.sock)
+
+
+class UploadTests(AppTestMixin, unittest.TestCase):
+    def put(self, path, body=None, headers=None):
+        self.conn.request("PUT", path, body=body, headers=headers or {})
+        response = self.conn.getresponse()
+        response.read()
+        self.assertEqual(200, response.status)
+        return response
+
+    def test_checksum_streamed(self):
+        self.put("/mybucket")
+        value = os.urandom(100000)
+        checksum = base64.b64encode(zlib.crc32(value).to_bytes(4, "big")).decode()
+        headers = {"x-amz-acl": "public-read", "x-amz-sdk-checksum-algorithm": "CRC32"}
+        with mock.patch.object(
+            models, "_write_value", autospec=True, side_effect=models._write_value
+        ) as write_value:
+            self.put(
+                "/mybucket/key",
+                value,
+                {**headers, "x-amz-checksum-crc32": checksum},
+            )
+            # Without the value, moto computes the checksum from the body.
+            self.put("/mybucket/other", value, headers)
+        calls = write_value.call_args_list
+        self.assertEqual(
+            [True, False], [not isinstance(call.args[2], bytes) for call in calls]
+        )
+        for path in ("/mybucket/key", "/mybucket/other"):
+            self.conn.request("GET", path, headers={"x-amz-checksum-mode": "ENABLED"})
+            response = self.conn.getresponse()
+            self.assertEqual(value, response.read())
+            self.assertEqual(200, response.status)
+            self.assertEqual(checksum, response.getheader("x-amz-checksum-crc32"))
+
+
+class OverwriteTests(AppTestMixin, unittest.TestCase):
+    threads = 8
+
+    def connect(self):
+        return http.client.HTTPConnection("127.0.0.1", self.server.port)
+
+    def test_concurrent_overwrite(self):
+        headers = {"x-amz-acl": "public-read"}
+        # Values of different sizes, so mixing two of them is noticed.
+        values = [bytes([index]) * (1000 * (index + 1)) for index in range(4)]
+        for path, body in (("/mybucket", None), ("/mybucket/key", values[0])):
+            self.conn.request("PUT", path, body=body, headers=headers)
+            self.conn.getresponse().read()
+        done = threading.Event()
+
+        def write():
+            conn = self.connect()
+            try:
+                for index in range(100):
+                    body = values[index % len(values)]
+                    conn.request("PUT", "/mybucket/key", body=body, headers=headers)
+                    conn.getresponse().read()
+            finally:
+                done.set()
+                conn.close()
+
+        def read():
+            conn = self.connect()
+            responses = []
+            while not done.is_set():
+                conn.request("GET", "/mybucket/key")
+                response = conn.getresponse()
+                body = response.read()
+                responses.append((response.status, response.getheader("ETag"), body))
+            conn.close()
+            return responses
+
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            readers = [pool.submit(read) for _ in range(3)]
+            write()
+        responses = [response for reader in readers for response in reader.result()]
+        self.assertTrue(responses)
+        for status, etag, body in responses:
+            self.assertEqual(200, status)
+            self.assertIn(body, values)
+            self.assertEqual(f'"{hashlib.md5(body).hexdigest()}"', etag)
@@ -57,7 +57,9 @@ class BotoTestCase(unittest.TestCase):
         )
         self._dir = tempfile.mkdtemp()
         self.data_dir_patch = mock.patch(
-            "shoobx.mocks3.models.ShoobxS3Backend.directory", new_callable=mock.PropertyMock, return_value=self._dir
+            "shoobx.mocks3.models.ShoobxS3Backend.directory",
+            new_callable=mock.PropertyMock,
+            return_value=self._dir,
         )
 
         self.data_dir_patch.start()
@@ -432,6 +434,17 @@ class BotoTestCase(unittest.TestCase):
         body = self.retrieve_key("the-key")
         self.assertEqual(b"foobar" * 100000, body.read())
 
+    def test_get_streams_value(self):
+        self.store_key("the-key", "foobar" * 1000)
+        value = mock.PropertyMock(side_effect=AssertionError("value loaded"))
+        with mock.patch.object(models.Key, "value", value):
+            obj = self.bucket.Object("the-key")
+            self.assertEqual(6000, obj.content_length)
+            body = self.retrieve_key("the-key")
+            self.assertEqual(b"foobar" * 1000, body.read())
+            rsp = self.bucket.Object("the-key").get(Range="bytes=3-8")
+            self.assertEqual(b"barfoo", rsp["Body"].read())
+
     def test_copy_key(self):
         self.store_key("the-key", "some value")
         copy_source = {"Bucket": "mybucket", "Key": "the-key"}
@@ -470,6 +483,31 @@ class BotoTestCase(unittest.TestCase):
         )
         self.assertEqual(md, self.bucket.Object("new-key").metadata)
 
+    def test_writes_per_request(self):
+        # The metadata and ACL of a request are written along with the key.
+        md = {"md": "Metadatastring"}
+        copy_source = {"Bucket": "mybucket", "Key": "the-key"}
+        with mock.patch.object(
+            models, "_write_info", wraps=models._write_info
+        ) as write_info, mock.patch.object(
+            models.index.KeyIndex, "put", autospec=True, wraps=models.index.KeyIndex.put
+        ) as put:
+            self.s3.put_object(
+                Bucket="mybucket",
+                Key="the-key",
+                Body=b"some value",
+                Metadata=md,
+                ACL="public-read",
+            )
+            self.assertEqual((1, 1), (write_info.call_count, put.call_count))
+            self.s3.copy_object(
+                Bucket="mybucket", Key="new-key", CopySource=copy_source
+            )
+            self.assertEqual((2, 2), (write_info.call_count, put.call_count))
+        self.assertEqual(md, self.bucket.Object("new-key").metadata)
+        grants = self.s3.get_object_acl(Bucket="mybucket", Key="the-key")["Grants"]
+        self.assertIn("READ", [grant["Permission"] for grant in grants])
+
     @freeze_time("2012-01-01 12:00:00")
     def test_last_modified(self):
         self.store_key("the-key", "some value")
@@ -721,6 +759,29 @@ class BotoTestCase(unittest.TestCase):
         rsp = self.bucket.Object("the-key").get(VersionId="1")
         self.assertEqual(b"Version 2", rsp["Body"].read())
 
+    def test_delete_keys_versioned(self):
+        self.bucket.Versioning().enable()
+        self.store_key("the-key", b"Version 1")
+        rsp = self.s3.delete_objects(
+            Bucket="mybucket", Delete={"Objects": [{"Key": "the-key"}]}
+        )
+        self.assertEqual(
+            [{"Key": "the-key", "DeleteMarker": True, "DeleteMarkerVersionId": "1"}],
+            rsp["Deleted"],
+        )
+        with self.assertRaises(ClientError):
+            self.bucket.Object("the-key").get()
+        rsp = self.s3.list_object_versions(Bucket="mybucket", Prefix="the-key")
+        self.assertEqual(["0"], [v["VersionId"] for v in rsp["Versions"]])
+        self.assertEqual(["1"], [m["VersionId"] for m in rsp["DeleteMarkers"]])
+        rsp = self.bucket.Object("the-key").get(VersionId="0")
+        self.assertEqual(b"Version 1", rsp["Body"].read())
+        with self.assertRaises(ClientError):
+            self.s3.delete_objects(
+                Bucket="mybucket",
+                Delete={"Objects": [{"Key": "the-key", "VersionId": "latest"}]},
+            )
+
     def test_acl_setting(self):
         self.store_key("test.txt", b"imafile")
         self.bucket.Object("test.txt").Acl().put(ACL="public-read")
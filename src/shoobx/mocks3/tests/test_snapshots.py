@@ -0,0 +1,128 @@
+###############################################################################
+#
+# Copyright 2026 by Shoobx, Inc.
+#
+###############################################################################
+"""Shoobx S3 Snapshot Tests
+"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import werkzeug.test
+
+from shoobx.mocks3 import config, models, snapshots
+
+TEST_CONFIG = """
+[shoobx:mocks3]
+log-level = INFO
+directory = %s
+hostname = localhost
+allow-snapshots = True
+"""
+
+
+class SnapshotStoreTests(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self.backend = models.ShoobxS3Backend()
+        self.backend.directory = self._dir
+        self.backend.create_bucket("mybucket", "us-east-1")
+        self.store = snapshots.SnapshotStore(self.backend)
+
+    def tearDown(self):
+        models._info_cache.clear()
+        shutil.rmtree(self._dir)
+
+    def names(self, bucket_name):
+        bucket = self.backend.get_bucket(bucket_name)
+        keys, _, _, _ = self.backend.list_objects(bucket, "", None, None, None)
+        return [key.name for key in keys]
+
+    def test_restore(self):
+        key = self.backend.put_object("mybucket", "a", b"seeded")
+        self.backend.put_object("mybucket", "b", b"seeded")
+        self.store.create("seeded")
+        self.assertEqual(["seeded"], self.store.list())
+
+        self.backend.put_object("mybucket", "a", b"changed")
+        self.backend.delete_object("mybucket", "b")
+        self.backend.put_object("mybucket", "c", b"added")
+        self.backend.create_bucket("other", "us-east-1")
+
+        self.store.restore("seeded").join()
+        self.assertEqual(["a", "b"], self.names("mybucket"))
+        self.assertEqual(b"seeded", self.backend.get_object("mybucket", "a").value)
+        with self.assertRaises(models.models.MissingBucket):
+            self.backend.get_bucket("other")
+        snapshot_value = os.path.join(
+            self.store.path, "seeded", "mybucket.bucket", "keys", "a", "0", "value"
+        )
+        self.assertTrue(os.path.samefile(snapshot_value, key._value_path))
+
+        # Restoring does not change the snapshot.
+        self.backend.put_object("mybucket", "a", b"changed again")
+        self.store.restore("seeded").join()
+        self.assertEqual(b"seeded", self.backend.get_object("mybucket", "a").value)
+
+    def test_blobs(self):
+        self.backend.deduplicate = True
+        key = self.backend.put_object("mybucket", "a", b"seeded")
+        blob_path = self.backend.blobs.blob_path(key._blob)
+        self.store.create("seeded")
+        self.backend.delete_object("mybucket", "a")
+        self.assertTrue(os.path.exists(blob_path))
+        self.store.restore("seeded").join()
+        self.assertEqual(b"seeded", self.backend.get_object("mybucket", "a").value)
+        self.store.delete("seeded")
+        self.assertTrue(os.path.exists(blob_path))
+        self.backend.delete_object("mybucket", "a")
+        self.assertFalse(os.path.exists(blob_path))
+
+    def test_errors(self):
+        self.store.create("seeded")
+        with self.assertRaises(FileExistsError):
+            self.store.create("seeded")
+        with self.assertRaises(FileNotFoundError):
+            self.store.restore("missing")
+        with self.assertRaises(ValueError):
+            self.store.create("../escape")
+        self.store.delete("seeded")
+        self.assertEqual([], self.store.list())
+
+
+class SnapshotEndpointTests(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        config_path = os.path.join(self._dir, "config.ini")
+        with open(config_path, "w") as file:
+            file.write(TEST_CONFIG % self._dir)
+        self.client = werkzeug.test.Client(config.configure(config_path))
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+        config._CONFIG = None
+        config.CONFIG_FILE = None
+
+    def test_endpoint(self):
+        headers = {"x-amz-acl": "public-read"}
+        self.client.put("/mybucket", headers=headers)
+        self.client.put("/mybucket/key", data=b"seeded", headers=headers)
+        self.assertEqual(201, self.client.put("/SNAPSHOTS?name=seeded").status_code)
+        self.assertEqual(409, self.client.put("/SNAPSHOTS?name=seeded").status_code)
+        self.assertEqual(b"seeded\n", self.client.get("/SNAPSHOTS").data)
+        self.client.put("/mybucket/key", data=b"changed", headers=headers)
+        self.assertEqual(204, self.client.post("/SNAPSHOTS?name=seeded").status_code)
+        self.assertEqual(b"seeded", self.client.get("/mybucket/key").data)
+        self.assertEqual(404, self.client.post("/SNAPSHOTS?name=other").status_code)
+        self.assertEqual(400, self.client.post("/SNAPSHOTS?name=.x").status_code)
+        self.assertEqual(204, self.client.delete("/SNAPSHOTS?name=seeded").status_code)
+        self.assertEqual(b"", self.client.get("/SNAPSHOTS").data)
+        # Wait for the replaced buckets to be removed.
+        trash_path = os.path.join(self._dir, models.TRASH_DIR)
+        for _ in range(100):
+            if not os.listdir(trash_path):
+                break
+            time.sleep(0.01)
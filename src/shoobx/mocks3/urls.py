@@ -5,7 +5,7 @@
 ###############################################################################
 """Flask endpoints
 """
-from shoobx.mocks3.responses import S3ResponseInstance
+from shoobx.mocks3.responses import S3Response, S3ResponseInstance
 
 url_bases = [
     "https?://s3(.*).amazonaws.com",
@@ -21,13 +21,25 @@ def ambiguous_response2(*args, **kwargs):
     return S3ResponseInstance.ambiguous_response(*args, **kwargs)
 
 
+# Every request is handled by a new response instance, since they keep the
+# request state and requests are handled concurrently by threaded servers.
 url_paths = {
     # subdomain bucket
-    "{0}/$": S3ResponseInstance.bucket_response,
+    "{0}/$": S3Response.method_dispatch(S3Response.bucket_response),
     # Expose the storage directory
-    "{0}/STORAGE_DIR$": S3ResponseInstance.get_storage_dir,
+    "{0}/STORAGE_DIR$": S3Response.method_dispatch(S3Response.get_storage_dir),
+    # Delete a bucket with all its keys, if enabled
+    "{0}/PURGE$": S3Response.method_dispatch(S3Response.purge_bucket),
+    # Snapshots of the data directory, if enabled
+    "{0}/SNAPSHOTS$": S3Response.method_dispatch(S3Response.snapshot_response),
+    # Request metrics in the Prometheus text format
+    "{0}/METRICS$": S3Response.method_dispatch(S3Response.get_metrics),
     # subdomain key of path-based bucket
-    "{0}/(?P<key_or_bucket_name>[^/]+)/?$": S3ResponseInstance.ambiguous_response,
+    "{0}/(?P<key_or_bucket_name>[^/]+)/?$": S3Response.method_dispatch(
+        S3Response.ambiguous_response
+    ),
     # path-based bucket + key
-    "{0}/(?P<bucket_name_path>[^/]+)/(?P<key_name>.+)": S3ResponseInstance.key_response,
+    "{0}/(?P<bucket_name_path>[^/]+)/(?P<key_name>.+)": S3Response.method_dispatch(
+        S3Response.key_response
+    ),
 }